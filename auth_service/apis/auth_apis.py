@@ -2,7 +2,7 @@
 Authentication APIs
 """
 
-from fastapi import APIRouter, Body, Security
+from fastapi import APIRouter, Body, Header, Security
 from fastapi.responses import ORJSONResponse
 
 from errorhub.decorator import api_exception_handler
@@ -16,6 +16,7 @@ from auth_service.models.auth import (
 )
 from auth_service.models.users import UserResponse
 
+from auth_service.configuration import settings
 from auth_service.logic.factory import factory
 from auth_service.middleware.auth_dependency import get_current_user
 
@@ -113,11 +114,20 @@ async def refresh_token(
 @api_exception_handler
 async def get_current_user_info(
     payload=Security(get_current_user),
+    cache_control: str | None = Header(None),
 ):
-    user_id = payload["sub"]
+    """
+    Current user, built from the verified access token when ME_RESPONSE_MODE is "claims".
+    The user is read from the repository when the token lacks a field, e.g. tokens issued before names were
+    added to the claims, or when the client asks for fresh data with Cache-Control: no-cache.
+    """
+    if settings.get_me_response_mode() == "claims" and not _wants_fresh(cache_control):
+        user = _user_from_claims(payload)
+        if user is not None:
+            return user
 
     user_service = factory.get_user_service()
-    user = await user_service.get_user_info(user_id, None)
+    user = await user_service.get_user_info(payload["sub"], None)
 
     return UserResponse(
         id=user.id,
@@ -125,3 +135,41 @@ async def get_current_user_info(
         email=user.email,
         apps=user.apps,
     )
+
+
+def _wants_fresh(cache_control: str | None) -> bool:
+    """
+    True when the Cache-Control request header refuses stale data
+    """
+    if not cache_control:
+        return False
+    directives = {directive.strip().lower() for directive in cache_control.split(",")}
+    return "no-cache" in directives or "max-age=0" in directives
+
+
+def _user_from_claims(payload: dict) -> UserResponse | None:
+    """
+    UserResponse from access token claims, None when one of its fields is missing
+    """
+    if not {"sub", "name", "email", "apps"}.issubset(payload):
+        return None
+    return UserResponse(id=payload["sub"], name=payload["name"], email=payload["email"], apps=payload["apps"])
+
+
+@router.get(
+    "/.well-known/jwks.json",
+    summary="Public keys to verify access tokens",
+    responses={200: {"description": "JSON Web Key Set"}},
+    tags=["Authentication"],
+)
+@api_exception_handler
+async def jwks():
+    """
+    Publish the token verification keys so other services verify tokens offline
+    """
+    token_service = factory.get_token_service()
+    return ORJSONResponse(
+        content=token_service.jwks(),
+        status_code=200,
+        headers={"Cache-Control": f"public, max-age={settings.get_jwks_max_age_seconds()}"},
+    )
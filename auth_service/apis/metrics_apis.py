@@ -0,0 +1,29 @@
+"""
+Operational metrics APIs
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from auth_service.configuration import settings
+from auth_service.utils.metrics import registry
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    summary="Stage latency histograms",
+    responses={200: {"description": "Prometheus text exposition format"}},
+    tags=["Operations"],
+    include_in_schema=False,
+)
+async def metrics():
+    """
+    Expose the per-stage and per-route latency histograms to a Prometheus scraper.
+    Off unless METRICS_ENDPOINT_ENABLED is set: the counts tell e.g. whether a login email exists,
+    so only enable it where the endpoint is not public. It then answers like an unknown route.
+    """
+    if not settings.is_metrics_endpoint_enabled():
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
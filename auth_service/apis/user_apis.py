@@ -2,16 +2,21 @@
 Apis to register or handle users.
 """
 
-from datetime import datetime, UTC
-
-from fastapi import APIRouter, Body, Security
+from fastapi import APIRouter, Body, Header, Security
 from fastapi.responses import JSONResponse, Response
 
 from errorhub.decorator import api_exception_handler
 
-from auth_service.models.users import User, UserRequest, UpdateUserRequest
+from auth_service.models.users import (
+    BatchUserRequest,
+    BatchUserResponse,
+    User,
+    UserRequest,
+    UpdateUserRequest,
+    UserResponse,
+)
 from auth_service.logic.factory import factory
-from auth_service.utils.helper import generate_user_id, raise_exception_if_not_valid_user
+from auth_service.utils.helper import generate_user_id, raise_exception_if_not_valid_user, readable_user_ids
 from auth_service.middleware.auth_dependency import get_current_user
 
 router = APIRouter()
@@ -46,6 +51,32 @@ async def register_user(
     )
 
 
+@router.post(
+    "/users/batch",
+    tags=["Users"],
+    responses={200: {"description": "Users found for the requested ids", "model": BatchUserResponse}},
+)
+@api_exception_handler
+async def get_users_batch(
+    payload: BatchUserRequest = Body(..., embed=True),
+    token_data=Security(get_current_user),
+):
+    """
+    Api to get public information of many users in one request.
+    Callers only see themselves unless their subject is in USER_READ_ALL_SUBJECTS,
+    other ids are reported as not found so their existence is not revealed.
+    """
+    user_service = factory.get_user_service()
+    allowed_ids = readable_user_ids(payload.user_ids, token_data)
+    users = await user_service.get_users_by_ids(allowed_ids) if allowed_ids else []
+    found_ids = {user.id for user in users}
+    response = BatchUserResponse(
+        users=[UserResponse(id=user.id, name=user.name, email=user.email, apps=user.apps) for user in users],
+        not_found=[user_id for user_id in dict.fromkeys(payload.user_ids) if user_id not in found_ids],
+    )
+    return JSONResponse(status_code=200, content=response.model_dump())
+
+
 @router.delete("/users/{user_id}", tags=["Users"], responses={})
 @api_exception_handler
 async def delete_user(user_id: str, token_data=Security(get_current_user)):
@@ -67,7 +98,9 @@ async def get_user(user_id: str, email: str | None = None, token_data=Security(g
     await raise_exception_if_not_valid_user(user_id, token_data)
     user_service = factory.get_user_service()
     user = await user_service.get_user_info(user_id=user_id, user_email=email)
-    return JSONResponse(status_code=200, content=user.model_dump(exclude={"password_hash"}))
+    return JSONResponse(
+        status_code=200, content=user.model_dump(exclude={"password_hash"}), headers={"ETag": _etag(user)}
+    )
 
 
 @router.put("/users/{user_id}", tags=["Users"], responses={})
@@ -77,20 +110,49 @@ async def update_user(
     token_data=Security(get_current_user),
     payload: UpdateUserRequest = Body(..., embed=True),
     email: str | None = None,
+    if_match: str | None = Header(None),
 ):
     """
-    Api to update user or return proper exceptions for errors
+    Api to update user or return proper exceptions for errors.
+    Only the fields sent are changed; an If-Match header with the user's ETag from GET or PUT
+    refuses the update when the user changed since, "*" only requires the user to exist.
     """
     await raise_exception_if_not_valid_user(user_id, token_data)
     user_service = factory.get_user_service()
-    user = User(
-        id=user_id,
-        name=payload.name,
-        email=payload.email if payload.email is not None else "",
-        password_hash=payload.password if payload.password is not None else "",
-        apps=payload.app_name if payload.app_name is not None else [],
-        updated_at=datetime.now(UTC).isoformat(),
-        created_at="",  # This will be ignored in update
+    fields = payload.model_dump(exclude_unset=True)
+    changes = {}
+    if "name" in fields:
+        changes["name"] = fields["name"]
+    # empty values keep the current ones, like before partial updates
+    if fields.get("email"):
+        changes["email"] = fields["email"]
+    if fields.get("app_name"):
+        changes["apps"] = fields["app_name"]
+    if fields.get("password"):
+        changes["password"] = fields["password"]
+    new_user = await user_service.update_user_by_id(user_id, changes, _expected_updated_at(if_match))
+    return JSONResponse(
+        status_code=200,
+        content=new_user.model_dump(exclude={"password_hash"}),
+        headers={"ETag": _etag(new_user)},
     )
-    new_user = await user_service.update_user_by_id(user_id=user_id, user=user)
-    return JSONResponse(status_code=200, content=new_user.model_dump(exclude={"password_hash"}))
+
+
+def _etag(user: User) -> str:
+    """
+    ETag of a user, it changes with every update
+    """
+    return f'"{user.updated_at}"'
+
+
+def _expected_updated_at(if_match: str | None) -> str | None:
+    """
+    updated_at an If-Match header asks for, None for a missing header or "*".
+    Weak ETags (W/"...") are compared like strong ones, the service only ever sends one version of a user.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    return tag.strip('"')
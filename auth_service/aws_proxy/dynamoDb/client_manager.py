@@ -1,19 +1,55 @@
-import boto3
 import threading
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 from botocore.client import BaseClient
+from botocore.config import Config
 
 class DynamoDBClientManager:
     _client: Optional[BaseClient] = None
     _region: Optional[str] = None
+    _executor: Optional[ThreadPoolExecutor] = None
     _lock = threading.Lock()  # makes it thread-safe
 
     @classmethod
-    def get_client(cls, region_name: str)-> BaseClient:
+    def get_client(
+        cls,
+        region_name: str,
+        max_pool_connections: int = 10,
+        client_factory: Optional[Callable[[], BaseClient]] = None,
+    ) -> BaseClient:
+        """
+        :param client_factory: Builds the client instead of boto3, e.g. the in-process LocalDynamoDBClient.
+        """
         if cls._client is None:
             with cls._lock:
                 if cls._client is None:
-                    cls._client = boto3.client("dynamodb", region_name=region_name)
+                    if client_factory is not None:
+                        cls._client = client_factory()
+                    else:
+                        import boto3  # pylint: disable=import-outside-toplevel
+
+                        cls._client = boto3.client(
+                            "dynamodb",
+                            region_name=region_name,
+                            config=Config(max_pool_connections=max_pool_connections),
+                        )
                     cls._region = region_name
 
         return cls._client
+
+    @classmethod
+    def use_client(cls, client: Optional[BaseClient]) -> None:
+        """
+        Replace the shared client, e.g. with a LocalDynamoDBClient in tests. None builds a new one on next use.
+        """
+        with cls._lock:
+            cls._client = client
+
+    @classmethod
+    def get_executor(cls, max_workers: int) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dynamodb-io")
+
+        return cls._executor
@@ -0,0 +1,183 @@
+"""
+Conversion between python values and DynamoDB attribute values.
+"""
+
+import types
+import typing
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+Encoder = Callable[[Any], Dict[str, Any]]
+
+
+def _decode_number(raw: str) -> int | float:
+    try:
+        return int(raw)
+    except ValueError:
+        return float(raw)
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """
+    Encode any supported value, dispatching on its exact type first
+    """
+    if value.__class__ is str:
+        return {"S": value}
+    encoder = _ENCODERS_BY_TYPE.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+
+    # subclasses (str enums, OrderedDict, ...) take the slow path
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, str):
+        return {"S": str(value)}
+    if isinstance(value, (int, float)):
+        return {"N": str(value)}
+    if isinstance(value, (list, tuple)):
+        return {"L": [encode_value(v) for v in value]}
+    if isinstance(value, dict):
+        return {"M": {k: encode_value(v) for k, v in value.items()}}
+    if isinstance(value, (set, frozenset)):
+        return _encode_set(value)
+    raise ValueError(f"Unsupported type: {type(value)}")
+
+
+def decode_value(value: Dict[str, Any]) -> Any:
+    """
+    Decode any attribute value, dispatching on its type tag
+    """
+    for dtype, raw in value.items():
+        if dtype == "S":
+            return raw
+        decoder = _DECODERS_BY_TAG.get(dtype)
+        return decoder(raw) if decoder is not None else raw
+    raise ValueError("Empty attribute value")
+
+
+def _encode_set(value: set | frozenset) -> Dict[str, Any]:
+    # DynamoDB has no empty sets
+    if not value:
+        return {"NULL": True}
+    if all(isinstance(v, str) for v in value):
+        return {"SS": sorted(value)}
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+        return {"NS": sorted(str(v) for v in value)}
+    raise ValueError("Sets must contain only strings or only numbers")
+
+
+_ENCODERS_BY_TYPE: Dict[type, Encoder] = {
+    str: lambda v: {"S": v},
+    bool: lambda v: {"BOOL": v},
+    int: lambda v: {"N": str(v)},
+    float: lambda v: {"N": str(v)},
+    type(None): lambda v: {"NULL": True},
+    list: lambda v: {"L": [encode_value(x) for x in v]},
+    tuple: lambda v: {"L": [encode_value(x) for x in v]},
+    dict: lambda v: {"M": {k: encode_value(x) for k, x in v.items()}},
+    set: _encode_set,
+    frozenset: _encode_set,
+}
+
+_DECODERS_BY_TAG: Dict[str, Callable[[Any], Any]] = {
+    "S": lambda raw: raw,
+    "N": _decode_number,
+    "BOOL": lambda raw: raw,
+    "NULL": lambda raw: None,
+    "L": lambda raw: [decode_value(v) for v in raw],
+    "M": lambda raw: {k: decode_value(v) for k, v in raw.items()},
+    "SS": set,
+    "NS": lambda raw: {_decode_number(v) for v in raw},
+    "B": lambda raw: raw,
+}
+
+
+def _templates(annotation: Any) -> Tuple[str, str]:
+    """
+    Python expressions encoding and decoding the value `v` of an attribute with the given annotation.
+    Each checks the actual type or tag and falls back to the generic functions when it differs.
+    """
+    origin = typing.get_origin(annotation)
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+
+    if origin in (typing.Union, types.UnionType):
+        if len(args) != 1:
+            return "_enc(v)", "_dec(v)"
+        encode, decode = _templates(args[0])
+        return f'{{"NULL": True}} if v is None else ({encode})', decode
+    if annotation is str:
+        return '{"S": v} if v.__class__ is str else _enc(v)', 'v["S"] if "S" in v else _dec(v)'
+    if annotation is bool:
+        return '{"BOOL": v} if v.__class__ is bool else _enc(v)', 'v["BOOL"] if "BOOL" in v else _dec(v)'
+    if annotation in (int, float):
+        return '{"N": str(v)} if v.__class__ in (int, float) else _enc(v)', '_num(v["N"]) if "N" in v else _dec(v)'
+    if origin is list and args == [str]:
+        return (
+            '{"L": [{"S": x} if x.__class__ is str else _enc(x) for x in v]} if v.__class__ is list else _enc(v)',
+            '[x["S"] if "S" in x else _dec(x) for x in v["L"]] if "L" in v else _dec(v)',
+        )
+    if origin in (set, frozenset) and args == [str]:
+        return "_set(v)", 'set(v["SS"]) if "SS" in v else (set() if "NULL" in v else _dec(v))'
+    return "_enc(v)", "_dec(v)"
+
+
+def _compile(schema: Dict[str, Any]) -> Tuple[Callable, Callable]:
+    """
+    Generate serialize and deserialize functions with every schema attribute inlined,
+    so known attributes cost no function call and unknown ones go through the generic path.
+    """
+    encode_lines, decode_lines = [], []
+    for name, annotation in schema.items():
+        encode, decode = _templates(annotation)
+        encode_lines += [f"    v = get({name!r}, _MISSING)", f"    if v is not _MISSING: out[{name!r}] = {encode}"]
+        decode_lines += [f"    v = get({name!r})", f"    if v is not None: out[{name!r}] = {decode}"]
+
+    def function(fn_name: str, lines: list[str], fallback: str) -> str:
+        return "\n".join(
+            [f"def {fn_name}(item):", "    get = item.get", "    out = {}", *lines]
+            + [
+                "    if len(out) != len(item):",
+                "        for k, v in item.items():",
+                f"            if k not in out: out[k] = {fallback}(v)",
+                "    return out",
+            ]
+        )
+
+    namespace = {"_enc": encode_value, "_dec": decode_value, "_num": _decode_number, "_set": _encode_set}
+    namespace["_MISSING"] = object()
+    exec(function("serialize", encode_lines, "_enc"), namespace)  # pylint: disable=exec-used
+    exec(function("deserialize", decode_lines, "_dec"), namespace)  # pylint: disable=exec-used
+    return namespace["serialize"], namespace["deserialize"]
+
+
+class AttributeCodec:
+    """
+    Serializer for items of a fixed schema, compiled once per model.
+    Known attributes are encoded and decoded by code generated for their type,
+    attributes outside the schema go through the generic type-dispatched path.
+    """
+
+    def __init__(self, schema: Dict[str, Any]) -> None:
+        """
+        :param schema: Attribute name -> type annotation.
+        """
+        self.schema = dict(schema)
+        self.serialize, self.deserialize = _compile(self.schema)
+
+    @classmethod
+    def for_model(
+        cls,
+        model: type[BaseModel],
+        renames: Optional[Dict[str, str]] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> "AttributeCodec":
+        """
+        Codec for a pydantic model.
+        :param renames: Field name -> attribute name, for fields stored under another name.
+        :param extra: Attributes stored next to the model's fields, e.g. the partition key.
+        """
+        renames = renames or {}
+        schema = {renames.get(name, name): field.annotation for name, field in model.model_fields.items()}
+        schema.update(extra or {})
+        return cls(schema)
@@ -1,5 +1,20 @@
-from typing import Dict, Any, Optional
-from auth_service.aws_proxy.dynamoDb.util import get_dynamodb_client
+import asyncio
+import functools
+import random
+import time
+from concurrent.futures import Executor
+from typing import Dict, Any, Iterator, List, Optional
+from botocore.client import BaseClient
+from botocore.exceptions import ClientError
+from errorhub.exceptions import ServiceUnavailableException
+from errorhub.models import ErrorSeverity
+from auth_service.aws_proxy.dynamoDb.codec import AttributeCodec, decode_value, encode_value
+from auth_service.aws_proxy.dynamoDb.util import get_dynamodb_client, get_dynamodb_executor, is_throttled
+from auth_service.configuration import settings
+from auth_service.utils.metrics import timed
+
+# DynamoDB rejects BatchGetItem requests with more keys than this
+BATCH_GET_LIMIT = 100
 
 
 class DynamoDBOperations:
@@ -8,12 +23,27 @@ class DynamoDBOperations:
     This is the ONLY class you ever need to interact with.
     """
 
-    def __init__(self, table_name: str, region_name: str) -> None:
+    def __init__(
+        self,
+        table_name: str,
+        region_name: str,
+        client: Optional[BaseClient] = None,
+        codec: Optional[AttributeCodec] = None,
+    ) -> None:
+        """
+        :param codec: Codec compiled for the table's items, expression values always use the generic one.
+        """
         self.table_name = table_name
-        self.client = get_dynamodb_client(region_name)
+        self.client = client or get_dynamodb_client(region_name)
+        self.codec = codec
 
-    def create_item(self, item: Dict[str, Any]) -> None:
-        self.client.put_item(TableName=self.table_name, Item=self._serialize(item))
+    def create_item(self, item: Dict[str, Any], condition_expression: Optional[str] = None) -> None:
+        params = {"TableName": self.table_name, "Item": self._serialize(item)}
+
+        if condition_expression:
+            params["ConditionExpression"] = condition_expression
+
+        self.client.put_item(**params)
 
     def get_item(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         response = self.client.get_item(TableName=self.table_name, Key=self._serialize(key))
@@ -25,74 +55,265 @@ class DynamoDBOperations:
         update_expression: str,
         expression_values: Dict[str, Any],
         expression_names: Optional[Dict[str, str]] = None,
-    ) -> None:
+        condition_expression: Optional[str] = None,
+        return_values: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Update one item, optionally only when condition_expression holds.
+        :param return_values: e.g. "ALL_NEW" to get the updated item back without reading it again.
+            When the condition fails the ClientError then carries the current item in its response.
+        """
         params = {
             "TableName": self.table_name,
             "Key": self._serialize(key),
             "UpdateExpression": update_expression,
-            "ExpressionAttributeValues": self._serialize(expression_values),
+            "ExpressionAttributeValues": {k: encode_value(v) for k, v in expression_values.items()},
         }
 
         if expression_names:
             params["ExpressionAttributeNames"] = expression_names
+        if condition_expression:
+            params["ConditionExpression"] = condition_expression
+        if return_values:
+            params["ReturnValues"] = return_values
+            params["ReturnValuesOnConditionCheckFailure"] = "ALL_OLD"
 
-        self.client.update_item(**params)
+        response = self.client.update_item(**params)
+        return self._deserialize(response.get("Attributes"))
 
-    def delete_item(self, key: Dict[str, Any]) -> None:
-        self.client.delete_item(TableName=self.table_name, Key=self._serialize(key))
+    def delete_item(
+        self,
+        key: Dict[str, Any],
+        condition_expression: Optional[str] = None,
+        expression_values: Optional[Dict[str, Any]] = None,
+        return_old: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Delete one item, optionally only when condition_expression holds.
+        :param return_old: Return the deleted item, None when there was none.
+        """
+        params = {"TableName": self.table_name, "Key": self._serialize(key)}
 
-    def _serialize_value(self, value: Any) -> Dict[str, Any]:
-        if isinstance(value, str):
-            return {"S": value}
+        if condition_expression:
+            params["ConditionExpression"] = condition_expression
+        if expression_values:
+            params["ExpressionAttributeValues"] = {k: encode_value(v) for k, v in expression_values.items()}
+        if return_old:
+            params["ReturnValues"] = "ALL_OLD"
 
-        elif isinstance(value, bool):
-            return {"BOOL": value}
+        response = self.client.delete_item(**params)
+        return self._deserialize(response.get("Attributes"))
 
-        elif isinstance(value, int) or isinstance(value, float):
-            return {"N": str(value)}
+    def transact_write(self, actions: List[Dict[str, Any]]) -> None:
+        """
+        Apply many writes to this table atomically with TransactWriteItems, all or none of them.
+        Actions look like {"Put": {"Item": ..., "ConditionExpression": ...}}, {"Delete": {"Key": ...}},
+        {"Update": {"Key": ..., "UpdateExpression": ...}} or {"ConditionCheck": {"Key": ...}} with plain values.
+        A failed condition raises TransactionCanceledException, its CancellationReasons follow the actions' order.
+        """
+        transact_items = []
+        for action in actions:
+            kind, params = next(iter(action.items()))
+            request = {**params, "TableName": self.table_name}
+            if "Item" in request:
+                request["Item"] = self._serialize(request["Item"])
+            if "Key" in request:
+                request["Key"] = self._serialize(request["Key"])
+            if "ExpressionAttributeValues" in request:
+                request["ExpressionAttributeValues"] = {
+                    k: encode_value(v) for k, v in request["ExpressionAttributeValues"].items()
+                }
+            transact_items.append({kind: request})
 
-        elif value is None:
-            return {"NULL": True}
+        self.client.transact_write_items(TransactItems=transact_items)
 
-        elif isinstance(value, list):
-            return {"L": [self._serialize_value(v) for v in value]}
+    def batch_get_items(self, keys: List[Dict[str, Any]], max_retries: int = 5) -> List[Dict[str, Any]]:
+        """
+        Fetch many items with BatchGetItem, chunked to the 100 key limit.
+        UnprocessedKeys, and whole calls rejected by throttling, are retried with exponential backoff and jitter.
+        Keys must be unique.
+        """
+        items: List[Dict[str, Any]] = []
 
-        elif isinstance(value, dict):
-            return {"M": {k: self._serialize_value(v) for k, v in value.items()}}
+        for start in range(0, len(keys), BATCH_GET_LIMIT):
+            chunk = keys[start : start + BATCH_GET_LIMIT]
+            request_items = {self.table_name: {"Keys": [self._serialize(k) for k in chunk]}}
+            attempt = 0
 
-        else:
-            raise ValueError(f"Unsupported type: {type(value)}")
+            while request_items:
+                try:
+                    response = self.client.batch_get_item(RequestItems=request_items)
+                except ClientError as exc:
+                    # every key was throttled, back off like for unprocessed keys
+                    if not is_throttled(exc):
+                        raise
+                    response = {"UnprocessedKeys": request_items}
+                found = response.get("Responses", {}).get(self.table_name, [])
+                items.extend(self._deserialize(item) for item in found)
 
-    def _serialize(self, data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-        return {k: self._serialize_value(v) for k, v in data.items()}
+                request_items = response.get("UnprocessedKeys") or {}
+                if request_items:
+                    attempt += 1
+                    if attempt > max_retries:
+                        pending = len(request_items.get(self.table_name, {}).get("Keys", []))
+                        raise ServiceUnavailableException(
+                            service="auth_service",
+                            message="DynamoDB is throttling reads, please retry",
+                            severity=ErrorSeverity.MEDIUM,
+                            environment=settings.get_environment(),
+                            context={"detail": f"{pending} keys still unprocessed after {max_retries} retries"},
+                        )
+                    time.sleep(random.uniform(0, min(1.0, 0.05 * 2**attempt)))
 
-    def _deserialize_value(self, value: Dict[str, Any]) -> Any:
-        dtype = next(iter(value))
-        raw = value[dtype]
+        return items
+
+    def query(
+        self,
+        key_condition_expression: str,
+        expression_values: Dict[str, Any],
+        index_name: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        params = {
+            "TableName": self.table_name,
+            "KeyConditionExpression": key_condition_expression,
+            "ExpressionAttributeValues": {k: encode_value(v) for k, v in expression_values.items()},
+        }
 
-        if dtype == "S":
-            return raw
+        if index_name:
+            params["IndexName"] = index_name
+        if limit:
+            params["Limit"] = limit
 
-        elif dtype == "N":
-            return int(raw) if raw.isdigit() else float(raw)
+        response = self.client.query(**params)
+        return [self._deserialize(item) for item in response.get("Items", [])]
 
-        elif dtype == "BOOL":
-            return raw
+    def scan(
+        self,
+        filter_expression: Optional[str] = None,
+        expression_values: Optional[Dict[str, Any]] = None,
+        page_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Every item of the table matching filter_expression, reading it page by page as the items are consumed.
+        Meant for maintenance jobs, a scan reads the whole table.
+        """
+        params: Dict[str, Any] = {"TableName": self.table_name}
+        if filter_expression:
+            params["FilterExpression"] = filter_expression
+        if expression_values:
+            params["ExpressionAttributeValues"] = {k: encode_value(v) for k, v in expression_values.items()}
+        if page_size:
+            params["Limit"] = page_size
 
-        elif dtype == "NULL":
-            return None
+        while True:
+            response = self.client.scan(**params)
+            for item in response.get("Items", []):
+                yield self._deserialize(item)
+            if not response.get("LastEvaluatedKey"):
+                return
+            params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
 
-        elif dtype == "L":
-            return [self._deserialize_value(v) for v in raw]
+    def _serialize_value(self, value: Any) -> Dict[str, Any]:
+        return encode_value(value)
 
-        elif dtype == "M":
-            return {k: self._deserialize_value(v) for k, v in raw.items()}
+    def _serialize(self, data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        return self.codec.serialize(data) if self.codec else {k: encode_value(v) for k, v in data.items()}
 
-        else:
-            return raw
+    def _deserialize_value(self, value: Dict[str, Any]) -> Any:
+        return decode_value(value)
 
     def _deserialize(self, item: Dict[str, Dict[str, Any]] | None):
         if not item:
             return None
 
-        return {k: self._deserialize_value(v) for k, v in item.items()}
+        return self.codec.deserialize(item) if self.codec else {k: decode_value(v) for k, v in item.items()}
+
+
+class AsyncDynamoDBOperations:
+    """
+    Async variant of DynamoDBOperations.
+    Blocking boto3 calls run in a dedicated I/O thread pool sharing one pooled client,
+    so concurrent requests on one worker overlap their DynamoDB latency instead of blocking the loop.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        region_name: str,
+        client: Optional[BaseClient] = None,
+        executor: Optional[Executor] = None,
+        codec: Optional[AttributeCodec] = None,
+    ) -> None:
+        self._operations = DynamoDBOperations(table_name, region_name, client=client, codec=codec)
+        self._executor = executor or get_dynamodb_executor()
+        self.table_name = table_name
+        self.client = self._operations.client
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    @timed("dynamodb.create_item")
+    async def create_item(self, item: Dict[str, Any], condition_expression: Optional[str] = None) -> None:
+        await self._run(self._operations.create_item, item, condition_expression)
+
+    @timed("dynamodb.get_item")
+    async def get_item(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return await self._run(self._operations.get_item, key)
+
+    @timed("dynamodb.update_item")
+    async def update_item(
+        self,
+        key: Dict[str, Any],
+        update_expression: str,
+        expression_values: Dict[str, Any],
+        expression_names: Optional[Dict[str, str]] = None,
+        condition_expression: Optional[str] = None,
+        return_values: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        return await self._run(
+            self._operations.update_item,
+            key,
+            update_expression,
+            expression_values,
+            expression_names,
+            condition_expression=condition_expression,
+            return_values=return_values,
+        )
+
+    @timed("dynamodb.delete_item")
+    async def delete_item(
+        self,
+        key: Dict[str, Any],
+        condition_expression: Optional[str] = None,
+        expression_values: Optional[Dict[str, Any]] = None,
+        return_old: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        return await self._run(
+            self._operations.delete_item,
+            key,
+            condition_expression=condition_expression,
+            expression_values=expression_values,
+            return_old=return_old,
+        )
+
+    @timed("dynamodb.transact_write")
+    async def transact_write(self, actions: List[Dict[str, Any]]) -> None:
+        await self._run(self._operations.transact_write, actions)
+
+    @timed("dynamodb.batch_get_items")
+    async def batch_get_items(self, keys: List[Dict[str, Any]], max_retries: int = 5) -> List[Dict[str, Any]]:
+        return await self._run(self._operations.batch_get_items, keys, max_retries)
+
+    @timed("dynamodb.query")
+    async def query(
+        self,
+        key_condition_expression: str,
+        expression_values: Dict[str, Any],
+        index_name: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        return await self._run(
+            self._operations.query, key_condition_expression, expression_values, index_name=index_name, limit=limit
+        )
@@ -0,0 +1,973 @@
+"""
+In-process stand-in for the boto3 DynamoDB client, to test and benchmark without AWS.
+"""
+
+import copy
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+TRANSACT_LIMIT = 100
+
+Item = Dict[str, Dict[str, Any]]
+Latency = Callable[[], float]
+
+
+def _error(code: str, message: str, operation: str, **extra: Any) -> ClientError:
+    response = {"Error": {"Code": code, "Message": message}, "ResponseMetadata": {"HTTPStatusCode": 400}}
+    response.update(extra)
+    return ClientError(response, operation)
+
+
+def _validation(message: str, operation: str = "") -> ClientError:
+    return _error("ValidationException", message, operation)
+
+
+def _check_limit(limit: Optional[int], operation: str) -> None:
+    if limit is not None and limit < 1:
+        raise _validation(
+            f"1 validation error detected: Value '{limit}' at 'limit' failed to satisfy constraint: "
+            "Member must have value greater than or equal to 1",
+            operation,
+        )
+
+
+def constant_latency(ms: float) -> Latency:
+    """
+    Every call takes the same time
+    """
+    return lambda: ms / 1000
+
+
+def lognormal_latency(median_ms: float, sigma: float, rng: random.Random | None = None) -> Latency:
+    """
+    Log-normally distributed call time, the usual shape of network latency
+    """
+    rng = rng or random.Random()
+    return lambda: rng.lognormvariate(math.log(median_ms), sigma) / 1000
+
+
+def tail_latency(base_ms: float, tail_ms: float, tail_probability: float, rng: random.Random | None = None) -> Latency:
+    """
+    Calls take base_ms, except a tail_probability share of them that takes tail_ms
+    """
+    rng = rng or random.Random()
+    return lambda: (tail_ms if rng.random() < tail_probability else base_ms) / 1000
+
+
+def parse_latency(spec: str, seed: int | None = None) -> Latency:
+    """
+    Latency distribution from configuration: "5" or "constant:5", "lognormal:<median_ms>:<sigma>"
+    or "tail:<base_ms>:<tail_ms>:<probability>"
+    """
+    kind, *args = spec.split(":") if ":" in spec else ("constant", spec)
+    rng = random.Random(seed)
+    try:
+        if kind == "constant":
+            return constant_latency(float(args[0]))
+        if kind == "lognormal":
+            return lognormal_latency(float(args[0]), float(args[1]), rng)
+        if kind == "tail":
+            return tail_latency(float(args[0]), float(args[1]), float(args[2]), rng)
+    except (IndexError, ValueError) as exc:
+        raise ValueError(f"Invalid latency specification: {spec}") from exc
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+def _number(raw: str) -> str:
+    value = Decimal(raw)
+    return str(int(value)) if value == value.to_integral_value() else str(value.normalize())
+
+
+def _comparable(value: Dict[str, Any]) -> Tuple[str, Any]:
+    tag, raw = next(iter(value.items()))
+    if tag == "N":
+        return tag, Decimal(raw)
+    if tag in ("SS", "BS"):
+        return tag, frozenset(raw)
+    if tag == "NS":
+        return tag, frozenset(Decimal(v) for v in raw)
+    return tag, raw
+
+
+def _size(value: Dict[str, Any]) -> int:
+    tag, raw = next(iter(value.items()))
+    if tag in ("S", "B", "L", "M", "SS", "NS", "BS"):
+        return len(raw)
+    raise _validation(f"size() is not defined for {tag}")
+
+
+_TOKEN = re.compile(r"(<>|<=|>=|=|<|>|\(|\)|,|\+|-)|(#[A-Za-z0-9_]+)|(:[A-Za-z0-9_]+)|([A-Za-z_][A-Za-z0-9_]*)")
+_UPDATE_CLAUSES = ("SET", "REMOVE", "ADD", "DELETE")
+
+
+class _Parser:
+    """
+    Recursive descent parser for condition, key condition and update expressions on top level attributes.
+    Conditions become nested tuples: ("and", a, b), ("or", a, b), ("not", a), ("cmp", op, left, right),
+    ("between", x, low, high), ("in", x, [...]) and ("fn", name, [...]), with operands ("path", name),
+    ("value", attribute_value) and ("size", operand).
+    """
+
+    def __init__(self, expression: str, names: Optional[Dict[str, str]], values: Optional[Item]) -> None:
+        self.names = names or {}
+        self.values = values or {}
+        self.tokens: List[str] = []
+        position = 0
+        expression = expression.strip()
+        while position < len(expression):
+            match = _TOKEN.match(expression, position)
+            if match is None or match.end() == position:
+                raise _validation(f"Unsupported expression near: {expression[position:position + 20]!r}")
+            self.tokens.append(next(group for group in match.groups() if group is not None))
+            position = match.end()
+            while position < len(expression) and expression[position].isspace():
+                position += 1
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self, expected: Optional[str] = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token.upper() != expected):
+            raise _validation(f"Expected {expected or 'a token'} but found {token!r}")
+        self.position += 1
+        return token
+
+    def done(self) -> None:
+        if self.peek() is not None:
+            raise _validation(f"Unexpected token {self.peek()!r}")
+
+    def path(self) -> Tuple[str, str]:
+        token = self.take()
+        if token.startswith("#"):
+            if token not in self.names:
+                raise _validation(f"Missing expression attribute name {token}")
+            return ("path", self.names[token])
+        if token.startswith(":") or not (token[0].isalpha() or token[0] == "_"):
+            raise _validation(f"Expected an attribute name but found {token!r}")
+        return ("path", token)
+
+    def operand(self) -> tuple:
+        token = self.peek()
+        if token is not None and token.startswith(":"):
+            self.take()
+            if token not in self.values:
+                raise _validation(f"Missing expression attribute value {token}")
+            return ("value", self.values[token])
+        if token is not None and token.lower() == "size" and self._next_is("("):
+            self.take()
+            self.take("(")
+            inner = self.path()
+            self.take(")")
+            return ("size", inner)
+        return self.path()
+
+    def _next_is(self, token: str) -> bool:
+        return self.position + 1 < len(self.tokens) and self.tokens[self.position + 1] == token
+
+    # conditions
+
+    def condition(self) -> tuple:
+        left = self._and()
+        while self.peek() is not None and self.peek().upper() == "OR":
+            self.take()
+            left = ("or", left, self._and())
+        return left
+
+    def _and(self) -> tuple:
+        left = self._not()
+        while self.peek() is not None and self.peek().upper() == "AND":
+            self.take()
+            left = ("and", left, self._not())
+        return left
+
+    def _not(self) -> tuple:
+        if self.peek() is not None and self.peek().upper() == "NOT":
+            self.take()
+            return ("not", self._not())
+        return self._primary()
+
+    def _primary(self) -> tuple:
+        token = self.peek()
+        if token == "(":
+            self.take()
+            inner = self.condition()
+            self.take(")")
+            return inner
+        if token is not None and token.lower() in (
+            "attribute_exists",
+            "attribute_not_exists",
+            "attribute_type",
+            "begins_with",
+            "contains",
+        ):
+            self.take()
+            self.take("(")
+            args = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                args.append(self.operand())
+            self.take(")")
+            return ("fn", token.lower(), args)
+
+        left = self.operand()
+        token = self.take()
+        if token in ("=", "<>", "<", "<=", ">", ">="):
+            return ("cmp", token, left, self.operand())
+        if token.upper() == "BETWEEN":
+            low = self.operand()
+            self.take("AND")
+            return ("between", left, low, self.operand())
+        if token.upper() == "IN":
+            self.take("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                options.append(self.operand())
+            self.take(")")
+            return ("in", left, options)
+        raise _validation(f"Unexpected token {token!r}")
+
+    # updates
+
+    def update(self) -> List[tuple]:
+        """
+        Update actions: ("SET", path, value), ("REMOVE", path), ("ADD", path, value) and ("DELETE", path, value)
+        """
+        actions: List[tuple] = []
+        while self.peek() is not None:
+            clause = self.take().upper()
+            if clause not in _UPDATE_CLAUSES:
+                raise _validation(f"Unknown update clause {clause}")
+            while True:
+                path = self.path()
+                if clause == "SET":
+                    self.take("=")
+                    actions.append((clause, path, self._set_value()))
+                elif clause == "REMOVE":
+                    actions.append((clause, path))
+                else:
+                    actions.append((clause, path, self.operand()))
+                if self.peek() != ",":
+                    break
+                self.take()
+        if not actions:
+            raise _validation("Empty update expression")
+        return actions
+
+    def _set_value(self) -> tuple:
+        left = self._set_term()
+        if self.peek() in ("+", "-"):
+            return ("arith", self.take(), left, self._set_term())
+        return left
+
+    def _set_term(self) -> tuple:
+        token = self.peek()
+        if token is not None and token.lower() in ("if_not_exists", "list_append") and self._next_is("("):
+            self.take()
+            self.take("(")
+            first = self.path() if token.lower() == "if_not_exists" else self._set_value()
+            self.take(",")
+            second = self._set_value()
+            self.take(")")
+            return (token.lower(), first, second)
+        return self.operand()
+
+
+def _resolve(operand: tuple, item: Item) -> Optional[Dict[str, Any]]:
+    kind = operand[0]
+    if kind == "value":
+        return operand[1]
+    if kind == "path":
+        return item.get(operand[1])
+    if kind == "size":
+        value = _resolve(operand[1], item)
+        return None if value is None else {"N": str(_size(value))}
+    raise _validation(f"Unsupported operand {kind}")
+
+
+def _compare(op: str, left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> bool:
+    if left is None or right is None:
+        return False
+    (left_tag, left_value), (right_tag, right_value) = _comparable(left), _comparable(right)
+    if op in ("=", "<>"):
+        equal = left_tag == right_tag and left_value == right_value
+        return equal if op == "=" else not equal
+    if left_tag != right_tag or left_tag not in ("S", "N", "B"):
+        return False
+    return {
+        "<": left_value < right_value,
+        "<=": left_value <= right_value,
+        ">": left_value > right_value,
+        ">=": left_value >= right_value,
+    }[op]
+
+
+def _evaluate(node: tuple, item: Item) -> bool:
+    kind = node[0]
+    if kind == "and":
+        return _evaluate(node[1], item) and _evaluate(node[2], item)
+    if kind == "or":
+        return _evaluate(node[1], item) or _evaluate(node[2], item)
+    if kind == "not":
+        return not _evaluate(node[1], item)
+    if kind == "cmp":
+        return _compare(node[1], _resolve(node[2], item), _resolve(node[3], item))
+    if kind == "between":
+        value = _resolve(node[1], item)
+        return _compare(">=", value, _resolve(node[2], item)) and _compare("<=", value, _resolve(node[3], item))
+    if kind == "in":
+        value = _resolve(node[1], item)
+        return any(_compare("=", value, _resolve(option, item)) for option in node[2])
+
+    name, args = node[1], node[2]
+    if name == "attribute_exists":
+        return args[0][1] in item
+    if name == "attribute_not_exists":
+        return args[0][1] not in item
+    value = _resolve(args[0], item)
+    other = _resolve(args[1], item) if len(args) > 1 else None
+    if value is None or other is None:
+        return False
+    if name == "attribute_type":
+        return next(iter(value)) == other.get("S")
+    if name == "begins_with":
+        return "S" in value and "S" in other and value["S"].startswith(other["S"])
+    if name == "contains":
+        tag, raw = next(iter(value.items()))
+        if tag == "S":
+            return "S" in other and other["S"] in raw
+        if tag in ("SS", "NS", "BS"):
+            return _comparable({tag[0]: next(iter(other.values()))})[1] in _comparable(value)[1]
+        if tag == "L":
+            return any(_compare("=", element, other) for element in raw)
+        return False
+    raise _validation(f"Unsupported function {name}")
+
+
+def _evaluate_set(node: tuple, item: Item) -> Dict[str, Any]:
+    kind = node[0]
+    if kind == "if_not_exists":
+        existing = item.get(node[1][1])
+        return existing if existing is not None else _evaluate_set(node[2], item)
+    if kind == "list_append":
+        first, second = _evaluate_set(node[1], item), _evaluate_set(node[2], item)
+        if "L" not in first or "L" not in second:
+            raise _validation("list_append needs two lists")
+        return {"L": first["L"] + second["L"]}
+    if kind == "arith":
+        left, right = _evaluate_set(node[2], item), _evaluate_set(node[3], item)
+        if "N" not in left or "N" not in right:
+            raise _validation("Arithmetic needs two numbers")
+        result = Decimal(left["N"]) + Decimal(right["N"]) * (1 if node[1] == "+" else -1)
+        return {"N": _number(str(result))}
+    value = _resolve(node, item)
+    if value is None:
+        raise _validation(f"The attribute {node[1]} used in the update expression does not exist")
+    return value
+
+
+def _apply_update(actions: List[tuple], item: Item, key_attributes: Tuple[str, ...]) -> Tuple[Item, set]:
+    """
+    New item after the update actions, and the names of the attributes they touched
+    """
+    updated = copy.deepcopy(item)
+    touched = set()
+    for action in actions:
+        clause, (_, name) = action[0], action[1]
+        if name in key_attributes:
+            raise _validation(f"Cannot update attribute {name}. This attribute is part of the key")
+        touched.add(name)
+        if clause == "SET":
+            updated[name] = copy.deepcopy(_evaluate_set(action[2], item))
+        elif clause == "REMOVE":
+            updated.pop(name, None)
+        elif clause == "ADD":
+            value = _resolve(action[2], item)
+            current = updated.get(name)
+            if "N" in value:
+                base = Decimal(current["N"]) if current else Decimal(0)
+                updated[name] = {"N": _number(str(base + Decimal(value["N"])))}
+            elif any(tag in value for tag in ("SS", "NS", "BS")):
+                tag = next(iter(value))
+                merged = list(dict.fromkeys((current or {}).get(tag, []) + value[tag]))
+                updated[name] = {tag: merged}
+            else:
+                raise _validation("ADD supports only numbers and sets")
+        else:
+            value = _resolve(action[2], item)
+            current = updated.get(name)
+            tag = next(iter(value))
+            if current is not None and tag in current:
+                remaining = [element for element in current[tag] if element not in value[tag]]
+                if remaining:
+                    updated[name] = {tag: remaining}
+                else:
+                    del updated[name]
+    return updated, touched
+
+
+def _project(item: Item, projection_expression: Optional[str], names: Optional[Dict[str, str]]) -> Item:
+    if not projection_expression:
+        return item
+    wanted = [(names or {}).get(part.strip(), part.strip()) for part in projection_expression.split(",")]
+    return {name: item[name] for name in wanted if name in item}
+
+
+class LocalTable:
+    """
+    One table: items by partition key, global secondary indexes on a hash attribute, and an optional TTL attribute.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        hash_key: str = "pk",
+        indexes: Optional[Dict[str, Tuple[str, Any]]] = None,
+        ttl_attribute: Optional[str] = None,
+    ) -> None:
+        """
+        :param hash_key: Partition key attribute, tables have no sort key.
+        :param indexes: Index name -> (hash attribute, projection), projection being "ALL", "KEYS_ONLY"
+            or a list of included attributes.
+        :param ttl_attribute: Number attribute holding the epoch second after which the item expires.
+        """
+        self.name = name
+        self.hash_key = hash_key
+        self.indexes = dict(indexes or {})
+        self.ttl_attribute = ttl_attribute
+        self.items: Dict[Tuple[str, str], Item] = {}
+        self._index_entries: Dict[str, Dict[Tuple[str, str], set]] = {name: {} for name in self.indexes}
+
+    @staticmethod
+    def _key_value(value: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str]]:
+        if value is None:
+            return None
+        tag, raw = next(iter(value.items()))
+        if tag not in ("S", "N", "B"):
+            return None
+        return tag, _number(raw) if tag == "N" else raw
+
+    def key_of(self, key: Item, operation: str) -> Tuple[str, str]:
+        """
+        Primary key of a Key or Item argument
+        """
+        value = self._key_value(key.get(self.hash_key))
+        if value is None:
+            raise _validation("The provided key element does not match the schema", operation)
+        return value
+
+    def put(self, item: Item) -> None:
+        key = self.key_of(item, "PutItem")
+        self.remove(key)
+        self.items[key] = item
+        for index_name, (attribute, _) in self.indexes.items():
+            index_key = self._key_value(item.get(attribute))
+            if index_key is not None:
+                self._index_entries[index_name].setdefault(index_key, set()).add(key)
+
+    def remove(self, key: Tuple[str, str]) -> Optional[Item]:
+        old = self.items.pop(key, None)
+        if old is not None:
+            for index_name, (attribute, _) in self.indexes.items():
+                index_key = self._key_value(old.get(attribute))
+                entries = self._index_entries[index_name].get(index_key)
+                if entries is not None:
+                    entries.discard(key)
+                    if not entries:
+                        del self._index_entries[index_name][index_key]
+        return old
+
+    def index_candidates(self, index_name: str, value: Dict[str, Any]) -> List[Tuple[str, str]]:
+        return sorted(self._index_entries[index_name].get(self._key_value(value), ()))
+
+    def index_projection(self, index_name: str, item: Item) -> Item:
+        attribute, projection = self.indexes[index_name]
+        if projection == "ALL":
+            return item
+        keep = {self.hash_key, attribute, *(projection if isinstance(projection, (list, tuple, set)) else ())}
+        return {name: value for name, value in item.items() if name in keep}
+
+
+class LocalDynamoDBClient:
+    """
+    Thread safe, in-memory implementation of the DynamoDB client calls this service makes, with injectable
+    latency and throttling to see how repositories behave under tail latency and capacity errors.
+
+    Unknown tables are created on first use with the users table layout: partition key pk, an email-index
+    on email projecting ALL attributes, and expires_at as TTL attribute. Expired items stay readable for
+    ttl_deletion_delay_seconds like on DynamoDB, then disappear. Expressions support top level attributes only.
+    Throttled calls raise ProvisionedThroughputExceededException right away; unlike boto3 nothing is retried.
+    """
+
+    def __init__(
+        self,
+        tables: Optional[List[LocalTable]] = None,
+        latency: Optional[Latency] = None,
+        throttle_rate: float = 0.0,
+        ttl_deletion_delay_seconds: float = 0.0,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        :param tables: Tables to create up front.
+        :param latency: Seconds every call blocks for, e.g. from lognormal_latency.
+        :param throttle_rate: Share of calls (or batch keys) rejected for exceeding provisioned throughput.
+        :param ttl_deletion_delay_seconds: How long expired items are still returned before deletion.
+        :param seed: Seed of the throttling decisions, for reproducible runs.
+        :param clock: Wall clock in epoch seconds, compared with TTL attributes.
+        """
+        self.tables: Dict[str, LocalTable] = {table.name: table for table in tables or []}
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.ttl_deletion_delay_seconds = ttl_deletion_delay_seconds
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._clock = clock
+        self._lock = threading.RLock()
+
+    def create_table(self, table: LocalTable) -> LocalTable:
+        """
+        Add a table, replacing one with the same name
+        """
+        with self._lock:
+            self.tables[table.name] = table
+        return table
+
+    def _table(self, name: str) -> LocalTable:
+        table = self.tables.get(name)
+        if table is None:
+            table = self.create_table(
+                LocalTable(name, indexes={"email-index": ("email", "ALL")}, ttl_attribute="expires_at")
+            )
+        return table
+
+    def _begin(self, operation: str) -> None:
+        """
+        Count the call, wait for its latency and decide whether it is throttled
+        """
+        self.calls[operation] += 1
+        if self.latency is not None:
+            time.sleep(max(0.0, self.latency()))
+        if self._throttle():
+            self.throttled[operation] += 1
+            raise _error(
+                "ProvisionedThroughputExceededException",
+                "The level of configured provisioned throughput for the table was exceeded.",
+                operation,
+            )
+
+    def _throttle(self) -> bool:
+        return self.throttle_rate > 0 and self._rng.random() < self.throttle_rate
+
+    def _live(self, table: LocalTable, key: Tuple[str, str]) -> Optional[Item]:
+        """
+        Item under the key, deleting it when its TTL deletion is due
+        """
+        item = table.items.get(key)
+        if item is None or table.ttl_attribute is None:
+            return item
+        expires = item.get(table.ttl_attribute)
+        if expires is not None and "N" in expires:
+            if Decimal(expires["N"]) + Decimal(str(self.ttl_deletion_delay_seconds)) <= Decimal(str(self._clock())):
+                table.remove(key)
+                return None
+        return item
+
+    @staticmethod
+    def _check(
+        operation: str,
+        current: Optional[Item],
+        condition_expression: Optional[str],
+        names: Optional[Dict[str, str]],
+        values: Optional[Item],
+        return_on_failure: Optional[str] = None,
+    ) -> None:
+        if not condition_expression:
+            return
+        parser = _Parser(condition_expression, names, values)
+        condition = parser.condition()
+        parser.done()
+        if not _evaluate(condition, current or {}):
+            extra = {"Item": copy.deepcopy(current)} if return_on_failure == "ALL_OLD" and current else {}
+            raise _error("ConditionalCheckFailedException", "The conditional request failed", operation, **extra)
+
+    def put_item(
+        self,
+        TableName: str,
+        Item: Item,
+        ConditionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        ExpressionAttributeValues: Optional[Item] = None,
+        ReturnValues: str = "NONE",
+        ReturnValuesOnConditionCheckFailure: Optional[str] = None,
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        self._begin("PutItem")
+        with self._lock:
+            table = self._table(TableName)
+            key = table.key_of(Item, "PutItem")
+            current = self._live(table, key)
+            self._check(
+                "PutItem",
+                current,
+                ConditionExpression,
+                ExpressionAttributeNames,
+                ExpressionAttributeValues,
+                ReturnValuesOnConditionCheckFailure,
+            )
+            table.put(copy.deepcopy(Item))
+            return {"Attributes": copy.deepcopy(current)} if ReturnValues == "ALL_OLD" and current else {}
+
+    def get_item(
+        self,
+        TableName: str,
+        Key: Item,
+        ConsistentRead: bool = False,  # pylint: disable=unused-argument
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        self._begin("GetItem")
+        with self._lock:
+            table = self._table(TableName)
+            item = self._live(table, table.key_of(Key, "GetItem"))
+            if item is None:
+                return {}
+            return {"Item": copy.deepcopy(_project(item, ProjectionExpression, ExpressionAttributeNames))}
+
+    def update_item(
+        self,
+        TableName: str,
+        Key: Item,
+        UpdateExpression: str,
+        ConditionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        ExpressionAttributeValues: Optional[Item] = None,
+        ReturnValues: str = "NONE",
+        ReturnValuesOnConditionCheckFailure: Optional[str] = None,
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        self._begin("UpdateItem")
+        parser = _Parser(UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        actions = parser.update()
+        with self._lock:
+            table = self._table(TableName)
+            key = table.key_of(Key, "UpdateItem")
+            current = self._live(table, key)
+            self._check(
+                "UpdateItem",
+                current,
+                ConditionExpression,
+                ExpressionAttributeNames,
+                ExpressionAttributeValues,
+                ReturnValuesOnConditionCheckFailure,
+            )
+            # updating a missing item creates it from its key
+            base = current if current is not None else copy.deepcopy(Key)
+            updated, touched = _apply_update(actions, base, (table.hash_key,))
+            table.put(updated)
+            return self._update_result(ReturnValues, current, updated, touched)
+
+    @staticmethod
+    def _update_result(return_values: str, old: Optional[Item], new: Item, touched: set) -> Dict[str, Any]:
+        if return_values == "ALL_NEW":
+            attributes = new
+        elif return_values == "ALL_OLD":
+            attributes = old or {}
+        elif return_values == "UPDATED_NEW":
+            attributes = {name: value for name, value in new.items() if name in touched}
+        elif return_values == "UPDATED_OLD":
+            attributes = {name: value for name, value in (old or {}).items() if name in touched}
+        else:
+            return {}
+        return {"Attributes": copy.deepcopy(attributes)} if attributes else {}
+
+    def delete_item(
+        self,
+        TableName: str,
+        Key: Item,
+        ConditionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        ExpressionAttributeValues: Optional[Item] = None,
+        ReturnValues: str = "NONE",
+        ReturnValuesOnConditionCheckFailure: Optional[str] = None,
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        self._begin("DeleteItem")
+        with self._lock:
+            table = self._table(TableName)
+            key = table.key_of(Key, "DeleteItem")
+            current = self._live(table, key)
+            self._check(
+                "DeleteItem",
+                current,
+                ConditionExpression,
+                ExpressionAttributeNames,
+                ExpressionAttributeValues,
+                ReturnValuesOnConditionCheckFailure,
+            )
+            table.remove(key)
+            return {"Attributes": copy.deepcopy(current)} if ReturnValues == "ALL_OLD" and current else {}
+
+    def query(
+        self,
+        TableName: str,
+        KeyConditionExpression: str,
+        ExpressionAttributeValues: Item,
+        IndexName: Optional[str] = None,
+        Limit: Optional[int] = None,
+        FilterExpression: Optional[str] = None,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        ConsistentRead: bool = False,  # pylint: disable=unused-argument
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        self._begin("Query")
+        _check_limit(Limit, "Query")
+        parser = _Parser(KeyConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+        key_condition = parser.condition()
+        parser.done()
+        filter_condition = None
+        if FilterExpression:
+            parser = _Parser(FilterExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            filter_condition = parser.condition()
+            parser.done()
+
+        with self._lock:
+            table = self._table(TableName)
+            if IndexName is not None and IndexName not in table.indexes:
+                raise _validation(f"The table does not have the specified index: {IndexName}", "Query")
+            hash_attribute = table.indexes[IndexName][0] if IndexName else table.hash_key
+            value = self._hash_key_equality(key_condition, hash_attribute)
+            if IndexName:
+                candidates = table.index_candidates(IndexName, value)
+            else:
+                candidates = [table.key_of({table.hash_key: value}, "Query")]
+
+            items, scanned, last_key = [], 0, None
+            for key in candidates:
+                item = self._live(table, key)
+                if item is None:
+                    continue
+                if Limit is not None and scanned == Limit:
+                    last_key = {table.hash_key: item[table.hash_key]}
+                    break
+                scanned += 1
+                if IndexName:
+                    item = table.index_projection(IndexName, item)
+                if filter_condition is None or _evaluate(filter_condition, item):
+                    items.append(copy.deepcopy(_project(item, ProjectionExpression, ExpressionAttributeNames)))
+
+        response: Dict[str, Any] = {"Items": items, "Count": len(items), "ScannedCount": scanned}
+        if last_key is not None:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    def scan(
+        self,
+        TableName: str,
+        FilterExpression: Optional[str] = None,
+        ExpressionAttributeValues: Optional[Item] = None,
+        ExpressionAttributeNames: Optional[Dict[str, str]] = None,
+        Limit: Optional[int] = None,
+        ExclusiveStartKey: Optional[Item] = None,
+        ConsistentRead: bool = False,  # pylint: disable=unused-argument
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        """
+        Items in key order, Limit counts the items read before filtering like on DynamoDB
+        """
+        self._begin("Scan")
+        _check_limit(Limit, "Scan")
+        filter_condition = None
+        if FilterExpression:
+            parser = _Parser(FilterExpression, ExpressionAttributeNames, ExpressionAttributeValues)
+            filter_condition = parser.condition()
+            parser.done()
+
+        with self._lock:
+            table = self._table(TableName)
+            keys = sorted(table.items)
+            if ExclusiveStartKey is not None:
+                start = table.key_of(ExclusiveStartKey, "Scan")
+                keys = [key for key in keys if key > start]
+
+            items, scanned, last_key, last_read = [], 0, None, None
+            for key in keys:
+                item = self._live(table, key)
+                if item is None:
+                    continue
+                if Limit is not None and scanned == Limit:
+                    # the page ends at the last item read, the next one starts after it
+                    last_key = {table.hash_key: last_read[table.hash_key]}
+                    break
+                scanned += 1
+                last_read = item
+                if filter_condition is None or _evaluate(filter_condition, item):
+                    items.append(copy.deepcopy(item))
+
+        response: Dict[str, Any] = {"Items": items, "Count": len(items), "ScannedCount": scanned}
+        if last_key is not None:
+            response["LastEvaluatedKey"] = last_key
+        return response
+
+    @staticmethod
+    def _hash_key_equality(condition: tuple, hash_attribute: str) -> Dict[str, Any]:
+        if condition[0] == "cmp" and condition[1] == "=":
+            left, right = condition[2], condition[3]
+            if left == ("path", hash_attribute) and right[0] == "value":
+                return right[1]
+            if right == ("path", hash_attribute) and left[0] == "value":
+                return left[1]
+        raise _validation(f"Query key condition must be {hash_attribute} = :value", "Query")
+
+    def batch_get_item(
+        self,
+        RequestItems: Dict[str, Dict[str, Any]],
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        """
+        Throttled keys come back as UnprocessedKeys, the whole call is only rejected when every key is throttled
+        """
+        self.calls["BatchGetItem"] += 1
+        if self.latency is not None:
+            time.sleep(max(0.0, self.latency()))
+        if sum(len(request["Keys"]) for request in RequestItems.values()) > BATCH_GET_LIMIT:
+            raise _validation("Too many items requested for the BatchGetItem call", "BatchGetItem")
+
+        responses: Dict[str, List[Item]] = {}
+        unprocessed: Dict[str, Dict[str, Any]] = {}
+        served = 0
+        with self._lock:
+            for table_name, request in RequestItems.items():
+                table = self._table(table_name)
+                found = responses.setdefault(table_name, [])
+                for key in request["Keys"]:
+                    if self._throttle():
+                        unprocessed.setdefault(table_name, {"Keys": []})["Keys"].append(key)
+                        continue
+                    served += 1
+                    item = self._live(table, table.key_of(key, "BatchGetItem"))
+                    if item is not None:
+                        found.append(copy.deepcopy(item))
+        if served == 0 and unprocessed:
+            self.throttled["BatchGetItem"] += 1
+            raise _error("ProvisionedThroughputExceededException", "Every key was throttled", "BatchGetItem")
+        return {"Responses": responses, "UnprocessedKeys": unprocessed}
+
+    def batch_write_item(
+        self,
+        RequestItems: Dict[str, List[Dict[str, Any]]],
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        """
+        Throttled writes come back as UnprocessedItems, the whole call is only rejected when every write is throttled
+        """
+        self.calls["BatchWriteItem"] += 1
+        if self.latency is not None:
+            time.sleep(max(0.0, self.latency()))
+        if sum(len(writes) for writes in RequestItems.values()) > BATCH_WRITE_LIMIT:
+            raise _validation("Too many items requested for the BatchWriteItem call", "BatchWriteItem")
+
+        unprocessed: Dict[str, List[Dict[str, Any]]] = {}
+        served = 0
+        with self._lock:
+            for table_name, writes in RequestItems.items():
+                table = self._table(table_name)
+                for write in writes:
+                    if self._throttle():
+                        unprocessed.setdefault(table_name, []).append(write)
+                        continue
+                    served += 1
+                    if "PutRequest" in write:
+                        table.put(copy.deepcopy(write["PutRequest"]["Item"]))
+                    else:
+                        table.remove(table.key_of(write["DeleteRequest"]["Key"], "BatchWriteItem"))
+        if served == 0 and unprocessed:
+            self.throttled["BatchWriteItem"] += 1
+            raise _error("ProvisionedThroughputExceededException", "Every write was throttled", "BatchWriteItem")
+        return {"UnprocessedItems": unprocessed}
+
+    def transact_write_items(
+        self,
+        TransactItems: List[Dict[str, Dict[str, Any]]],
+        ClientRequestToken: Optional[str] = None,  # pylint: disable=unused-argument
+        ReturnConsumedCapacity: Optional[str] = None,  # pylint: disable=unused-argument
+    ) -> Dict[str, Any]:
+        """
+        All writes happen or none does. A failed condition cancels the transaction with a reason per item.
+        """
+        self._begin("TransactWriteItems")
+        if len(TransactItems) > TRANSACT_LIMIT:
+            raise _validation("Too many items in the TransactWriteItems call", "TransactWriteItems")
+
+        with self._lock:
+            planned = []
+            reasons = []
+            seen = set()
+            for entry in TransactItems:
+                (kind, request), = entry.items()
+                table = self._table(request["TableName"])
+                key = table.key_of(request["Item"] if kind == "Put" else request["Key"], "TransactWriteItems")
+                if (table.name, key) in seen:
+                    raise _validation(
+                        "Transaction request cannot include multiple operations on one item", "TransactWriteItems"
+                    )
+                seen.add((table.name, key))
+                current = self._live(table, key)
+                actions = None
+                if kind == "Update":
+                    parser = _Parser(
+                        request["UpdateExpression"],
+                        request.get("ExpressionAttributeNames"),
+                        request.get("ExpressionAttributeValues"),
+                    )
+                    actions = parser.update()
+                try:
+                    self._check(
+                        "TransactWriteItems",
+                        current,
+                        request.get("ConditionExpression"),
+                        request.get("ExpressionAttributeNames"),
+                        request.get("ExpressionAttributeValues"),
+                        request.get("ReturnValuesOnConditionCheckFailure"),
+                    )
+                    reasons.append({"Code": "None"})
+                except ClientError as exc:
+                    reason = {"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"}
+                    if "Item" in exc.response:
+                        reason["Item"] = exc.response["Item"]
+                    reasons.append(reason)
+                planned.append((kind, request, table, key, current, actions))
+
+            if any(reason["Code"] != "None" for reason in reasons):
+                codes = ", ".join(reason["Code"] for reason in reasons)
+                raise _error(
+                    "TransactionCanceledException",
+                    f"Transaction cancelled, please refer cancellation reasons for specific reasons [{codes}]",
+                    "TransactWriteItems",
+                    CancellationReasons=reasons,
+                )
+
+            for kind, request, table, key, current, actions in planned:
+                if kind == "Put":
+                    table.put(copy.deepcopy(request["Item"]))
+                elif kind == "Delete":
+                    table.remove(key)
+                elif kind == "Update":
+                    base = current if current is not None else copy.deepcopy(request["Key"])
+                    table.put(_apply_update(actions, base, (table.hash_key,))[0])
+        return {}
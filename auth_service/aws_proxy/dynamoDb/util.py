@@ -1,9 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from auth_service.aws_proxy.dynamoDb.client_manager import DynamoDBClientManager
+from auth_service.configuration import settings
 from botocore.client import BaseClient
+from botocore.exceptions import ClientError
 
 
 def get_dynamodb_client(region_name: str) -> BaseClient:
     """
     Returns a singleton DynamoDB client per Lambda container.
+    Its connection pool matches the I/O executor so every worker thread reuses a kept-alive connection.
+    With DYNAMO_BACKEND=local it is the in-process stand-in instead, to run without AWS.
+    """
+    client_factory = _local_client if settings.get_dynamo_backend() == "local" else None
+    return DynamoDBClientManager.get_client(
+        region_name, max_pool_connections=settings.get_dynamo_io_workers(), client_factory=client_factory
+    )
+
+
+def _local_client() -> BaseClient:
+    from auth_service.aws_proxy.dynamoDb.local_client import (  # pylint: disable=import-outside-toplevel
+        LocalDynamoDBClient,
+        parse_latency,
+    )
+
+    return LocalDynamoDBClient(
+        latency=parse_latency(settings.get_local_dynamo_latency()),
+        throttle_rate=settings.get_local_dynamo_throttle_rate(),
+    )
+
+
+def get_dynamodb_executor() -> ThreadPoolExecutor:
+    """
+    Returns the singleton thread pool that runs blocking DynamoDB calls per Lambda container.
+    """
+    return DynamoDBClientManager.get_executor(settings.get_dynamo_io_workers())
+
+
+def is_conditional_check_failed(error: Exception) -> bool:
+    """
+    True when a write was rejected because its ConditionExpression did not hold.
+    """
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") == (
+        "ConditionalCheckFailedException"
+    )
+
+
+def is_throttled(error: Exception) -> bool:
+    """
+    True when DynamoDB rejected a call for exceeding the table's or account's throughput.
+    """
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in (
+        "ProvisionedThroughputExceededException",
+        "ThrottlingException",
+        "RequestLimitExceeded",
+    )
+
+
+def cancellation_reasons(error: Exception) -> list[str] | None:
+    """
+    Codes of a cancelled transaction in the order of its actions ("None" for actions that would have succeeded),
+    None when the error is not a cancelled transaction.
     """
-    return DynamoDBClientManager.get_client(region_name)
+    if not isinstance(error, ClientError):
+        return None
+    if error.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+        return None
+    return [reason.get("Code", "None") for reason in error.response.get("CancellationReasons", [])]
@@ -1,5 +1,6 @@
 
-from auth_service.aws_proxy.dynamoDb.dynamo_operations import DynamoDBOperations
+from auth_service.aws_proxy.dynamoDb.codec import AttributeCodec
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import AsyncDynamoDBOperations, DynamoDBOperations
 
 
 
@@ -10,3 +11,12 @@ def get_dynamodb_operations(table_name: str, region_name: str) -> "DynamoDBOpera
     Factory function to create DynamoDBOperations instance.
     """
     return DynamoDBOperations(table_name, region_name)
+
+
+def get_async_dynamodb_operations(
+    table_name: str, region_name: str, codec: AttributeCodec | None = None
+) -> "AsyncDynamoDBOperations":
+    """
+    Factory function to create AsyncDynamoDBOperations instance.
+    """
+    return AsyncDynamoDBOperations(table_name, region_name, codec=codec)
@@ -23,7 +23,56 @@ class Settings:
         self._config = {}
         self._config["userJsonRecord"] = os.getenv("USER_JSON_RECORD", "data/user_records.json")
         self._config["userDynamoTable"] = os.getenv("USER_DYNAMO_TABLE", None)
+        self._config["passwordHashExecutor"] = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+        self._config["passwordHashWorkers"] = os.getenv("PASSWORD_HASH_WORKERS", None)
+        self._config["passwordHashQueueSize"] = os.getenv("PASSWORD_HASH_QUEUE_SIZE", "64")
+        self._config["passwordHashScheme"] = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+        self._config["passwordBcryptRounds"] = os.getenv("PASSWORD_BCRYPT_ROUNDS", "12")
+        self._config["passwordScryptLn"] = os.getenv("PASSWORD_SCRYPT_LN", "15")
+        self._config["passwordScryptR"] = os.getenv("PASSWORD_SCRYPT_R", "8")
+        self._config["passwordScryptP"] = os.getenv("PASSWORD_SCRYPT_P", "1")
+        self._config["passwordArgon2TimeCost"] = os.getenv("PASSWORD_ARGON2_TIME_COST", "3")
+        self._config["passwordArgon2MemoryKib"] = os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536")
+        self._config["passwordArgon2Parallelism"] = os.getenv("PASSWORD_ARGON2_PARALLELISM", "4")
+        self._config["passwordRehashOnLogin"] = os.getenv("PASSWORD_REHASH_ON_LOGIN", "true")
+        self._config["dynamoIoWorkers"] = os.getenv("DYNAMO_IO_WORKERS", "16")
+        self._config["dynamoBackend"] = os.getenv("DYNAMO_BACKEND", "aws")
+        self._config["localDynamoLatency"] = os.getenv("LOCAL_DYNAMO_LATENCY", "0")
+        self._config["localDynamoThrottleRate"] = os.getenv("LOCAL_DYNAMO_THROTTLE_RATE", "0")
+        self._config["accessTokenCacheSize"] = os.getenv("ACCESS_TOKEN_CACHE_SIZE", "1024")
+        self._config["accessTokenCacheTtlSeconds"] = os.getenv("ACCESS_TOKEN_CACHE_TTL_SECONDS", "60")
+        self._config["revocationStore"] = os.getenv("REVOCATION_STORE", "memory")
+        self._config["revocationCacheSize"] = os.getenv("REVOCATION_CACHE_SIZE", "4096")
+        self._config["factoryEagerInit"] = os.getenv("FACTORY_EAGER_INIT", "false")
+        self._config["userRepository"] = os.getenv("USER_REPOSITORY", "dynamo")
+        self._config["userSqlitePath"] = os.getenv("USER_SQLITE_PATH", "data/users.sqlite3")
+        self._config["userSqliteWorkers"] = os.getenv("USER_SQLITE_WORKERS", "4")
+        self._config["userEmailLookup"] = os.getenv("USER_EMAIL_LOOKUP", "auto")
+        self._config["userReadAllSubjects"] = os.getenv("USER_READ_ALL_SUBJECTS", "")
+        self._config["emailUniquenessBackfilled"] = os.getenv("EMAIL_UNIQUENESS_BACKFILLED", "false")
+        self._config["meResponseMode"] = os.getenv("ME_RESPONSE_MODE", "repository")
+        self._config["userCacheEnabled"] = os.getenv("USER_CACHE_ENABLED", "false")
+        self._config["userCacheMaxSize"] = os.getenv("USER_CACHE_MAX_SIZE", "1024")
+        self._config["userCacheTtlSeconds"] = os.getenv("USER_CACHE_TTL_SECONDS", "30")
+        self._config["warmUpOnInit"] = os.getenv("WARM_UP_ON_INIT", "false")
+        self._config["metricsEnabled"] = os.getenv("METRICS_ENABLED", "true")
+        self._config["metricsEmf"] = os.getenv("METRICS_EMF", "auto")
+        self._config["metricsNamespace"] = os.getenv("METRICS_NAMESPACE", "AuthService")
+        self._config["metricsEndpointEnabled"] = os.getenv("METRICS_ENDPOINT_ENABLED", "false")
+        self._config["serverTimingEnabled"] = os.getenv("SERVER_TIMING_ENABLED", "false")
+        self._profiling_secret = os.getenv("PROFILING_SECRET", None)
+        self._config["profilingSampleRate"] = os.getenv("PROFILING_SAMPLE_RATE", "0")
+        self._config["profilingFormat"] = os.getenv("PROFILING_FORMAT", "collapsed")
+        self._config["profilingOutputDir"] = os.getenv("PROFILING_OUTPUT_DIR", "/tmp/profiles")
+        self._config["profilingIntervalMs"] = os.getenv("PROFILING_INTERVAL_MS", "5")
+        self._config["profilingMaxSeconds"] = os.getenv("PROFILING_MAX_SECONDS", "10")
+        self._config["profilingMaxPerMinute"] = os.getenv("PROFILING_MAX_PER_MINUTE", "6")
+        self._config["profilingMaxOutputBytes"] = os.getenv("PROFILING_MAX_OUTPUT_BYTES", "262144")
+        self._config["profilingMaxFiles"] = os.getenv("PROFILING_MAX_FILES", "50")
         self._jwt_secret_key = os.getenv("JWT_SECRET_KEY", None)
+        self._jwt_signing_keys = os.getenv("JWT_SIGNING_KEYS", None)
+        self._config["jwtActiveKid"] = os.getenv("JWT_ACTIVE_KID", None)
+        self._config["jwksMaxAgeSeconds"] = os.getenv("JWKS_MAX_AGE_SECONDS", "300")
         temp_env = os.getenv("ENVIRONMENT")
         if temp_env is not None:
             if temp_env == "production":
@@ -79,11 +128,312 @@ class Settings:
         """
         return self._jwt_secret_key
 
+    def get_jwt_signing_keys(self) -> str | None:
+        """
+        JSON list of asymmetric signing keys ({"kid", "alg", "private_key", "public_key"}) for JWT signing
+        """
+        return self._jwt_signing_keys
+
+    def get_jwt_active_kid(self) -> str | None:
+        """
+        Key id new tokens are signed with, defaults to the first key with a private key
+        """
+        return self._config.get("jwtActiveKid")
+
+    def get_jwks_max_age_seconds(self) -> int:
+        """
+        How long clients may cache the published JWKS
+        """
+        return int(self._config.get("jwksMaxAgeSeconds") or 300)
+
     def get_aws_region(self) -> str:
         """
         AWS region for DynamoDB operations
         """
         return self._config.get("AWS_REGION", "ap-south-1")
 
+    def get_password_hash_executor(self) -> str:
+        """
+        Kind of worker pool used for password hashing, either "thread" or "process"
+        """
+        return self._config.get("passwordHashExecutor") or "thread"
+
+    def get_password_hash_workers(self) -> int:
+        """
+        Number of workers hashing passwords in parallel, defaults to the number of cores
+        """
+        return int(self._config.get("passwordHashWorkers") or os.cpu_count() or 1)
+
+    def get_password_hash_queue_size(self) -> int:
+        """
+        Number of password hashing jobs allowed to wait for a free worker
+        """
+        return int(self._config.get("passwordHashQueueSize") or 64)
+
+    def get_password_hash_scheme(self) -> str:
+        """
+        Scheme new password hashes are made with: "bcrypt", "scrypt" or "argon2id"
+        """
+        return self._config.get("passwordHashScheme") or "bcrypt"
+
+    def get_password_bcrypt_rounds(self) -> int:
+        """
+        bcrypt cost, log2 of the number of rounds
+        """
+        return int(self._config.get("passwordBcryptRounds") or 12)
+
+    def get_password_scrypt_ln(self) -> int:
+        """
+        scrypt cost, log2 of n
+        """
+        return int(self._config.get("passwordScryptLn") or 15)
+
+    def get_password_scrypt_r(self) -> int:
+        """
+        scrypt block size
+        """
+        return int(self._config.get("passwordScryptR") or 8)
+
+    def get_password_scrypt_p(self) -> int:
+        """
+        scrypt parallelization
+        """
+        return int(self._config.get("passwordScryptP") or 1)
+
+    def get_password_argon2_time_cost(self) -> int:
+        """
+        argon2id number of passes over memory
+        """
+        return int(self._config.get("passwordArgon2TimeCost") or 3)
+
+    def get_password_argon2_memory_kib(self) -> int:
+        """
+        argon2id memory used per hash, in KiB
+        """
+        return int(self._config.get("passwordArgon2MemoryKib") or 65536)
+
+    def get_password_argon2_parallelism(self) -> int:
+        """
+        argon2id number of lanes
+        """
+        return int(self._config.get("passwordArgon2Parallelism") or 4)
+
+    def is_password_rehash_on_login_enabled(self) -> bool:
+        """
+        Whether a successful login rehashes a password stored with another scheme or other cost parameters
+        """
+        return str(self._config.get("passwordRehashOnLogin", "true")).lower() in ("1", "true", "yes")
+
+    def get_dynamo_io_workers(self) -> int:
+        """
+        Number of threads (and pooled connections) used for DynamoDB calls
+        """
+        return int(self._config.get("dynamoIoWorkers") or 16)
+
+    def get_dynamo_backend(self) -> str:
+        """
+        "aws" for the real DynamoDB, "local" for the in-process stand-in
+        """
+        return self._config.get("dynamoBackend") or "aws"
+
+    def get_local_dynamo_latency(self) -> str:
+        """
+        Latency of every local DynamoDB call, e.g. "5", "lognormal:8:0.5" or "tail:5:200:0.01" (milliseconds)
+        """
+        return self._config.get("localDynamoLatency") or "0"
+
+    def get_local_dynamo_throttle_rate(self) -> float:
+        """
+        Share of local DynamoDB calls rejected with ProvisionedThroughputExceededException
+        """
+        return float(self._config.get("localDynamoThrottleRate") or 0)
+
+    def get_access_token_cache_size(self) -> int:
+        """
+        Number of verified access tokens kept in memory, 0 disables the cache
+        """
+        return int(self._config.get("accessTokenCacheSize", 1024))
+
+    def get_access_token_cache_ttl_seconds(self) -> float:
+        """
+        Upper bound for how long a verified access token is served from memory
+        """
+        return float(self._config.get("accessTokenCacheTtlSeconds") or 60)
+
+    def get_revocation_store(self) -> str:
+        """
+        Where revoked refresh tokens are kept, "memory" (per container) or "dynamo" (shared)
+        """
+        return self._config.get("revocationStore") or "memory"
+
+    def get_revocation_cache_size(self) -> int:
+        """
+        Number of revoked token ids remembered by the local revocation lookup filter
+        """
+        return int(self._config.get("revocationCacheSize") or 4096)
+
+    def is_factory_eager_init_enabled(self) -> bool:
+        """
+        Whether services are built when the factory module is imported rather than on the first request
+        """
+        return str(self._config.get("factoryEagerInit", "false")).lower() in ("1", "true", "yes")
+
+    def get_user_repository(self) -> str:
+        """
+        Storage backend for users: "dynamo", "sqlite" or "json"
+        """
+        return self._config.get("userRepository") or "dynamo"
+
+    def get_user_sqlite_path(self) -> str:
+        """
+        Path of the SQLite database used by the sqlite user repository
+        """
+        return self._config.get("userSqlitePath") or "data/users.sqlite3"
+
+    def get_user_sqlite_workers(self) -> int:
+        """
+        Number of threads (and connections) serving SQLite queries
+        """
+        return int(self._config.get("userSqliteWorkers") or 4)
+
+    def get_user_email_lookup_mode(self) -> str:
+        """
+        "auto" reads users straight from a fully projected email-index, "two_hop" always reads the base table too
+        """
+        return self._config.get("userEmailLookup") or "auto"
+
+    def get_user_read_all_subjects(self) -> frozenset[str]:
+        """
+        Token subjects, e.g. service accounts, allowed to look up any user in a batch; comma separated
+        """
+        raw = self._config.get("userReadAllSubjects") or ""
+        return frozenset(subject.strip() for subject in raw.split(",") if subject.strip())
+
+    def is_email_uniqueness_backfilled(self) -> bool:
+        """
+        Whether every user has its EMAIL# uniqueness item, until then new emails are also checked on the email-index
+        """
+        return str(self._config.get("emailUniquenessBackfilled", "false")).lower() in ("1", "true", "yes")
+
+    def get_me_response_mode(self) -> str:
+        """
+        "claims" answers /auth/me from the verified access token, "repository" always reads the user
+        """
+        return self._config.get("meResponseMode") or "repository"
+
+    def is_user_cache_enabled(self) -> bool:
+        """
+        Whether user lookups go through the in-memory read-through cache
+        """
+        return str(self._config.get("userCacheEnabled", "false")).lower() in ("1", "true", "yes")
+
+    def get_user_cache_max_size(self) -> int:
+        """
+        Number of users kept in the in-memory cache
+        """
+        return int(self._config.get("userCacheMaxSize") or 1024)
+
+    def get_user_cache_ttl_seconds(self) -> float:
+        """
+        How long a cached user is served before it is read again
+        """
+        return float(self._config.get("userCacheTtlSeconds") or 30)
+
+    def is_warm_up_on_init_enabled(self) -> bool:
+        """
+        Whether the Lambda container warms up while it is initialised, before its first event
+        """
+        return str(self._config.get("warmUpOnInit", "false")).lower() in ("1", "true", "yes")
+
+    def is_metrics_enabled(self) -> bool:
+        """
+        Whether per-stage latency histograms are recorded for every request
+        """
+        return str(self._config.get("metricsEnabled", "true")).lower() in ("1", "true", "yes")
+
+    def is_metrics_emf_enabled(self) -> bool:
+        """
+        Whether every request writes its stage timings as a CloudWatch embedded metric log line,
+        "auto" turns it on inside Lambda
+        """
+        value = str(self._config.get("metricsEmf") or "auto").lower()
+        if value == "auto":
+            return bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+        return value in ("1", "true", "yes")
+
+    def is_metrics_endpoint_enabled(self) -> bool:
+        """
+        Whether GET /metrics serves the histograms, meant for private deployments such as uvicorn behind a scraper
+        """
+        return str(self._config.get("metricsEndpointEnabled", "false")).lower() in ("1", "true", "yes")
+
+    def get_metrics_namespace(self) -> str:
+        """
+        CloudWatch namespace of the embedded metrics
+        """
+        return self._config.get("metricsNamespace") or "AuthService"
+
+    def is_server_timing_enabled(self) -> bool:
+        """
+        Whether responses carry a Server-Timing header with the request's stage timings
+        """
+        return str(self._config.get("serverTimingEnabled", "false")).lower() in ("1", "true", "yes")
+
+    def get_profiling_secret(self) -> str | None:
+        """
+        Secret signing the X-Debug-Profile header, header triggered profiling is off without it
+        """
+        return self._profiling_secret
+
+    def get_profiling_sample_rate(self) -> float:
+        """
+        Share of requests profiled without being asked to
+        """
+        return float(self._config.get("profilingSampleRate") or 0)
+
+    def get_profiling_format(self) -> str:
+        """
+        "collapsed" for flamegraph stacks from a sampling profiler, "pstats" for cProfile statistics.
+        cProfile traces the whole event loop thread, so every request served meanwhile is slowed down;
+        pstats is only used for requests with a signed header, sampled requests always use "collapsed"
+        """
+        return self._config.get("profilingFormat") or "collapsed"
+
+    def get_profiling_output_dir(self) -> str:
+        """
+        Directory profiles are written to, named after the request id
+        """
+        return self._config.get("profilingOutputDir") or "/tmp/profiles"
+
+    def get_profiling_interval_ms(self) -> float:
+        """
+        Time between two stack samples of the sampling profiler
+        """
+        return float(self._config.get("profilingIntervalMs") or 5)
+
+    def get_profiling_max_seconds(self) -> float:
+        """
+        Longest time the sampling profiler follows a single request
+        """
+        return float(self._config.get("profilingMaxSeconds") or 10)
+
+    def get_profiling_max_per_minute(self) -> int:
+        """
+        Most requests profiled per minute by one container
+        """
+        return int(self._config.get("profilingMaxPerMinute") or 6)
+
+    def get_profiling_max_output_bytes(self) -> int:
+        """
+        Size limit of one profile file
+        """
+        return int(self._config.get("profilingMaxOutputBytes") or 262144)
+
+    def get_profiling_max_files(self) -> int:
+        """
+        Number of profile files kept in the output directory, the oldest are removed first
+        """
+        return int(self._config.get("profilingMaxFiles") or 50)
+
 
 settings = Settings()
@@ -2,70 +2,201 @@
 Factory module that is used everywhere to create instances of services
 """
 
-from auth_service.logic.repository.json_user_repository import JsonUserRepository
-from auth_service.logic.repository.dynamo_user_repository import DynamoDBUserRepository
+import logging
+import threading
+
 from auth_service.logic.services.user_service import UserService
 from auth_service.logic.services.authentication_service import AuthenticationService
 
 from auth_service.logic.interfaces.iauth_strategy import IAuthStrategy
 from auth_service.logic.interfaces.iauthentication_service import IAuthenticationService
+from auth_service.logic.interfaces.iuser_respository import IUserRepository
+from auth_service.logic.interfaces.irevocation_store import IRevocationStore
 from auth_service.logic.services.jwt_token_service import JWTTokenService
+from auth_service.logic.services.key_ring import KeyRing
 
 from auth_service.logic.startegies.password_startegy import EmailPasswordStrategy
-from auth_service.logic.startegies.google_strategy import GoogleAuthStrategy
+from auth_service.logic.startegies.lazy_strategy import LazyStrategy
 from auth_service.configuration import settings
 
-from errorhub.exceptions import InternalServerErrorException
+from errorhub.exceptions import InternalServerErrorException, ErrorHubException
 from errorhub.models import ErrorSeverity
 
+LOGGER = logging.getLogger(__name__)
+
 
 class Factory:
     """
-    Factory class for creating service instances
+    Factory class for creating service instances.
+    The object graph is built once per process (Lambda container) and shared by every request.
+    Backends and providers are imported by the builders, so only the configured ones are ever loaded.
     """
 
-    @staticmethod
-    def get_user_service() -> UserService:
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._user_repository: IUserRepository | None = None
+        self._token_service: JWTTokenService | None = None
+        self._user_service: UserService | None = None
+        self._authentication_service: IAuthenticationService | None = None
+
+    def get_user_repository(self) -> IUserRepository:
+        """
+        Returns the container wide user repository
+        """
+        if self._user_repository is None:
+            with self._lock:
+                if self._user_repository is None:
+                    self._user_repository = self._build_user_repository()
+        return self._user_repository
+
+    def get_token_service(self) -> JWTTokenService:
+        """
+        Returns the container wide token service
+        """
+        if self._token_service is None:
+            with self._lock:
+                if self._token_service is None:
+                    self._token_service = self._build_token_service()
+        return self._token_service
+
+    def get_user_service(self) -> UserService:
         """
         Returns an instance of the user service
         """
-        # user_repo = JsonUserRepository()
-        user_repo = DynamoDBUserRepository()
-        return UserService(user_repo)
+        if self._user_service is None:
+            with self._lock:
+                if self._user_service is None:
+                    self._user_service = UserService(self.get_user_repository())
+        return self._user_service
 
-    @staticmethod
-    def get_authentication_service() -> IAuthenticationService:
+    def get_authentication_service(self) -> IAuthenticationService:
         """
         Returns an instance of the authentication service
         """
+        if self._authentication_service is None:
+            with self._lock:
+                if self._authentication_service is None:
+                    self._authentication_service = self._build_authentication_service(
+                        self.get_user_repository(), self.get_token_service()
+                    )
+        return self._authentication_service
 
-        # Build user repository
-        # user_repo = JsonUserRepository()
-        user_repo = DynamoDBUserRepository()
+    def warm_up(self) -> None:
+        """
+        Build the whole object graph now instead of on the first request
+        """
+        self.get_user_service()
+        self.get_authentication_service()
 
-        # Build strategies
-        strategies: dict[str, IAuthStrategy] = {
-            "email_password": EmailPasswordStrategy(user_repository=user_repo),
-            "google": GoogleAuthStrategy(user_repository=user_repo),
-        }
+    def reset(self) -> None:
+        """
+        Drop the cached object graph, it is rebuilt from settings on next use
+        """
+        with self._lock:
+            self._user_repository = None
+            self._token_service = None
+            self._user_service = None
+            self._authentication_service = None
 
-        # Build token service
-        if settings.get_jwt_secret() is None:
+    @staticmethod
+    def _build_user_repository() -> IUserRepository:
+        """
+        Build the configured user repository, behind a read-through cache when enabled
+        """
+        # pylint: disable=import-outside-toplevel
+        backend = settings.get_user_repository()
+        user_repo: IUserRepository
+        if backend == "sqlite":
+            from auth_service.logic.repository.sqlite_user_repository import SqliteUserRepository
+
+            user_repo = SqliteUserRepository()
+        elif backend == "json":
+            from auth_service.logic.repository.json_user_repository import JsonUserRepository
+
+            user_repo = JsonUserRepository()
+        else:
+            from auth_service.logic.repository.dynamo_user_repository import DynamoDBUserRepository
+
+            user_repo = DynamoDBUserRepository()
+        if settings.is_user_cache_enabled():
+            from auth_service.logic.repository.cached_user_repository import CachedUserRepository
+
+            user_repo = CachedUserRepository(
+                user_repo,
+                max_size=settings.get_user_cache_max_size(),
+                ttl_seconds=settings.get_user_cache_ttl_seconds(),
+            )
+        return user_repo
+
+    @staticmethod
+    def _build_revocation_store() -> IRevocationStore:
+        """
+        Build the revoked token store, the shared one sits behind a local lookup filter
+        """
+        # pylint: disable=import-outside-toplevel
+        if settings.get_revocation_store() != "dynamo":
+            from auth_service.logic.repository.memory_revocation_store import InMemoryRevocationStore
+
+            return InMemoryRevocationStore()
+
+        from auth_service.logic.repository.cached_revocation_store import CachedRevocationStore
+        from auth_service.logic.repository.dynamo_revocation_store import DynamoDBRevocationStore
+
+        return CachedRevocationStore(DynamoDBRevocationStore(), max_size=settings.get_revocation_cache_size())
+
+    @staticmethod
+    def _build_token_service() -> JWTTokenService:
+        """
+        Build the token service from the configured signing keys, or the shared secret
+        """
+        secret_key = settings.get_jwt_secret()
+        signing_keys = settings.get_jwt_signing_keys()
+        if not secret_key and not signing_keys:
             raise InternalServerErrorException(
                 service="Auth Service",
                 message="JWT secret is not configured",
                 severity=ErrorSeverity.HIGH,
                 environment=settings.get_environment(),
                 context={
-                    "detail": "The JWT secret key is missing in the configuration.",
+                    "detail": "Neither the JWT secret key nor JWT signing keys are set in the configuration.",
                 },
             )
-        token_service = JWTTokenService(
-            secret_key=settings.get_jwt_secret() or "default_secret_key",
+        key_ring = KeyRing.from_config(signing_keys, settings.get_jwt_active_kid()) if signing_keys else None
+        return JWTTokenService(
+            secret_key=secret_key or None,
+            key_ring=key_ring,
+            revocation_store=Factory._build_revocation_store(),
             access_token_expiry_minutes=15,
             refresh_token_expiry_days=7,
+            access_token_cache_size=settings.get_access_token_cache_size(),
+            access_token_cache_ttl_seconds=settings.get_access_token_cache_ttl_seconds(),
+        )
+
+    @staticmethod
+    def _build_google_strategy(user_repo: IUserRepository) -> IAuthStrategy:
+        """
+        Build the Google strategy, importing google-auth
+        """
+        from auth_service.logic.startegies.google_strategy import (  # pylint: disable=import-outside-toplevel
+            GoogleAuthStrategy,
         )
 
+        return GoogleAuthStrategy(user_repository=user_repo)
+
+    @staticmethod
+    def _build_authentication_service(
+        user_repo: IUserRepository, token_service: JWTTokenService
+    ) -> IAuthenticationService:
+        """
+        Wire strategies, token service and repository into the authentication service
+        """
+        # Build strategies
+        strategies: dict[str, IAuthStrategy] = {
+            "email_password": EmailPasswordStrategy(user_repository=user_repo),
+            # google-auth is only imported once somebody logs in with Google
+            "google": LazyStrategy(lambda: Factory._build_google_strategy(user_repo)),
+        }
+
         # Create fully-wired authentication service
         return AuthenticationService(
             strategies=strategies,
@@ -75,3 +206,10 @@ class Factory:
 
 
 factory = Factory()
+
+if settings.is_factory_eager_init_enabled():
+    try:
+        factory.warm_up()
+    except ErrorHubException as exc:
+        # keep the container importable, the first request reports the same error
+        LOGGER.warning("Eager factory initialisation failed: %s", exc)
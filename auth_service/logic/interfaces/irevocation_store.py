@@ -0,0 +1,24 @@
+"""
+Interface/Abstract class for revoked refresh token storage
+"""
+
+from abc import ABC, abstractmethod
+
+
+class IRevocationStore(ABC):
+    """
+    Keeps the ids (jti claim) of revoked tokens until the tokens expire on their own.
+    """
+
+    @abstractmethod
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        abstract method to revoke a token id until expires_at (epoch seconds),
+        returns False when it was already revoked
+        """
+
+    @abstractmethod
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        abstract method to check whether a token id is revoked
+        """
@@ -32,6 +32,13 @@ class ITokenService(ABC):
         """
         pass
 
+    @abstractmethod
+    async def decode_refresh_token(self, token: str) -> dict | None:
+        """
+        abstract method to check a refresh token's signature and expiry without a revocation lookup
+        """
+        pass
+
     @abstractmethod
     async def verify_refresh_token(self, token: str) -> dict | None:
         """
@@ -40,15 +47,15 @@ class ITokenService(ABC):
         pass
 
     @abstractmethod
-    async def revoke_refresh_token(self, token: str) -> None:
+    async def revoke_refresh_token(self, token: str, claims: dict | None = None) -> bool:
         """
-        abstract method to revoke refresh token
+        abstract method to revoke refresh token, returns False when it was invalid or already revoked
         """
         pass
 
     @abstractmethod
-    async def rotate_refresh_token(self, old_token: str) -> str:
+    async def rotate_refresh_token(self, old_token: str, claims: dict | None = None) -> str | None:
         """
-        abstract method to rotate refresh token
+        abstract method to revoke a refresh token and issue its successor, None when it was invalid or already used
         """
         pass
@@ -4,6 +4,13 @@ Interface/Abstract class for User Repository
 
 from abc import ABC, abstractmethod
 from auth_service.models.users import User
+from auth_service.configuration import settings
+
+from errorhub.exceptions import ConflictException, NotFoundException
+from errorhub.models import ErrorSeverity
+
+# fields patch_user may change, everything else is fixed when the user is created
+PATCHABLE_FIELDS = frozenset({"name", "email", "apps", "password_hash", "updated_at"})
 
 
 class IUserRepository(ABC):
@@ -14,7 +21,7 @@ class IUserRepository(ABC):
     @abstractmethod
     async def create_user(self, user: User) -> User:
         """
-        abstract method to create user
+        abstract method to create user, raises ConflictException when its id or email is already taken
         """
 
     @abstractmethod
@@ -29,14 +36,81 @@ class IUserRepository(ABC):
         abstract method to get user by id
         """
 
+    @abstractmethod
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[User]:
+        """
+        abstract method to get many users by id, unknown ids are skipped
+        """
+
     @abstractmethod
     async def update_user(self, user: User) -> User:
         """
         abstract method to update user
         """
 
+    async def patch_user(self, user_id: str, changes: dict, expected_updated_at: str | None = None) -> User:
+        """
+        change only the given fields of a user and return the result.
+        Raises NotFoundException for an unknown user, ConflictException when the new email is taken or when
+        expected_updated_at is given and the user was updated since.
+        By default the user is read and rewritten, repositories override this with a single conditional write.
+        """
+        check_patch(changes)
+        user = await self.get_user_by_id(user_id)
+        if user is None:
+            raise user_not_found(user_id)
+        if expected_updated_at is not None and user.updated_at != expected_updated_at:
+            raise user_modified(user_id)
+        if changes.get("email", user.email) != user.email and await self.get_user_by_email(changes["email"]):
+            raise email_taken()
+        return await self.update_user(user.model_copy(update=changes))
+
     @abstractmethod
-    async def delete_user(self, user_id: str) -> None:
+    async def delete_user(self, user_id: str) -> User:
+        """
+        abstract method to delete user and what it owns, returns the deleted user.
+        Raises NotFoundException for an unknown user.
+        """
+
+    async def warm_up(self) -> None:
         """
-        abstract method to delete user
+        open connections ahead of the first request, nothing to do by default
         """
+
+
+def check_patch(changes: dict) -> None:
+    """
+    Refuse changes to fields that are not patchable
+    """
+    unknown = set(changes) - PATCHABLE_FIELDS
+    if unknown:
+        raise ValueError(f"Fields cannot be patched: {sorted(unknown)}")
+
+
+def user_not_found(user_id: str, action: str = "update") -> NotFoundException:
+    return NotFoundException(
+        service="auth_service",
+        message="User not found",
+        severity=ErrorSeverity.LOW,
+        environment=settings.get_environment(),
+        context={f"The user you are trying to {action} is not found": user_id},
+    )
+
+
+def user_modified(user_id: str) -> ConflictException:
+    return ConflictException(
+        service="auth_service",
+        message="User was modified by another request",
+        severity=ErrorSeverity.LOW,
+        environment=settings.get_environment(),
+        context={"detail": f"User {user_id} changed since it was read.", "suggestion": "Read it again and retry"},
+    )
+
+
+def email_taken() -> ConflictException:
+    return ConflictException(
+        service="auth_service",
+        message="Email already exists",
+        severity=ErrorSeverity.LOW,
+        environment=settings.get_environment(),
+    )
@@ -0,0 +1,50 @@
+"""
+Local lookup filter in front of a shared revoked token store
+"""
+
+import time
+
+from auth_service.logic.interfaces.irevocation_store import IRevocationStore
+from auth_service.utils.cache import LRUTTLCache
+
+
+class CachedRevocationStore(IRevocationStore):
+    """
+    Answers is_revoked for ids revoked by this container without a remote read.
+    Revocations are permanent, so a revoked id is remembered until its token expires. "Not revoked" answers are
+    not cached: refresh tokens are single use, so an id is found not revoked at most once and such a cache would
+    never be hit, while delaying revocations made by other containers.
+    """
+
+    def __init__(self, store: IRevocationStore, max_size: int = 4096) -> None:
+        """
+        :param store: Shared store that owns the revocations, e.g. DynamoDBRevocationStore.
+        :param max_size: Number of revoked ids remembered.
+        """
+        self.store = store
+        self._revoked = LRUTTLCache(max_size=max_size, ttl_seconds=float("inf"))
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        revoke token id in the shared store and remember it locally
+        """
+        # known to be revoked already, a replayed token costs no write
+        if self._revoked.get(jti) is not None:
+            return False
+        newly_revoked = await self.store.revoke(jti, expires_at)
+        self._revoked.set(jti, True, ttl_seconds=expires_at - time.time())
+        return newly_revoked
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        check whether token id is revoked, from memory when possible
+        """
+        if self._revoked.get(jti) is not None:
+            return True
+        return await self.store.is_revoked(jti)
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counters of the local filter
+        """
+        return {"revoked": self._revoked.stats()}
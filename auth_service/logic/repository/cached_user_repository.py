@@ -0,0 +1,135 @@
+"""
+Read-through cache in front of any user repository
+"""
+
+from auth_service.logic.interfaces.iuser_respository import IUserRepository
+from auth_service.models.users import User
+from auth_service.utils.cache import LRUTTLCache
+
+
+class CachedUserRepository(IUserRepository):
+    """
+    Caches users by id, with an email -> id index, in front of another repository.
+    Every write drops the affected entries. Other containers may still serve a stale user until the TTL runs out,
+    so keep the TTL short.
+    """
+
+    def __init__(self, repository: IUserRepository, max_size: int = 1024, ttl_seconds: float = 30) -> None:
+        """
+        :param repository: Repository that owns the data, e.g. DynamoDBUserRepository.
+        :param max_size: Number of users kept in memory.
+        :param ttl_seconds: How long a cached user may be served without going to the repository.
+        """
+        self.repository = repository
+        self._users = LRUTTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._emails = LRUTTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def _remember(self, user: User) -> None:
+        self._users.set(user.id, user.model_copy(deep=True))
+        self._emails.set(user.email, user.id)
+
+    def _forget(self, user_id: str | None = None, email: str | None = None) -> None:
+        if user_id is not None:
+            cached = self._users.pop(user_id)
+            if cached is not None:
+                self._emails.pop(cached.email)
+        if email is not None:
+            self._emails.pop(email)
+
+    def _cached_user(self, user_id: str) -> User | None:
+        cached = self._users.get(user_id)
+        # callers are free to mutate what they get back, so never hand out the cached instance
+        return cached.model_copy(deep=True) if cached is not None else None
+
+    async def warm_up(self) -> None:
+        """
+        warm up the wrapped repository
+        """
+        await self.repository.warm_up()
+
+    async def create_user(self, user: User) -> User:
+        """
+        create user in the wrapped repository
+        """
+        self._forget(user.id, user.email)
+        return await self.repository.create_user(user)
+
+    async def get_user_by_email(self, email: str) -> User | None:
+        """
+        find user by email, from memory when possible
+        """
+        user_id = self._emails.get(email)
+        if user_id is not None:
+            user = self._cached_user(user_id)
+            if user is not None and user.email == email:
+                return user
+
+        user = await self.repository.get_user_by_email(email)
+        if user is not None:
+            self._remember(user)
+        return user
+
+    async def get_user_by_id(self, user_id: str) -> User | None:
+        """
+        find user by id, from memory when possible
+        """
+        user = self._cached_user(user_id)
+        if user is not None:
+            return user
+
+        user = await self.repository.get_user_by_id(user_id)
+        if user is not None:
+            self._remember(user)
+        return user
+
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[User]:
+        """
+        find many users by id, only the ids missing from memory go to the repository
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        found: dict[str, User] = {}
+        for user_id in unique_ids:
+            user = self._cached_user(user_id)
+            if user is not None:
+                found[user_id] = user
+
+        missing = [user_id for user_id in unique_ids if user_id not in found]
+        if missing:
+            for user in await self.repository.get_users_by_ids(missing):
+                self._remember(user)
+                found[user.id] = user
+        return [found[user_id] for user_id in unique_ids if user_id in found]
+
+    async def update_user(self, user: User) -> User:
+        """
+        update user in the wrapped repository and drop its cached entries
+        """
+        self._forget(user.id, user.email)
+        updated = await self.repository.update_user(user)
+        # a concurrent read may have cached the old record while the write was in flight
+        self._forget(user.id, user.email)
+        return updated
+
+    async def patch_user(self, user_id: str, changes: dict, expected_updated_at: str | None = None) -> User:
+        """
+        patch user in the wrapped repository and drop its cached entries
+        """
+        self._forget(user_id, changes.get("email"))
+        updated = await self.repository.patch_user(user_id, changes, expected_updated_at)
+        self._forget(user_id, changes.get("email"))
+        return updated
+
+    async def delete_user(self, user_id: str) -> User:
+        """
+        delete user from the wrapped repository and drop its cached entries, by id and by its email
+        """
+        self._forget(user_id)
+        deleted = await self.repository.delete_user(user_id)
+        self._forget(user_id, deleted.email if deleted is not None else None)
+        return deleted
+
+    def stats(self) -> dict:
+        """
+        Hit, miss and eviction counters of the id and email caches
+        """
+        return {"users": self._users.stats(), "emails": self._emails.stats()}
@@ -0,0 +1,51 @@
+"""
+Revoked token storage shared by every container through DynamoDB
+"""
+
+import time
+
+from botocore.exceptions import ClientError
+
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import AsyncDynamoDBOperations
+from auth_service.aws_proxy.dynamoDb.util import is_conditional_check_failed
+from auth_service.aws_proxy.utils import get_async_dynamodb_operations
+from auth_service.logic.interfaces.irevocation_store import IRevocationStore
+from auth_service.configuration import settings
+
+from errorhub.exceptions import NotFoundException
+
+
+class DynamoDBRevocationStore(IRevocationStore):
+    """
+    Revoked token ids live in the users table as REVOKED#<jti> items.
+    Their expires_at attribute is meant to be the table's TTL attribute so DynamoDB deletes them after expiry;
+    until then expired items are ignored here.
+    """
+
+    TTL_ATTRIBUTE = "expires_at"
+
+    def __init__(self, table: AsyncDynamoDBOperations | None = None):
+        table_name = table.table_name if table else settings.get_user_dynamo_table_name()
+        if table_name is None:
+            raise NotFoundException(service="AuthService", message="DynamoDB table name for users is not configured.")
+        self.table = table or get_async_dynamodb_operations(table_name, settings.get_aws_region())
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        revoke token id, the conditional put makes exactly one concurrent caller win
+        """
+        item = {"pk": f"REVOKED#{jti}", self.TTL_ATTRIBUTE: int(expires_at)}
+        try:
+            await self.table.create_item(item, condition_expression="attribute_not_exists(pk)")
+        except ClientError as exc:
+            if is_conditional_check_failed(exc):
+                return False
+            raise
+        return True
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        check whether token id is revoked
+        """
+        item = await self.table.get_item({"pk": f"REVOKED#{jti}"})
+        return item is not None and item.get(self.TTL_ATTRIBUTE, 0) > time.time()
@@ -2,18 +2,48 @@
 Connection between DynamoDB users table and user service layer
 """
 
+import asyncio
+import logging
+import random
 from typing import Type
 
-from auth_service.logic.interfaces.iuser_respository import IUserRepository
+from botocore.exceptions import ClientError
+
+from auth_service.logic.interfaces.iuser_respository import (
+    IUserRepository,
+    check_patch,
+    email_taken,
+    user_modified,
+    user_not_found,
+)
 from auth_service.models.users import User
-from auth_service.aws_proxy.utils import get_dynamodb_operations
+from auth_service.aws_proxy.utils import get_async_dynamodb_operations
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import AsyncDynamoDBOperations
+from auth_service.aws_proxy.dynamoDb.codec import AttributeCodec
+from auth_service.aws_proxy.dynamoDb.util import cancellation_reasons, is_conditional_check_failed
 
 from auth_service.configuration import settings
-from errorhub.exceptions import NotFoundException, InternalServerErrorException
+from errorhub.exceptions import ConflictException, NotFoundException, ServiceUnavailableException
 from errorhub.models import ErrorSeverity
 
 from errorhub.models import BaseModel
 
+LOGGER = logging.getLogger(__name__)
+
+# every attribute create_user writes, an index item carrying all of them is the whole user
+USER_ITEM_ATTRIBUTES = frozenset(
+    {"pk", "id", "user_name", "email", "password_hash", "created_at", "updated_at", "apps"}
+)
+
+# written only when the key is free, for user items and email uniqueness items alike
+_KEY_IS_FREE = "attribute_not_exists(pk)"
+
+# calls made to release the email item of a deleted user before giving up
+_RELEASE_ATTEMPTS = 3
+
+# compiled once, users are stored with name as user_name next to their pk
+USER_CODEC = AttributeCodec.for_model(User, renames={"name": "user_name"}, extra={"pk": str, "email": str})
+
 
 class DynamoDBUserRepository(IUserRepository):
     """
@@ -21,47 +51,136 @@ class DynamoDBUserRepository(IUserRepository):
     This is the ONLY repository you should use in production.
     """
 
-    def __init__(self):
+    def __init__(self, users_table: AsyncDynamoDBOperations | None = None, email_lookup: str | None = None):
+        """
+        :param users_table: Table operations to use instead of the configured table, e.g. for tests.
+        :param email_lookup: "auto" reads the user straight from a fully projected email-index,
+            "two_hop" always reads the base table after the index. Defaults to the configured mode.
+        """
         self._region = settings.get_aws_region()
-        self._table_name = settings.get_user_dynamo_table_name()
+        self._email_lookup = email_lookup or settings.get_user_email_lookup_mode()
+        self._table_name = users_table.table_name if users_table else settings.get_user_dynamo_table_name()
         if self._table_name is None:
             raise NotFoundException(service="AuthService", message="DynamoDB table name for users is not configured.")
-        self.users_table = get_dynamodb_operations(self._table_name, self._region)
+        self.users_table = users_table or get_async_dynamodb_operations(
+            self._table_name, self._region, codec=USER_CODEC
+        )
+
+    async def warm_up(self) -> None:
+        """
+        open a connection to DynamoDB with a read of a key that never exists
+        """
+        await self.users_table.get_item({"pk": "WARMUP#ping"})
+
+    @staticmethod
+    def _email_key(email: str) -> dict:
+        """
+        key of the item reserving an email for one user; it has no email attribute so the email-index never sees it
+        """
+        return {"pk": f"EMAIL#{email}"}
 
     async def create_user(self, user: User) -> User:
         """
-        create user in DynamoDB
+        create user in DynamoDB together with its email uniqueness item, in one conditional transaction
+        so neither the id nor the email can be taken twice, even by concurrent signups.
+        An email item left behind by a deleted user is reclaimed and the transaction tried once more.
+        That is one round trip only once EMAIL_UNIQUENESS_BACKFILLED is set, until then the email-index is queried
+        first for users that have no email item yet.
         """
         item = user.model_dump()
         if "name" in item:
             item["user_name"] = item.pop("name")
         item["pk"] = f"USER#{user.id}"
+        email_item = {**self._email_key(user.email), "user_id": user.id}
+        await self._raise_if_legacy_email_taken(user.email)
 
-        self.users_table.create_item(item)
+        for attempt in range(2):
+            try:
+                await self.users_table.transact_write(
+                    [
+                        {"Put": {"Item": item, "ConditionExpression": _KEY_IS_FREE}},
+                        {"Put": {"Item": email_item, "ConditionExpression": _KEY_IS_FREE}},
+                    ]
+                )
+                return user
+            except ClientError as exc:
+                reasons = cancellation_reasons(exc)
+                if not reasons or "ConditionalCheckFailed" not in reasons:
+                    raise
+                if reasons[0] == "ConditionalCheckFailed":
+                    raise ConflictException(
+                        service="auth_service",
+                        message="User Id already exists",
+                        severity=ErrorSeverity.LOW,
+                        environment=settings.get_environment(),
+                    ) from exc
+                if attempt or not await self._reclaim_orphaned_email(user.email):
+                    raise email_taken() from exc
         return user
 
+    async def _reclaim_orphaned_email(self, email: str) -> bool:
+        """
+        delete the email item when the user it reserves the email for no longer exists, True if it was deleted
+        """
+        owner = await self.users_table.get_item(self._email_key(email))
+        if owner is None:
+            # released in the meantime
+            return True
+        if await self.users_table.get_item({"pk": f"USER#{owner.get('user_id')}"}) is not None:
+            return False
+        try:
+            await self.users_table.delete_item(
+                self._email_key(email),
+                condition_expression="user_id = :user_id",
+                expression_values={":user_id": owner.get("user_id")},
+            )
+        except ClientError as exc:
+            if not is_conditional_check_failed(exc):
+                raise
+            return False
+        LOGGER.warning("Reclaimed email item of deleted user %s", owner.get("user_id"))
+        return True
+
+    async def _raise_if_legacy_email_taken(self, email: str) -> None:
+        """
+        users created before EMAIL# items existed only show up on the email-index, check it until they are backfilled.
+        Remove this once `python -m auth_service.logic.repository.email_backfill` reported no conflicts
+        and EMAIL_UNIQUENESS_BACKFILLED=true is set everywhere.
+        """
+        if settings.is_email_uniqueness_backfilled():
+            return
+        items = await self.users_table.query(
+            key_condition_expression="email = :email",
+            expression_values={":email": email},
+            index_name="email-index",
+            limit=1,
+        )
+        if items:
+            raise email_taken()
+
     async def get_user_by_email(self, email: str) -> User | None:
         """
         find user by email using a GSI (email-index)
         """
-        # Query the GSI to get the pk (user_id)
-        response = self.users_table.client.query(
-            TableName=self.users_table.table_name,
-            IndexName="email-index",
-            KeyConditionExpression="email = :email",
-            ExpressionAttributeValues={":email": {"S": email}},
-            Limit=1,
+        # Query the GSI, with an ALL projection this is already the full user
+        items = await self.users_table.query(
+            key_condition_expression="email = :email",
+            expression_values={":email": email},
+            index_name="email-index",
+            limit=1,
         )
 
-        items = response.get("Items", [])
         if not items:
             return None
 
-        # Extract the pk from the GSI item
-        pk = items[0]["pk"]["S"]  # Assuming pk is projected in the GSI
+        if self._email_lookup != "two_hop" and USER_ITEM_ATTRIBUTES.issubset(items[0]):
+            return User(**await self._filter_for_user_model(User, items[0]))
+
+        # Index only projects keys, extract the pk from the GSI item
+        pk = items[0]["pk"]  # Assuming pk is projected in the GSI
 
         # Now get the full item from the main table
-        full_item = self.users_table.get_item({"pk": pk})
+        full_item = await self.users_table.get_item({"pk": pk})
 
         if full_item:
             return User(**await self._filter_for_user_model(User, full_item))
@@ -80,48 +199,162 @@ class DynamoDBUserRepository(IUserRepository):
         """
         find user by id
         """
-        item = self.users_table.get_item({"pk": f"USER#{user_id}"})
+        item = await self.users_table.get_item({"pk": f"USER#{user_id}"})
 
         if item:
             return User(**await self._filter_for_user_model(User, item))
         return None
 
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[User]:
+        """
+        find many users by id with BatchGetItem, in the order they were asked for
+        """
+        unique_ids = list(dict.fromkeys(user_ids))
+        items = await self.users_table.batch_get_items([{"pk": f"USER#{user_id}"} for user_id in unique_ids])
+
+        users_by_id = {}
+        for item in items:
+            user = User(**await self._filter_for_user_model(User, item))
+            users_by_id[user.id] = user
+        return [users_by_id[user_id] for user_id in unique_ids if user_id in users_by_id]
+
     async def update_user(self, user: User) -> User:
         """
-        update user in DynamoDB
+        update user in DynamoDB, as a patch of every field that can change
         """
-        key = {"pk": f"USER#{user.id}"}
+        changes = user.model_dump(include={"name", "email", "apps", "password_hash", "updated_at"})
+        return await self.patch_user(user.id, changes)
 
-        update_expression = """
-            SET email = :email,
-                user_name = :name,
-                apps = :apps,
-                updated_at = :updated_at,
-                password_hash = :password_hash
+    @staticmethod
+    def _set_expression(changes: dict) -> tuple[str, dict, dict]:
+        """
+        SET expression for exactly the changed attributes, with placeholders for every name and value
+        """
+        assignments, names, values = [], {}, {}
+        for i, (field, value) in enumerate(changes.items()):
+            names[f"#f{i}"] = "user_name" if field == "name" else field
+            values[f":v{i}"] = value
+            assignments.append(f"#f{i} = :v{i}")
+        return "SET " + ", ".join(assignments), names, values
+
+    async def patch_user(self, user_id: str, changes: dict, expected_updated_at: str | None = None) -> User:
+        """
+        update only the changed attributes with one conditional UpdateItem that returns the new item.
+        An email change also moves the email uniqueness item, which takes a read of the old email
+        and one transaction.
         """
+        check_patch(changes)
+        if "email" in changes:
+            return await self._patch_with_email(user_id, changes, expected_updated_at)
+        if not changes:
+            user = await self.get_user_by_id(user_id)
+            if user is None:
+                raise user_not_found(user_id)
+            return user
 
-        expression_values = {
-            ":email": user.email,
-            ":name": user.name,
-            ":password_hash": user.password_hash,
-            ":apps": user.apps,
-            ":updated_at": user.updated_at,
+        update_expression, names, values = self._set_expression(changes)
+        condition = "attribute_exists(pk)"
+        if expected_updated_at is not None:
+            condition += " AND updated_at = :expected_updated_at"
+            values[":expected_updated_at"] = expected_updated_at
+        try:
+            item = await self.users_table.update_item(
+                key={"pk": f"USER#{user_id}"},
+                update_expression=update_expression,
+                expression_values=values,
+                expression_names=names,
+                condition_expression=condition,
+                return_values="ALL_NEW",
+            )
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            # the item that failed the condition comes back with the error, none means there is no such user
+            raise (user_modified(user_id) if exc.response.get("Item") else user_not_found(user_id)) from exc
+        return User(**await self._filter_for_user_model(User, item))
+
+    async def _patch_with_email(self, user_id: str, changes: dict, expected_updated_at: str | None) -> User:
+        """
+        update the user and swap its email uniqueness item in one transaction,
+        conditioned on the user being unchanged since it was read
+        """
+        old_user = await self.get_user_by_id(user_id)
+        if old_user is None:
+            raise user_not_found(user_id)
+        if expected_updated_at is not None and old_user.updated_at != expected_updated_at:
+            raise user_modified(user_id)
+        if changes["email"] == old_user.email:
+            return await self.patch_user(
+                user_id, {k: v for k, v in changes.items() if k != "email"}, expected_updated_at
+            )
+        await self._raise_if_legacy_email_taken(changes["email"])
+
+        update_expression, names, values = self._set_expression(changes)
+        values[":seen_updated_at"] = old_user.updated_at
+        update = {
+            "Key": {"pk": f"USER#{user_id}"},
+            "UpdateExpression": update_expression,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": values,
+            "ConditionExpression": "updated_at = :seen_updated_at",
         }
+        email_item = {**self._email_key(changes["email"]), "user_id": user_id}
+        try:
+            await self.users_table.transact_write(
+                [
+                    {"Update": update},
+                    {"Delete": {"Key": self._email_key(old_user.email)}},
+                    {"Put": {"Item": email_item, "ConditionExpression": _KEY_IS_FREE}},
+                ]
+            )
+        except ClientError as exc:
+            reasons = cancellation_reasons(exc)
+            if not reasons or "ConditionalCheckFailed" not in reasons:
+                raise
+            raise (email_taken() if reasons[2] == "ConditionalCheckFailed" else user_modified(user_id)) from exc
+        return old_user.model_copy(update=changes)
 
-        self.users_table.update_item(key=key, update_expression=update_expression, expression_values=expression_values)
-        new_user = await self.get_user_by_id(user.id)
-        if new_user is None:
-            raise InternalServerErrorException(
-                service="auth_service",
-                message="Failed to update user",
-                severity=ErrorSeverity.HIGH,
-                environment=settings.get_environment(),
-                context={"detail": f"User with id {user.id} not found after update."},
+    async def delete_user(self, user_id: str) -> User:
+        """
+        delete user from DynamoDB only if it exists, getting the deleted item back from the same call,
+        then release its email uniqueness item
+        """
+        try:
+            item = await self.users_table.delete_item(
+                {"pk": f"USER#{user_id}"}, condition_expression="attribute_exists(pk)", return_old=True
             )
-        return new_user
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            raise user_not_found(user_id, "delete") from exc
+        user = User(**await self._filter_for_user_model(User, item))
+        await self._release_email(user)
+        return user
 
-    async def delete_user(self, user_id: str):
+    async def _release_email(self, user: User) -> None:
         """
-        delete user from DynamoDB
+        delete the email item of a deleted user, only if it is still this user's, a new owner may have taken
+        the email in the meantime. Failures are retried a few times, then raised: create_user reclaims
+        an email item left behind, but the caller should know the delete did not complete.
         """
-        self.users_table.delete_item({"pk": f"USER#{user_id}"})
+        for attempt in range(1, _RELEASE_ATTEMPTS + 1):
+            try:
+                await self.users_table.delete_item(
+                    self._email_key(user.email),
+                    condition_expression="user_id = :user_id",
+                    expression_values={":user_id": user.id},
+                )
+                return
+            except ClientError as exc:
+                if is_conditional_check_failed(exc):
+                    return
+                if attempt == _RELEASE_ATTEMPTS:
+                    raise ServiceUnavailableException(
+                        service="auth_service",
+                        message="User was deleted but its email could not be released",
+                        severity=ErrorSeverity.MEDIUM,
+                        environment=settings.get_environment(),
+                        context={"detail": f"Email item of user {user.id} is left behind", "suggestion": "Retry"},
+                    ) from exc
+                LOGGER.warning("Email item of deleted user %s was not released, retrying", user.id, exc_info=True)
+                await asyncio.sleep(random.uniform(0, 0.05 * 2**attempt))
@@ -0,0 +1,88 @@
+"""
+Backfill of the EMAIL# uniqueness items for users created before registration wrote them.
+
+Run once per table with: python -m auth_service.logic.repository.email_backfill [--dry-run]
+It can be run again safely, users that already have their item are skipped. When it reports no conflicts,
+set EMAIL_UNIQUENESS_BACKFILLED=true so registration stops checking the email-index as well.
+It scans the base table, so the role running it needs dynamodb:Scan, GetItem and PutItem on the table itself;
+the Lambda's policy only allows scans of the indexes and is not meant to run it.
+"""
+
+import argparse
+from dataclasses import dataclass, field
+
+from botocore.exceptions import ClientError
+
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import DynamoDBOperations
+from auth_service.aws_proxy.dynamoDb.util import is_conditional_check_failed
+from auth_service.configuration import settings
+from auth_service.logic.repository.dynamo_user_repository import DynamoDBUserRepository
+
+
+@dataclass
+class BackfillReport:
+    """
+    What the backfill did, conflicts are emails held by more than one user and need to be resolved by hand
+    """
+
+    users: int = 0
+    created: int = 0
+    present: int = 0
+    conflicts: dict[str, list[str]] = field(default_factory=dict)
+
+
+def backfill_email_items(table: DynamoDBOperations, dry_run: bool = False, page_size: int = 500) -> BackfillReport:
+    """
+    Write the missing EMAIL# item of every user, never overwriting one that reserves the email for another user
+    :param dry_run: Only report what would be written.
+    """
+    report = BackfillReport()
+    for user in table.scan("begins_with(pk, :prefix)", {":prefix": "USER#"}, page_size=page_size):
+        report.users += 1
+        email, user_id = user.get("email"), user.get("id")
+        if not email or not user_id:
+            continue
+        key = DynamoDBUserRepository._email_key(email)  # pylint: disable=protected-access
+        owner = table.get_item(key)
+        if owner is not None:
+            if owner.get("user_id") == user_id:
+                report.present += 1
+            else:
+                report.conflicts.setdefault(email, [owner.get("user_id")]).append(user_id)
+            continue
+        if dry_run:
+            report.created += 1
+            continue
+        try:
+            table.create_item({**key, "user_id": user_id}, condition_expression="attribute_not_exists(pk)")
+            report.created += 1
+        except ClientError as exc:
+            if not is_conditional_check_failed(exc):
+                raise
+            # taken since it was read, by a signup or by another user with the same email
+            owner = table.get_item(key) or {}
+            if owner.get("user_id") == user_id:
+                report.present += 1
+            else:
+                report.conflicts.setdefault(email, [owner.get("user_id")]).append(user_id)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write the EMAIL# uniqueness item of every existing user")
+    parser.add_argument("--table", default=settings.get_user_dynamo_table_name())
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if not args.table:
+        parser.error("no table given and USER_DYNAMO_TABLE is not set")
+
+    report = backfill_email_items(DynamoDBOperations(args.table, settings.get_aws_region()), dry_run=args.dry_run)
+    print(f"users={report.users} created={report.created} already present={report.present}")
+    for email, user_ids in sorted(report.conflicts.items()):
+        print(f"conflict: {email} is used by users {', '.join(str(user_id) for user_id in user_ids)}")
+    if not report.conflicts and not args.dry_run:
+        print("Every user has its email item, EMAIL_UNIQUENESS_BACKFILLED=true can be set")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,42 +2,180 @@
 Connection between Database of users data and user service layer
 """
 
+import asyncio
+import functools
 import json
-from auth_service.logic.interfaces.iuser_respository import IUserRepository
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from auth_service.logic.interfaces.iuser_respository import IUserRepository, user_not_found
 from auth_service.configuration import settings
 from auth_service.models.users import User
 
+from errorhub.exceptions import ConflictException
+from errorhub.models import ErrorSeverity
+
 
 class JsonUserRepository(IUserRepository):
     """
-    Real CRUD operations for user data happens here
+    Real CRUD operations for user data happens here.
+    The json file is a snapshot; every write is appended to a log next to it (<file>.log) and the log is folded
+    into the snapshot by periodic compaction, so a write no longer rewrites every user.
+    Users are indexed by id and email in memory, rebuilt from snapshot plus log at startup.
+    Writes run on one worker thread, in order, so appends, fsyncs and compactions never block the event loop.
     """
 
-    def __init__(self):
-        self.file_path = settings.get_user_json_record_path()
-        self.user_dict = {}
+    def __init__(self, file_path: str | None = None, compact_every: int = 10000, fsync: bool = False):
+        """
+        :param file_path: Snapshot file, defaults to the configured user json record path.
+        :param compact_every: Minimum number of log records before compaction, compaction also waits until
+            the log is as long as the number of users so its cost stays amortised O(1) per write.
+        :param fsync: Flush every appended record to disk before returning.
+        """
+        self.file_path = file_path or settings.get_user_json_record_path()
+        self.log_path = f"{self.file_path}.log"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.user_dict: dict[str, dict] = {}
+        self.email_index: dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="json-users")
         try:
             with open(self.file_path, "r", encoding="utf-8") as f:
-                self.user_dict = json.load(f)
+                for user_id, user in json.load(f).items():
+                    self._apply_put(user_id, user)
         except FileNotFoundError as exc:
             raise FileNotFoundError("User data file not found") from exc
+        self._log_records = self._replay_log()
+        self._log = open(self.log_path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def _apply_put(self, user_id: str, user: dict) -> None:
+        previous = self.user_dict.get(user_id)
+        if previous is not None and self.email_index.get(previous.get("email")) == user_id:
+            del self.email_index[previous["email"]]
+        self.user_dict[user_id] = user
+        if user.get("email"):
+            self.email_index[user["email"]] = user_id
+
+    def _apply_delete(self, user_id: str) -> None:
+        previous = self.user_dict.pop(user_id, None)
+        if previous is not None and self.email_index.get(previous.get("email")) == user_id:
+            del self.email_index[previous["email"]]
+
+    def _apply(self, record: dict) -> None:
+        if record["op"] == "put":
+            self._apply_put(record["id"], record["user"])
+        else:
+            self._apply_delete(record["id"])
+
+    def _replay_log(self) -> int:
+        """
+        Apply the log on top of the snapshot. A torn last record from a crash mid-append is cut off.
+        """
+        records = 0
+        good_offset = 0
+        try:
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    self._apply(record)
+                    records += 1
+                    good_offset += len(line)
+        except FileNotFoundError:
+            return 0
+        if good_offset != os.path.getsize(self.log_path):
+            os.truncate(self.log_path, good_offset)
+        return records
+
+    def _write(self, record: dict) -> None:
+        """
+        Apply one record in memory, append it to the log and compact when the log has grown long enough
+        """
+        line = json.dumps(record, default=str, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._apply(record)
+            self._log.write(line)
+            self._log.flush()
+            if self.fsync:
+                os.fsync(self._log.fileno())
+            self._log_records += 1
+            if self._log_records >= max(self.compact_every, len(self.user_dict)):
+                self.compact()
+
+    def compact(self) -> None:
+        """
+        Fold the log into a new snapshot. The snapshot is replaced atomically before the log is emptied,
+        and replaying a log over a snapshot that already contains it is harmless, so a crash at any point is safe.
+        """
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.file_path))
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.user_dict, f, default=str, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.file_path)
+            if hasattr(os, "O_DIRECTORY"):
+                dir_fd = os.open(directory, os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+
+            self._log.close()
+            self._log = open(self.log_path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+            self._log_records = 0
+
+    def close(self) -> None:
+        """
+        Finish pending writes and close the log file
+        """
+        self._executor.shutdown(wait=True)
+        self._log.close()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _create(self, user: User) -> User:
+        with self._lock:
+            if str(user.id) in self.user_dict or user.email in self.email_index:
+                raise ConflictException(
+                    service="auth_service",
+                    message="User Id already exists" if str(user.id) in self.user_dict else "Email already exists",
+                    severity=ErrorSeverity.LOW,
+                    environment=settings.get_environment(),
+                )
+            self._write({"op": "put", "id": str(user.id), "user": user.model_dump()})
+        return user
+
+    def _delete(self, user_id: str) -> User:
+        with self._lock:
+            user_data = self.user_dict.get(user_id)
+            if user_data is None:
+                raise user_not_found(user_id, "delete")
+            self._write({"op": "delete", "id": user_id})
+        return User(**user_data)
 
     async def create_user(self, user: User) -> User:
         """
         create user in json file
         """
-        self.user_dict[str(user.id)] = user.model_dump()
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.user_dict, f, indent=4, default=str)
-        return user
+        return await self._run(self._create, user)
 
     async def get_user_by_email(self, email: str) -> User | None:
         """
         find user by email
         """
-        for user in self.user_dict.values():
-            if user.get("email") == email:
-                return User(**user)
+        user_data = self.user_dict.get(self.email_index.get(email))
+        if user_data is not None:
+            return User(**user_data)
         return None
 
     async def get_user_by_id(self, user_id: str):
@@ -49,18 +187,22 @@ class JsonUserRepository(IUserRepository):
             return User(**user_data)
         return None
 
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[User]:
+        """
+        find many users by id
+        """
+        found = (self.user_dict.get(user_id) for user_id in dict.fromkeys(user_ids))
+        return [User(**user_data) for user_data in found if user_data is not None]
+
     async def update_user(self, user: User):
         """
         update user in database
         """
-        self.user_dict[user.id] = user.model_dump()
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.user_dict, f, indent=4, default=str)
+        await self._run(self._write, {"op": "put", "id": user.id, "user": user.model_dump()})
+        return user
 
-    async def delete_user(self, user_id: str):
+    async def delete_user(self, user_id: str) -> User:
         """
         delete user from database
         """
-        self.user_dict.pop(user_id, None)
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.user_dict, f, indent=4, default=str)
+        return await self._run(self._delete, user_id)
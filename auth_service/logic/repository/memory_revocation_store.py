@@ -0,0 +1,52 @@
+"""
+Process local revoked token storage
+"""
+
+import heapq
+import threading
+import time
+
+from auth_service.logic.interfaces.irevocation_store import IRevocationStore
+
+
+class InMemoryRevocationStore(IRevocationStore):
+    """
+    Revoked token ids kept in memory and pruned once the tokens have expired.
+    Not shared between containers, use DynamoDBRevocationStore for that.
+    """
+
+    def __init__(self) -> None:
+        self._revoked: dict[str, float] = {}
+        self._expiry_heap: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._expiry_heap)
+            if self._revoked.get(jti) == expires_at:
+                del self._revoked[jti]
+
+    async def revoke(self, jti: str, expires_at: float) -> bool:
+        """
+        revoke token id until it expires
+        """
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            if jti in self._revoked:
+                return False
+            if expires_at > now:
+                self._revoked[jti] = expires_at
+                heapq.heappush(self._expiry_heap, (expires_at, jti))
+            return True
+
+    async def is_revoked(self, jti: str) -> bool:
+        """
+        check whether token id is revoked
+        """
+        with self._lock:
+            self._prune(time.time())
+            return jti in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
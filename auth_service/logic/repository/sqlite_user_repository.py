@@ -0,0 +1,224 @@
+"""
+Connection between an embedded SQLite database of users and user service layer
+"""
+
+import asyncio
+import functools
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from auth_service.logic.interfaces.iuser_respository import (
+    IUserRepository,
+    check_patch,
+    email_taken,
+    user_modified,
+    user_not_found,
+)
+from auth_service.configuration import settings
+from auth_service.models.users import User
+
+from errorhub.exceptions import ConflictException
+from errorhub.models import ErrorSeverity
+
+_COLUMNS = "id, name, email, password_hash, created_at, updated_at, apps"
+
+# statements are constant strings so sqlite3's per-connection statement cache prepares each one only once
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    apps TEXT NOT NULL
+)
+"""
+_INSERT = f"INSERT INTO users ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_SELECT_BY_ID = f"SELECT {_COLUMNS} FROM users WHERE id = ?"
+_SELECT_BY_EMAIL = f"SELECT {_COLUMNS} FROM users WHERE email = ?"
+_UPDATE = "UPDATE users SET name = ?, email = ?, password_hash = ?, updated_at = ?, apps = ? WHERE id = ?"
+_DELETE = f"DELETE FROM users WHERE id = ? RETURNING {_COLUMNS}"
+_EXISTS = "SELECT 1 FROM users WHERE id = ?"
+
+# stay below SQLite's default limit of host parameters per statement
+_MAX_IDS_PER_QUERY = 500
+
+
+class SqliteUserRepository(IUserRepository):
+    """
+    Users in a single-node SQLite database in WAL mode, so readers never wait for the writer.
+    Queries run on a small thread pool, each worker thread keeping its own connection, so the async
+    methods never block the event loop.
+    """
+
+    def __init__(self, database_path: str | None = None, max_workers: int | None = None):
+        """
+        :param database_path: SQLite file, defaults to the configured path.
+        :param max_workers: Number of worker threads (and connections), defaults to the configured value.
+        """
+        self.database_path = database_path or settings.get_user_sqlite_path()
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.get_user_sqlite_workers(), thread_name_prefix="sqlite"
+        )
+        with sqlite3.connect(self.database_path) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+        connection.close()
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Connection of the current worker thread, opened on first use
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # only ever used by this thread, closed from close() once the pool has stopped
+            connection = sqlite3.connect(
+                self.database_path, isolation_level=None, cached_statements=64, check_same_thread=False
+            )
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=5000")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    @staticmethod
+    def _to_user(row: tuple | None) -> User | None:
+        if row is None:
+            return None
+        user_id, name, email, password_hash, created_at, updated_at, apps = row
+        return User(
+            id=user_id,
+            name=name,
+            email=email,
+            password_hash=password_hash,
+            created_at=created_at,
+            updated_at=updated_at,
+            apps=json.loads(apps),
+        )
+
+    def _fetch_one(self, statement: str, value: str) -> User | None:
+        return self._to_user(self._connection().execute(statement, (value,)).fetchone())
+
+    def _insert(self, user: User) -> None:
+        row = (user.id, user.name, user.email, user.password_hash, user.created_at, user.updated_at)
+        try:
+            self._connection().execute(_INSERT, (*row, json.dumps(user.apps)))
+        except sqlite3.IntegrityError as exc:
+            raise ConflictException(
+                service="auth_service",
+                message="User Id or Email already exists",
+                severity=ErrorSeverity.LOW,
+                environment=settings.get_environment(),
+            ) from exc
+
+    def _fetch_many(self, user_ids: list[str]) -> list[User]:
+        users = {}
+        for start in range(0, len(user_ids), _MAX_IDS_PER_QUERY):
+            chunk = user_ids[start : start + _MAX_IDS_PER_QUERY]
+            statement = f"SELECT {_COLUMNS} FROM users WHERE id IN ({', '.join('?' * len(chunk))})"
+            for row in self._connection().execute(statement, chunk):
+                user = self._to_user(row)
+                users[user.id] = user
+        return [users[user_id] for user_id in user_ids if user_id in users]
+
+    def _update(self, user: User) -> User | None:
+        connection = self._connection()
+        try:
+            connection.execute(
+                _UPDATE, (user.name, user.email, user.password_hash, user.updated_at, json.dumps(user.apps), user.id)
+            )
+        except sqlite3.IntegrityError as exc:
+            raise email_taken() from exc
+        return self._to_user(connection.execute(_SELECT_BY_ID, (user.id,)).fetchone())
+
+    def _patch(self, user_id: str, changes: dict, expected_updated_at: str | None) -> User:
+        # column names come from the patchable fields only, values are always parameters
+        columns = sorted(changes)
+        statement = f"UPDATE users SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
+        params = [json.dumps(changes[c]) if c == "apps" else changes[c] for c in columns] + [user_id]
+        if expected_updated_at is not None:
+            statement += " AND updated_at = ?"
+            params.append(expected_updated_at)
+        connection = self._connection()
+        try:
+            rows = connection.execute(f"{statement} RETURNING {_COLUMNS}", params).fetchall()
+        except sqlite3.IntegrityError as exc:
+            raise email_taken() from exc
+        if rows:
+            return self._to_user(rows[0])
+        if connection.execute(_EXISTS, (user_id,)).fetchone() is None:
+            raise user_not_found(user_id)
+        raise user_modified(user_id)
+
+    def _delete(self, user_id: str) -> User:
+        rows = self._connection().execute(_DELETE, (user_id,)).fetchall()
+        if not rows:
+            raise user_not_found(user_id, "delete")
+        return self._to_user(rows[0])
+
+    async def create_user(self, user: User) -> User:
+        """
+        create user in SQLite
+        """
+        await self._run(self._insert, user)
+        return user
+
+    async def get_user_by_email(self, email: str) -> User | None:
+        """
+        find user by email using the unique email index
+        """
+        return await self._run(self._fetch_one, _SELECT_BY_EMAIL, email)
+
+    async def get_user_by_id(self, user_id: str) -> User | None:
+        """
+        find user by id
+        """
+        return await self._run(self._fetch_one, _SELECT_BY_ID, user_id)
+
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[User]:
+        """
+        find many users by id
+        """
+        return await self._run(self._fetch_many, list(dict.fromkeys(user_ids)))
+
+    async def update_user(self, user: User) -> User:
+        """
+        update user in SQLite
+        """
+        return await self._run(self._update, user)
+
+    async def patch_user(self, user_id: str, changes: dict, expected_updated_at: str | None = None) -> User:
+        """
+        update only the changed columns with one conditional UPDATE ... RETURNING
+        """
+        check_patch(changes)
+        if not changes:
+            return await super().patch_user(user_id, changes, expected_updated_at)
+        return await self._run(self._patch, user_id, changes, expected_updated_at)
+
+    async def delete_user(self, user_id: str) -> User:
+        """
+        delete user from SQLite with one DELETE ... RETURNING
+        """
+        return await self._run(self._delete, user_id)
+
+    def close(self) -> None:
+        """
+        Stop the worker threads and close their connections
+        """
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
@@ -10,6 +10,7 @@ from auth_service.logic.interfaces.iuser_respository import IUserRepository
 from auth_service.configuration import settings
 
 from auth_service.models.users import User
+from auth_service.utils.metrics import timed
 
 from errorhub.exceptions import UnauthorizedException, NotFoundException
 from errorhub.models import ErrorSeverity
@@ -27,6 +28,7 @@ class AuthenticationService(IAuthenticationService):
         self.token_service = token_service
         self.user_repository = user_repository
 
+    @timed("auth.login")
     async def login(self, credentials: dict, strategy_name: str) -> dict:
         """
         Authenticate using the given strategy and generate tokens.
@@ -68,6 +70,7 @@ class AuthenticationService(IAuthenticationService):
             "refresh_token": refresh_token,
         }
 
+    @timed("auth.logout")
     async def logout(self, refresh_token: str) -> dict:
         """
         Logout by revoking the refresh token.
@@ -77,26 +80,18 @@ class AuthenticationService(IAuthenticationService):
 
         return {"message": "User logged out successfully"}
 
+    @timed("auth.refresh")
     async def refresh(self, refresh_token: str) -> dict:
         """
         Refresh access and refresh tokens using the provided refresh token.
+        The token is decoded once and the conditional revoke rejects tokens that were already used.
+        The user is read before the token is revoked, so a failed read leaves the token usable for a retry.
         """
-        # Verify refresh token
-        payload = await self.token_service.verify_refresh_token(refresh_token)
-        if not payload:
-            raise UnauthorizedException(
-                service="Auth Service",
-                message="Invalid or expired refresh token",
-                severity=ErrorSeverity.LOW,
-                environment=settings.get_environment(),
-                context={
-                    "detail": "The provided refresh token is invalid or has expired.",
-                    "suggestion": "Please login again.",
-                },
-            )
-        user_id = payload.get("sub", "")
-        # Extract user info from payload
-        user = await self.user_repository.get_user_by_id(user_id)
+        claims = await self.token_service.decode_refresh_token(refresh_token)
+        if not claims:
+            raise self._invalid_refresh_token()
+
+        user = await self.user_repository.get_user_by_id(claims.get("sub", ""))
         if not user:
             raise NotFoundException(
                 service="Auth Service",
@@ -105,10 +100,24 @@ class AuthenticationService(IAuthenticationService):
                 environment=settings.get_environment(),
                 context={"detail": "User linked to refresh token does not exist"},
             )
-        # Generate new tokens
+        new_refresh_token = await self.token_service.rotate_refresh_token(refresh_token, claims)
+        if not new_refresh_token:
+            raise self._invalid_refresh_token()
         new_access_token = await self.token_service.generate_access_token(user)
-        new_refresh_token = await self.token_service.rotate_refresh_token(refresh_token)
         return {
             "access_token": new_access_token,
             "refresh_token": new_refresh_token,
         }
+
+    @staticmethod
+    def _invalid_refresh_token() -> UnauthorizedException:
+        return UnauthorizedException(
+            service="Auth Service",
+            message="Invalid or expired refresh token",
+            severity=ErrorSeverity.LOW,
+            environment=settings.get_environment(),
+            context={
+                "detail": "The provided refresh token is invalid or has expired.",
+                "suggestion": "Please login again.",
+            },
+        )
@@ -2,11 +2,20 @@
 Service for handling JWT token generation, verification, revocation, and rotation.
 """
 
+import hashlib
+import time
+import uuid
+
 import jwt
 from datetime import datetime, timedelta, UTC
 
 from auth_service.models.users import User
 from auth_service.logic.interfaces.itoken_service import ITokenService
+from auth_service.logic.interfaces.irevocation_store import IRevocationStore
+from auth_service.logic.repository.memory_revocation_store import InMemoryRevocationStore
+from auth_service.logic.services.key_ring import KeyRing
+from auth_service.utils.cache import LRUTTLCache
+from auth_service.utils.metrics import timed
 
 
 class JWTTokenService(ITokenService):
@@ -16,27 +25,45 @@ class JWTTokenService(ITokenService):
 
     def __init__(
         self,
-        secret_key: str,
+        secret_key: str | None = None,
         access_token_expiry_minutes: int = 15,
         refresh_token_expiry_days: int = 7,
         algorithm: str = "HS256",
-        revoked_tokens_store=None,  # TODO: Replace with proper interface for revoked tokens storage that is TTL-aware
+        revocation_store: IRevocationStore | None = None,
+        access_token_cache_size: int = 0,
+        access_token_cache_ttl_seconds: float = 60,
+        key_ring: KeyRing | None = None,
     ):
         """
         Initialize the JWT Token Service.
-        :param secret_key: Secret key for signing tokens.
+        :param secret_key: Shared secret for signing tokens, used when no key ring is given.
         :param access_token_expiry_minutes: Expiry time for access tokens in minutes.
         :param refresh_token_expiry_days: Expiry time for refresh tokens in days.
         :param algorithm: Signing algorithm.
-        :param revoked_tokens_store: Store for revoked tokens.
+        :param revocation_store: TTL-aware store of revoked refresh token ids, in-memory when not given.
+        :param access_token_cache_size: Number of verified access tokens kept in memory, 0 disables the cache.
+        :param access_token_cache_ttl_seconds: Upper bound for how long a verified token is cached,
+            entries never outlive the token's own exp.
+        :param key_ring: Asymmetric keys (RS256/ES256/EdDSA); tokens then carry a kid header and can be
+            verified by other services from the published JWKS.
         """
+        if secret_key is None and key_ring is None:
+            raise ValueError("Either a secret key or a key ring is required")
         self.secret_key = secret_key
+        self.key_ring = key_ring
         self.access_exp = access_token_expiry_minutes
         self.refresh_exp = refresh_token_expiry_days
         self.algorithm = algorithm
 
-        # Fallback to in-memory dict if nothing is provided
-        self.revoked_tokens = revoked_tokens_store or set()
+        # Fallback to a process local store if nothing is provided
+        self.revocation_store = revocation_store if revocation_store is not None else InMemoryRevocationStore()
+
+        self._access_token_cache = (
+            LRUTTLCache(max_size=access_token_cache_size, ttl_seconds=access_token_cache_ttl_seconds)
+            if access_token_cache_size > 0
+            else None
+        )
+        self._cached_key_ring_version = key_ring.version if key_ring is not None else 0
 
     async def generate_access_token(self, user: User) -> str:
         """
@@ -44,13 +71,14 @@ class JWTTokenService(ITokenService):
         """
         payload = {
             "sub": user.id,
+            "name": user.name,
             "apps": user.apps,
             "email": user.email,
             "type": "access",
             "exp": datetime.now(UTC) + timedelta(minutes=self.access_exp),
             "iat": datetime.now(UTC),
         }
-        return jwt.encode(payload=payload, key=self.secret_key, algorithm=self.algorithm)
+        return self._encode(payload)
 
     async def generate_refresh_token(self, user: User) -> str:
         """
@@ -59,63 +87,141 @@ class JWTTokenService(ITokenService):
         payload = {
             "sub": user.id,
             "type": "refresh",
+            "jti": uuid.uuid4().hex,
             "apps": user.apps,
             "email": user.email,
             "exp": datetime.now(UTC) + timedelta(days=self.refresh_exp),
             "iat": datetime.now(UTC),
         }
-        token = jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+        token = self._encode(payload)
         return token
 
+    @timed("jwt.sign")
+    def _encode(self, payload: dict) -> str:
+        """
+        Sign the payload with the active key of the ring, or the shared secret
+        """
+        if self.key_ring is not None:
+            key = self.key_ring.active_key
+            return jwt.encode(payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
+        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+
+    @timed("jwt.verify")
+    def _decode(self, token: str) -> dict:
+        """
+        Verify the signature with the key named by the kid header, or the shared secret
+        """
+        if self.key_ring is not None:
+            key = self.key_ring.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                raise jwt.InvalidTokenError("Unknown signing key")
+            # the algorithm is pinned by our key, never taken from the token header
+            return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+        return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        """
+        Public verification keys as a JSON Web Key Set, empty for shared secret signing
+        """
+        return self.key_ring.jwks() if self.key_ring is not None else {"keys": []}
+
     async def verify_access_token(self, token: str) -> dict | None:
         """
         Verify the given access token and return its payload if valid.
+        Tokens verified before are served from the cache until their exp, or until the key ring changes.
         """
+        cache_key = None
+        if self._access_token_cache is not None:
+            self._drop_cache_on_key_change()
+            cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+            cached = self._access_token_cache.get(cache_key)
+            if cached is not None and cached["exp"] > time.time():
+                return dict(cached)
+
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = self._decode(token)
             if payload.get("type") != "access":
                 return None
-            return payload
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
             return None
 
-    async def verify_refresh_token(self, token: str) -> dict | None:
+        if cache_key is not None and "exp" in payload:
+            self._access_token_cache.set(cache_key, dict(payload), ttl_seconds=self._cache_ttl(payload["exp"]))
+        return payload
+
+    def _drop_cache_on_key_change(self) -> None:
         """
-        Verify the given refresh token and return its payload if valid.
+        Forget every verified token once a key was added or retired, tokens of a retired key must fail right away
         """
-        # If token is revoked → instantly invalid
-        if token in self.revoked_tokens:
-            return None
+        if self.key_ring is not None and self.key_ring.version != self._cached_key_ring_version:
+            self._cached_key_ring_version = self.key_ring.version
+            self._access_token_cache.clear()
+
+    def _cache_ttl(self, exp: float) -> float:
+        """
+        Seconds a verified token may stay cached, never past its exp
+        """
+        return min(self._access_token_cache.ttl_seconds, exp - time.time())
+
+    def access_token_cache_stats(self) -> dict | None:
+        """
+        Hit, miss and eviction counters of the verified access token cache, None when disabled
+        """
+        return self._access_token_cache.stats() if self._access_token_cache is not None else None
 
+    async def decode_refresh_token(self, token: str) -> dict | None:
+        """
+        Check the signature, expiry and type of a refresh token and return its claims, without a revocation lookup.
+        Callers that go on to revoke the token get the revocation check from the conditional revoke instead.
+        """
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            if payload.get("type") != "refresh":
-                return None
-            return payload
-        except jwt.ExpiredSignatureError:
-            return None
+            payload = self._decode(token)
         except jwt.InvalidTokenError:
             return None
+        return payload if payload.get("type") == "refresh" else None
 
-    async def revoke_refresh_token(self, token: str) -> None:
-        """Mark the refresh token as unusable."""
-        await self.verify_refresh_token(token)
-        self.revoked_tokens.add(token)
-
-    async def rotate_refresh_token(self, old_token: str) -> str | None:
-        """Revoke old refresh token and create a new one."""
-        payload = await self.verify_refresh_token(old_token)
-        if not payload:
+    async def verify_refresh_token(self, token: str) -> dict | None:
+        """
+        Verify the given refresh token and return its payload if valid.
+        """
+        payload = await self.decode_refresh_token(token)
+        # the signature is checked first so forged tokens never cost a store lookup
+        if payload is None or await self.revocation_store.is_revoked(self._token_id(token, payload)):
             return None
+        return payload
+
+    @staticmethod
+    def _token_id(token: str, payload: dict) -> str:
+        """
+        jti claim of the token, tokens issued before jti was added are identified by their digest
+        """
+        return payload.get("jti") or hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    async def revoke_refresh_token(self, token: str, claims: dict | None = None) -> bool:
+        """
+        Mark the refresh token as unusable, returns False when it was invalid or already revoked.
+        :param claims: Claims of the token when the caller already decoded it.
+        """
+        claims = claims or await self.decode_refresh_token(token)
+        if not claims:
+            return False
+        return await self.revocation_store.revoke(self._token_id(token, claims), claims["exp"])
 
-        # revoke old token
-        await self.revoke_refresh_token(old_token)
+    async def rotate_refresh_token(self, old_token: str, claims: dict | None = None) -> str | None:
+        """
+        Revoke the old refresh token and issue its successor, None when the old one was invalid or already used.
+        The token is decoded once, and the conditional revoke is also the revocation check: of concurrent
+        rotations of one token exactly one wins, the others get None, so a token never has two successors.
+        :param claims: Claims of the old token when the caller already decoded it.
+        """
+        claims = claims or await self.decode_refresh_token(old_token)
+        if not claims or not await self.revoke_refresh_token(old_token, claims):
+            return None
 
         # create new refresh token for same user
-        user_id = payload["sub"]
         user = User(
-            id=user_id, email=payload.get("email", ""), name=None, password_hash="", apps=payload.get("apps", [])
+            id=claims["sub"], email=claims.get("email", ""), name=None, password_hash="", apps=claims.get("apps", [])
         )
         return await self.generate_refresh_token(user)
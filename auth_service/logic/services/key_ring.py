@@ -0,0 +1,131 @@
+"""
+Asymmetric signing keys for JWTTokenService, with rotation and a JWKS view of the public keys.
+"""
+
+import json
+import threading
+
+import jwt
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+
+class SigningKey:
+    """
+    One key of the ring. Keys without a private key are only kept to verify tokens signed before a rotation.
+    """
+
+    def __init__(self, kid: str, algorithm: str, private_key: str | None = None, public_key: str | None = None):
+        """
+        :param kid: Key id, sent in the token header so verifiers can pick the right key.
+        :param algorithm: One of RS256, ES256 or EdDSA.
+        :param private_key: PEM encoded private key, required for the active key.
+        :param public_key: PEM encoded public key, derived from the private key when not given.
+        """
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+        if private_key is None and public_key is None:
+            raise ValueError(f"Signing key {kid} has neither a private nor a public key")
+
+        self.kid = kid
+        self.algorithm = algorithm
+        self._algorithm = jwt.get_algorithm_by_name(algorithm)
+        self.private_key = self._algorithm.prepare_key(private_key) if private_key else None
+        self.public_key = (
+            self.private_key.public_key() if self.private_key is not None else self._algorithm.prepare_key(public_key)
+        )
+
+    def to_jwk(self) -> dict:
+        """
+        Public part of the key as a JSON Web Key
+        """
+        jwk = self._algorithm.to_jwk(self.public_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeyRing:
+    """
+    Holds the active signing key and the keys still needed to verify older tokens.
+    To rotate without rejecting tokens, publish the new key (add it) for at least the JWKS cache max-age
+    before making it active, and retire the old key only after its last token expired.
+    """
+
+    def __init__(self, keys: list[SigningKey], active_kid: str | None = None) -> None:
+        if not keys:
+            raise ValueError("Key ring needs at least one key")
+        self._lock = threading.Lock()
+        self._keys = {key.kid: key for key in keys}
+        # bumped whenever the set of keys changes, so verified token caches know to drop their entries
+        self.version = 0
+        self._active_kid = ""
+        self.activate(active_kid or next((key.kid for key in keys if key.private_key is not None), keys[0].kid))
+
+    @classmethod
+    def from_config(cls, raw_keys: str, active_kid: str | None = None) -> "KeyRing":
+        """
+        Build the ring from a JSON list of {"kid", "alg", "private_key", "public_key"} objects
+        """
+        keys = [
+            SigningKey(
+                kid=entry["kid"],
+                algorithm=entry["alg"],
+                private_key=entry.get("private_key"),
+                public_key=entry.get("public_key"),
+            )
+            for entry in json.loads(raw_keys)
+        ]
+        return cls(keys, active_kid=active_kid)
+
+    @property
+    def active_key(self) -> SigningKey:
+        """
+        Key new tokens are signed with
+        """
+        return self._keys[self._active_kid]
+
+    def get(self, kid: str | None) -> SigningKey | None:
+        """
+        Key with the given id, None when unknown
+        """
+        return self._keys.get(kid) if kid is not None else None
+
+    def add(self, key: SigningKey) -> None:
+        """
+        Publish a key for verification without signing with it yet
+        """
+        with self._lock:
+            self._keys = {**self._keys, key.kid: key}
+            self.version += 1
+
+    def activate(self, kid: str) -> None:
+        """
+        Sign new tokens with the given key
+        """
+        key = self._keys.get(kid)
+        if key is None or key.private_key is None:
+            raise ValueError(f"Signing key {kid} is unknown or has no private key")
+        self._active_kid = kid
+
+    def rotate(self, key: SigningKey) -> None:
+        """
+        Add a key and sign with it right away, previous keys keep verifying their tokens
+        """
+        self.add(key)
+        self.activate(key.kid)
+
+    def retire(self, kid: str) -> None:
+        """
+        Stop accepting tokens signed with the given key
+        """
+        if kid == self._active_kid:
+            raise ValueError("The active signing key cannot be retired")
+        with self._lock:
+            self._keys = {k: v for k, v in self._keys.items() if k != kid}
+            self.version += 1
+
+    def jwks(self) -> dict:
+        """
+        Public keys of the ring as a JSON Web Key Set
+        """
+        return {"keys": [key.to_jwk() for key in self._keys.values()]}
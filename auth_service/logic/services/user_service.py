@@ -2,11 +2,13 @@
 Connection between user apis and user repository.
 """
 
+from datetime import datetime, UTC
+
 from auth_service.models.users import User
 from auth_service.logic.interfaces.iuser_respository import IUserRepository
-from auth_service.utils.password import hash_password
+from auth_service.utils.password import HashingExecutor, hash_password
 
-from errorhub.exceptions import ConflictException, NotFoundException, BadRequestException
+from errorhub.exceptions import NotFoundException, BadRequestException
 from errorhub.models import ErrorSeverity
 
 from auth_service.configuration import settings
@@ -18,73 +20,39 @@ class UserService:
     This layer connects the user repository and api layer together.
     """
 
-    def __init__(self, user_repo: IUserRepository):
+    def __init__(self, user_repo: IUserRepository, hashing_executor: HashingExecutor | None = None):
         self.user_repository = user_repo
+        self.hashing_executor = hashing_executor
 
     async def register_user(self, user: User) -> User:
         """
         Create a new user.
+        The repository refuses a taken id or email with a ConflictException, so there is nothing to read first;
+        a duplicate signup still pays for hashing its password before it is refused.
         """
-        if await self.user_repository.get_user_by_id(str(user.id)) is not None:
-            raise ConflictException(
-                service="auth_service",
-                message="User Id already exists",
-                severity=ErrorSeverity.LOW,
-                environment=settings.get_environment(),
-            )
-        if await self.user_repository.get_user_by_email(user.email) is not None:
-            raise ConflictException(
-                service="auth_service",
-                message="Email already exists",
-                severity=ErrorSeverity.LOW,
-                environment=settings.get_environment(),
-            )
-        hashed_password = await hash_password(user.password_hash)
+        hashed_password = await hash_password(user.password_hash, self.hashing_executor)
         user.password_hash = hashed_password
         user_created = await self.user_repository.create_user(user)
         return user_created
 
     async def delete_user(self, user_id: str) -> None:
         """
-        Delete a user by user_id.
+        Delete a user by user_id, the repository raises NotFoundException for an unknown user.
         """
-        if await self.user_repository.get_user_by_id(user_id) is None:
-            raise NotFoundException(
-                service="auth_service",
-                message="User not found",
-                severity=ErrorSeverity.LOW,
-                context={"The user you are trying to delete is not found": user_id},
-                environment=settings.get_environment(),
-            )
-
         await self.user_repository.delete_user(user_id)
 
-    async def update_user_by_id(self, user_id: str, user: User) -> User:
+    async def update_user_by_id(self, user_id: str, changes: dict, expected_updated_at: str | None = None) -> User:
         """
-        Update user information by user_id.
+        Update only the given fields of a user, without reading it first.
+        :param changes: New values of "name", "email", "apps" or "password" (plain text, hashed here).
+        :param expected_updated_at: updated_at of the user as the caller last saw it,
+            the update is refused with a ConflictException when the user changed since.
         """
-        old_user = await self.user_repository.get_user_by_id(user_id)
-        if old_user is None:
-            raise NotFoundException(
-                service="auth_service",
-                message="User not found",
-                severity=ErrorSeverity.LOW,
-                environment=settings.get_environment(),
-                context={"The user you are trying to update is not found": user_id},
-            )
-        if user.email != old_user.email and len(user.email) > 0:
-            old_user.email = user.email
-        if user.name != old_user.name:
-            old_user.name = user.name
-        if user.apps != old_user.apps and len(user.apps) > 0:
-            old_user.apps = user.apps
-        if user.password_hash != old_user.password_hash and len(user.password_hash) > 0:
-            hashed_password = await hash_password(user.password_hash)
-            old_user.password_hash = hashed_password
-        if user.updated_at:
-            old_user.updated_at = user.updated_at
-        new_user = await self.user_repository.update_user(old_user)
-        return new_user
+        changes = dict(changes)
+        if "password" in changes:
+            changes["password_hash"] = await hash_password(changes.pop("password"), self.hashing_executor)
+        changes["updated_at"] = datetime.now(UTC).isoformat()
+        return await self.user_repository.patch_user(user_id, changes, expected_updated_at)
 
     async def get_user_info(self, user_id: str | None, user_email: str | None) -> User:
         """
@@ -112,3 +80,16 @@ class UserService:
                 environment=settings.get_environment(),
             )
         return user
+
+    async def get_users_by_ids(self, user_ids: list[str]) -> list[User]:
+        """
+        Get information of many users at once, unknown ids are skipped.
+        """
+        if not user_ids:
+            raise BadRequestException(
+                service="auth_service",
+                message="user_ids must not be empty",
+                severity=ErrorSeverity.LOW,
+                environment=settings.get_environment(),
+            )
+        return await self.user_repository.get_users_by_ids(user_ids)
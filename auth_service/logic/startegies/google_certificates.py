@@ -0,0 +1,117 @@
+"""
+Verification of Google ID tokens with cached signing certificates.
+"""
+
+import base64
+import json
+import re
+import threading
+import time
+from typing import Callable
+
+import requests
+from google.auth import jwt as google_jwt
+from google.auth import exceptions as google_exceptions
+
+GOOGLE_OAUTH2_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertificateCache:
+    """
+    Google's signing certificates, fetched over a pooled keep-alive session
+    and kept for as long as the response's Cache-Control max-age allows.
+    """
+
+    def __init__(
+        self,
+        certs_url: str = GOOGLE_OAUTH2_CERTS_URL,
+        session: requests.Session | None = None,
+        default_max_age_seconds: float = 300,
+        min_refresh_interval_seconds: float = 30,
+        timeout_seconds: float = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param certs_url: Where the certificates are published.
+        :param session: HTTP session to reuse connections from.
+        :param default_max_age_seconds: Cache lifetime when the response has no max-age.
+        :param min_refresh_interval_seconds: Minimum time between refreshes forced by an unknown key id.
+        :param timeout_seconds: Timeout of the certificate request.
+        :param clock: Monotonic clock, injectable for tests.
+        """
+        self.certs_url = certs_url
+        self.session = session or requests.Session()
+        self.default_max_age_seconds = default_max_age_seconds
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self._clock = clock
+        self._certs: dict[str, str] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock = threading.Lock()
+        self.fetches = 0
+
+    def get_certs(self, kid: str | None = None) -> dict[str, str]:
+        """
+        Certificates by key id. An unknown kid triggers an early refresh, at most once per refresh interval,
+        so a Google key rotation is picked up before the cached copy expires.
+        """
+        now = self._clock()
+        if now < self._expires_at and (kid is None or kid in self._certs):
+            return self._certs
+
+        with self._lock:
+            now = self._clock()
+            stale = now >= self._expires_at
+            unknown_kid = kid is not None and kid not in self._certs
+            if stale or (unknown_kid and now - self._fetched_at >= self.min_refresh_interval_seconds):
+                self._refresh(now)
+            return self._certs
+
+    def _refresh(self, now: float) -> None:
+        response = self.session.get(self.certs_url, timeout=self.timeout_seconds)
+        response.raise_for_status()
+        self.fetches += 1
+        self._certs = response.json()
+        self._fetched_at = now
+        self._expires_at = now + self._max_age(response.headers.get("Cache-Control", ""))
+
+    def _max_age(self, cache_control: str) -> float:
+        if "no-store" in cache_control or "no-cache" in cache_control:
+            return 0
+        match = _MAX_AGE_PATTERN.search(cache_control)
+        return float(match.group(1)) if match else self.default_max_age_seconds
+
+
+class GoogleTokenVerifier:
+    """
+    Same checks as google.oauth2.id_token.verify_oauth2_token, without fetching certificates for every token.
+    """
+
+    def __init__(self, certificates: GoogleCertificateCache | None = None, clock_skew_in_seconds: int = 0) -> None:
+        self.certificates = certificates or GoogleCertificateCache()
+        self.clock_skew_in_seconds = clock_skew_in_seconds
+
+    def verify(self, token: str, audience: str | None = None) -> dict:
+        """
+        Verify signature, expiry, audience and issuer of a Google ID token and return its claims.
+        Blocking, run it off the event loop.
+        """
+        certs = self.certificates.get_certs(self._unverified_kid(token))
+        payload = google_jwt.decode(
+            token, certs=certs, audience=audience, clock_skew_in_seconds=self.clock_skew_in_seconds
+        )
+        if payload.get("iss") not in GOOGLE_ISSUERS:
+            raise google_exceptions.GoogleAuthError(f"Wrong issuer. 'iss' should be one of {GOOGLE_ISSUERS}")
+        return payload
+
+    @staticmethod
+    def _unverified_kid(token: str) -> str | None:
+        header = token.split(".", 1)[0]
+        try:
+            return json.loads(base64.urlsafe_b64decode(header + "=" * (-len(header) % 4))).get("kid")
+        except (ValueError, AttributeError):
+            return None
@@ -2,25 +2,29 @@
 Strategy for Google authentication.
 """
 
+import asyncio
+
 from auth_service.logic.interfaces.iauth_strategy import IAuthStrategy
 from auth_service.logic.repository.json_user_repository import IUserRepository
 from auth_service.models.users import User
 
-from google.oauth2 import id_token
-from google.auth.transport import requests
-
+from auth_service.logic.startegies.google_certificates import GoogleTokenVerifier
 from auth_service.utils.helper import generate_user_id
 from auth_service.configuration import settings
+from auth_service.utils.metrics import timed
 
-from errorhub.exceptions import NotFoundException, ForbiddenException
+from errorhub.exceptions import ConflictException, NotFoundException, ForbiddenException
 from errorhub.models import ErrorSeverity
 
 
 class GoogleAuthStrategy(IAuthStrategy):
-    def __init__(self, user_repository: IUserRepository):
+    def __init__(self, user_repository: IUserRepository, verifier: GoogleTokenVerifier | None = None):
         self.user_repository = user_repository
+        # shared for the life of the container so certificates and connections are reused across logins
+        self.verifier = verifier or GoogleTokenVerifier()
         # TODO add audience validation after setting up OAuth client IDs from fronend side
 
+    @timed("strategy.google")
     async def authenticate(self, credentials: dict) -> User:
         google_token = credentials.get("id_token")
 
@@ -38,7 +42,7 @@ class GoogleAuthStrategy(IAuthStrategy):
 
         # Verify Google token
         try:
-            payload = id_token.verify_oauth2_token(google_token, requests.Request())
+            payload = await asyncio.to_thread(self.verifier.verify, google_token)
         except Exception:
             raise ForbiddenException(
                 service="Auth Service",
@@ -65,6 +69,12 @@ class GoogleAuthStrategy(IAuthStrategy):
                 password_hash="",
                 apps=[],
             )
-            await self.user_repository.create_user(user)
+            try:
+                await self.user_repository.create_user(user)
+            except ConflictException:
+                # a concurrent first login with the same account created the user in the meantime
+                user = await self.user_repository.get_user_by_email(email)
+                if not user:
+                    raise
 
         return user
@@ -0,0 +1,37 @@
+"""
+Strategy wrapper that builds the real strategy on first use.
+"""
+
+import threading
+from typing import Callable
+
+from auth_service.logic.interfaces.iauth_strategy import IAuthStrategy
+
+
+class LazyStrategy(IAuthStrategy):
+    """
+    Defers building a strategy, and importing its provider libraries, until a login actually uses it,
+    so a container that never sees e.g. a Google login never pays for google-auth at cold start.
+    """
+
+    def __init__(self, build: Callable[[], IAuthStrategy]) -> None:
+        """
+        :param build: Builds the real strategy, importing whatever it needs.
+        """
+        self._build = build
+        self._strategy: IAuthStrategy | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def strategy(self) -> IAuthStrategy:
+        """
+        The real strategy, built on first access
+        """
+        if self._strategy is None:
+            with self._lock:
+                if self._strategy is None:
+                    self._strategy = self._build()
+        return self._strategy
+
+    async def authenticate(self, credentials: dict):
+        return await self.strategy.authenticate(credentials)
@@ -2,21 +2,29 @@
 Basic email/password authentication strategy
 """
 
+import logging
+
 from auth_service.logic.interfaces.iauth_strategy import IAuthStrategy
 from auth_service.logic.interfaces.iuser_respository import IUserRepository
-from auth_service.utils.password import verify_password
+from auth_service.utils.password import HashingExecutor, hash_password, verify_password
+from auth_service.utils.password_hashers import get_hasher, needs_rehash
 
-from errorhub.exceptions import NotFoundException, UnauthorizedException
+from errorhub.exceptions import ConflictException, NotFoundException, UnauthorizedException
 from errorhub.models import ErrorSeverity
 
 from auth_service.configuration import settings
 from auth_service.models.users import User
+from auth_service.utils.metrics import timed
+
+LOGGER = logging.getLogger(__name__)
 
 
 class EmailPasswordStrategy(IAuthStrategy):
-    def __init__(self, user_repository: IUserRepository):
+    def __init__(self, user_repository: IUserRepository, hashing_executor: HashingExecutor | None = None):
         self.user_repository = user_repository
+        self.hashing_executor = hashing_executor
 
+    @timed("strategy.email_password")
     async def authenticate(self, credentials: dict) -> User | None:
         email = credentials["email"]
         password = credentials["password"]
@@ -33,7 +41,9 @@ class EmailPasswordStrategy(IAuthStrategy):
                     "suggestion": "Register first please... or enter correct email",
                 },
             )
-        if user and await verify_password(password, user.password_hash):
+        if user and await verify_password(password, user.password_hash, self.hashing_executor):
+            if settings.is_password_rehash_on_login_enabled():
+                return await self._rehash_if_outdated(user, password)
             return user
         raise UnauthorizedException(
             service="Auth Service",
@@ -45,3 +55,19 @@ class EmailPasswordStrategy(IAuthStrategy):
                 "suggestion": "Please enter correct password",
             },
         )
+
+    async def _rehash_if_outdated(self, user: User, password: str) -> User:
+        """
+        Store the password hashed with the configured scheme and cost parameters when the stored hash is not.
+        The write is conditioned on the user being unchanged since it was read, so a concurrent password change wins,
+        and a failed write only means the rehash waits for the next login.
+        """
+        hasher = get_hasher()
+        if not needs_rehash(user.password_hash, hasher):
+            return user
+        password_hash = await hash_password(password, self.hashing_executor, hasher)
+        try:
+            return await self.user_repository.patch_user(user.id, {"password_hash": password_hash}, user.updated_at)
+        except (ConflictException, NotFoundException):
+            LOGGER.info("Password of user %s was not rehashed, it changed during login", user.id)
+            return user
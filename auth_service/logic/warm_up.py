@@ -0,0 +1,93 @@
+"""
+Warm-up of a Lambda container ahead of its first real request.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable
+
+from auth_service.logic.factory import factory
+from auth_service.models.auth import LoginResponse
+from auth_service.models.users import User, UserResponse
+
+LOGGER = logging.getLogger(__name__)
+
+WARM_UP_EVENT_KEY = "warm_up"
+
+_SAMPLE_USER = User(id="warm-up", name="Warm Up", email="warm-up@example.com", password_hash="")
+
+
+def is_warm_up_event(event: Any) -> bool:
+    """
+    Scheduled EventBridge pings and events carrying {"warm_up": true} warm the container up instead of
+    reaching the app
+    """
+    if not isinstance(event, dict):
+        return False
+    scheduled = event.get("source") == "aws.events" and event.get("detail-type") == "Scheduled Event"
+    return scheduled or bool(event.get(WARM_UP_EVENT_KEY))
+
+
+def _run_async(coroutine) -> Any:
+    # same loop Mangum serves requests on, so nothing built here is tied to a closed loop
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+    return loop.run_until_complete(coroutine)
+
+
+def _touch_models() -> None:
+    """
+    Validate and serialize the hot request and response models once
+    """
+    user_response = UserResponse(**_SAMPLE_USER.model_dump(include={"id", "name", "email", "apps"}))
+    response = LoginResponse(user=user_response, access_token="warm-up", refresh_token="warm-up")
+    LoginResponse.model_validate_json(response.model_dump_json())
+    User.model_validate(_SAMPLE_USER.model_dump())
+
+
+async def _touch_tokens() -> None:
+    """
+    Prepare the signing key and run the access token path once
+    """
+    token_service = factory.get_token_service()
+    await token_service.verify_access_token(await token_service.generate_access_token(_SAMPLE_USER))
+
+
+async def _open_connections() -> None:
+    await factory.get_user_repository().warm_up()
+
+
+def warm_up(request: Callable[[], Any] | None = None) -> dict:
+    """
+    Build services, open connections and run every hot path once.
+    Failing steps are reported, never raised, so a broken dependency cannot keep the container from starting.
+    :param request: Serves one synthetic request through the whole app, to warm up routing and middleware.
+    :return: Duration of every step and of the whole warm-up in milliseconds, with the error of failed steps.
+    """
+    steps: list[tuple[str, Callable[[], Any]]] = [
+        ("services", factory.warm_up),
+        ("models", _touch_models),
+        ("tokens", lambda: _run_async(_touch_tokens())),
+        ("connections", lambda: _run_async(_open_connections())),
+    ]
+    if request is not None:
+        steps.append(("request", request))
+
+    report: dict[str, Any] = {"warmed": True, "steps": {}, "errors": {}}
+    start = time.perf_counter()
+    for name, step in steps:
+        step_start = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            report["warmed"] = False
+            report["errors"][name] = f"{type(exc).__name__}: {exc}"
+        report["steps"][name] = round((time.perf_counter() - step_start) * 1000, 3)
+    report["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+
+    LOGGER.info("Warm-up finished in %.1f ms: %s", report["duration_ms"], report)
+    return report
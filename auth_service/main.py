@@ -9,6 +9,11 @@ from fastapi.responses import JSONResponse
 from errorhub.exceptions import ErrorHubException
 from auth_service.apis.user_apis import router as user_router
 from auth_service.apis.auth_apis import router as auth_router
+from auth_service.apis.metrics_apis import router as metrics_router
+from auth_service.configuration import settings
+from auth_service.logic.warm_up import is_warm_up_event, warm_up
+from auth_service.middleware.metrics_middleware import MetricsMiddleware
+from auth_service.middleware.profiling_middleware import ProfilingMiddleware
 
 from mangum import Mangum
 
@@ -24,11 +29,41 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 app.include_router(user_router)
 app.include_router(auth_router)
+app.include_router(metrics_router)
 
-mangum_handler = Mangum(app)
+asgi_handler = Mangum(app)
+
+# rejected by the auth dependency, so it runs routing, token decoding and the error handler without any data
+WARM_UP_REQUEST = {
+    "version": "2.0",
+    "routeKey": "GET /users/{user_id}",
+    "rawPath": "/users/warm-up",
+    "rawQueryString": "",
+    "headers": {"authorization": "Bearer warm-up"},
+    "requestContext": {"http": {"method": "GET", "path": "/users/warm-up", "sourceIp": "127.0.0.1"}},
+    "isBase64Encoded": False,
+}
+
+
+def mangum_handler(event, context):
+    """
+    Lambda entry point. Scheduled warm-up pings are answered with a warm-up report instead of reaching the app.
+    """
+    if is_warm_up_event(event):
+        return warm_up_container()
+    return asgi_handler(event, context)
+
+
+def warm_up_container() -> dict:
+    """
+    Warm up services, connections and one full request through the app
+    """
+    return warm_up(request=lambda: asgi_handler(WARM_UP_REQUEST, {}))
 
 
 # Global Exception Handler
@@ -40,3 +75,7 @@ async def errorhub_exception_handler(request: Request, exc: ErrorHubException):
     positional argument and the exception as the second.
     """
     return JSONResponse(status_code=exc.error_detail.code, content=exc.to_dict())
+
+
+if settings.is_warm_up_on_init_enabled():
+    warm_up_container()
@@ -1,46 +1,23 @@
 from fastapi import Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
+from auth_service.logic.factory import factory
 from auth_service.logic.services.jwt_token_service import JWTTokenService
 from auth_service.configuration import settings
 from errorhub.exceptions import (
     UnauthorizedException,
     BadRequestException,
-    InternalServerErrorException,
 )
 from errorhub.models import ErrorSeverity
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
-_token_service: JWTTokenService | None = None
-
 
 def _get_token_service() -> JWTTokenService:
     """
-    Lazily create and cache JWTTokenService.
+    Token service shared with the rest of the container's object graph.
     """
-    global _token_service
-
-    if _token_service is None:
-        secret_key = settings.get_jwt_secret()
-        if not secret_key:
-            raise InternalServerErrorException(
-                service="Auth Service",
-                message="JWT secret is not configured",
-                severity=ErrorSeverity.HIGH,
-                environment=settings.get_environment(),
-                context={
-                    "detail": "The JWT secret key is missing in the configuration.",
-                },
-            )
-
-        _token_service = JWTTokenService(
-            secret_key=secret_key,
-            access_token_expiry_minutes=15,
-            refresh_token_expiry_days=7,
-        )
-
-    return _token_service
+    return factory.get_token_service()
 
 
 async def get_current_user(
@@ -0,0 +1,60 @@
+"""
+ASGI middleware recording per-stage latencies of every request under its route.
+"""
+
+import time
+
+from auth_service.configuration import settings
+from auth_service.utils import metrics
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope: dict) -> str:
+    """
+    Path template of the route that served the request, so /users/{user_id} is one label and not one per user
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path if path else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Collects the stages timed while a request is served, adds them to the route's histograms,
+    and optionally reports them in a Server-Timing header and a CloudWatch embedded metric line.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.is_metrics_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        server_timing = settings.is_server_timing_enabled()
+        status = None
+        token = metrics.start_request()
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if server_timing:
+                    # the body is not sent yet, so this covers everything up to the response
+                    stages = metrics.current_stages() + [("request", time.perf_counter() - start)]
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", metrics.server_timing(stages).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.record("request", time.perf_counter() - start)
+            route = route_template(scope)
+            stages = metrics.finish_request(token, route)
+            if settings.is_metrics_emf_enabled():
+                metrics.emit_emf(route, stages, settings.get_metrics_namespace(), status)
@@ -0,0 +1,245 @@
+"""
+ASGI middleware profiling single requests on demand, to see where a slow route spends its time.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+
+from auth_service.configuration import settings
+
+LOGGER = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-debug-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+REQUEST_ID_HEADER = b"x-request-id"
+
+_UNSAFE_ID_CHARACTERS = re.compile(r"[^A-Za-z0-9_-]")
+
+# headers signed to expire further ahead are refused, so a leaked one stops working within the hour
+MAX_HEADER_TTL_SECONDS = 3600
+
+
+def sign_profile_request(secret: str, expires: int) -> str:
+    """
+    X-Debug-Profile header value asking for profiles until the given unix time
+    """
+    signature = hmac.new(secret.encode("utf-8"), str(expires).encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_profile_header(
+    value: str, secret: str | None, now: float | None = None, max_ttl_seconds: float = MAX_HEADER_TTL_SECONDS
+) -> bool:
+    """
+    Whether the header was signed with the secret, has not expired and does not expire more than max_ttl_seconds ahead
+    """
+    if not secret:
+        return False
+    now = time.time() if now is None else now
+    expires = value.partition(".")[0]
+    if not expires.isdigit() or not now <= int(expires) <= now + max_ttl_seconds:
+        return False
+    return hmac.compare_digest(sign_profile_request(secret, int(expires)), value)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_qualname}"
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread at a fixed interval from a background thread.
+    On the event loop thread this includes whatever other requests run meanwhile.
+    """
+
+    def __init__(self, thread_id: int, interval_seconds: float, max_seconds: float) -> None:
+        self.thread_id = thread_id
+        self.interval_seconds = max(0.001, interval_seconds)
+        self.max_seconds = max_seconds
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stopped.wait(self.interval_seconds) and time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.thread_id)  # pylint: disable=protected-access
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+def collapse(stacks: Counter[str], max_bytes: int) -> str:
+    """
+    Stacks in the collapsed format read by flamegraph tools, most frequent first.
+    Stacks past the size limit are merged into one "[truncated]" stack so the sample total stays right.
+    """
+    lines, size, dropped = [], 0, 0
+    for stack, count in stacks.most_common():
+        line = f"{stack} {count}\n"
+        if dropped or size + len(line) > max_bytes:
+            dropped += count
+            continue
+        lines.append(line)
+        size += len(line)
+    if dropped:
+        lines.append(f"[truncated] {dropped}\n")
+    return "".join(lines)
+
+
+def pstats_report(profile: cProfile.Profile, max_bytes: int) -> str:
+    """
+    cProfile statistics sorted by cumulative time, cut at the size limit
+    """
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(200)
+    report = stream.getvalue()
+    if len(report) > max_bytes:
+        report = report[:max_bytes].rsplit("\n", 1)[0] + "\n[truncated]\n"
+    return report
+
+
+class ProfileBudget:
+    """
+    Allows one profile at a time and a fixed number per minute, so profiling never piles up in a busy container
+    """
+
+    def __init__(self, max_per_minute: int, clock=time.monotonic) -> None:
+        self.max_per_minute = max_per_minute
+        self._clock = clock
+        self._started: deque[float] = deque()
+        self._running = False
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self._lock:
+            now = self._clock()
+            while self._started and now - self._started[0] >= 60:
+                self._started.popleft()
+            if self._running or len(self._started) >= self.max_per_minute:
+                return False
+            self._started.append(now)
+            self._running = True
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._running = False
+
+
+def request_id(scope: dict) -> str:
+    """
+    X-Request-Id header, else the API Gateway request id, else a new id; safe to use as a file name
+    """
+    for name, value in scope.get("headers", []):
+        if name == REQUEST_ID_HEADER:
+            raw = value.decode("latin-1")
+            break
+    else:
+        raw = (scope.get("aws.event") or {}).get("requestContext", {}).get("requestId") or uuid.uuid4().hex
+    return _UNSAFE_ID_CHARACTERS.sub("_", raw)[:64] or uuid.uuid4().hex
+
+
+class ProfilingMiddleware:
+    """
+    Runs a request under a profiler when it carries a valid signed X-Debug-Profile header
+    or is picked by the sampling rate, and writes the profile to a file named after the request id.
+    """
+
+    def __init__(self, app, budget: ProfileBudget | None = None) -> None:
+        self.app = app
+        self.budget = budget or ProfileBudget(settings.get_profiling_max_per_minute())
+
+    @staticmethod
+    def _requested(scope: dict) -> str | None:
+        """
+        "header" for a request asking to be profiled, "sample" for one picked by the sampling rate, else None
+        """
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER:
+                valid = verify_profile_header(value.decode("latin-1"), settings.get_profiling_secret())
+                return "header" if valid else None
+        rate = settings.get_profiling_sample_rate()
+        return "sample" if rate > 0 and random.random() < rate else None
+
+    async def __call__(self, scope, receive, send):
+        reason = self._requested(scope) if scope["type"] == "http" else None
+        if reason is None or not self.budget.acquire():
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = request_id(scope)
+        # cProfile traces every request on the loop thread, only a request that asked for it pays that
+        output_format = settings.get_profiling_format() if reason == "header" else "collapsed"
+        max_bytes = settings.get_profiling_max_output_bytes()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = [*message.get("headers", []), (PROFILE_ID_HEADER, profile_id.encode("latin-1"))]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if output_format == "pstats":
+                profile = cProfile.Profile()
+                profile.enable()
+                try:
+                    await self.app(scope, receive, send_with_id)
+                finally:
+                    profile.disable()
+                self._write(profile_id, "pstats.txt", pstats_report(profile, max_bytes))
+            else:
+                sampler = StackSampler(
+                    threading.get_ident(),
+                    settings.get_profiling_interval_ms() / 1000,
+                    settings.get_profiling_max_seconds(),
+                )
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send_with_id)
+                finally:
+                    stacks = sampler.stop()
+                self._write(profile_id, "collapsed", collapse(stacks, max_bytes))
+        finally:
+            self.budget.release()
+
+    @staticmethod
+    def _write(profile_id: str, extension: str, content: str) -> None:
+        """
+        Write the profile and remove the oldest ones past the file limit; failures never reach the request
+        """
+        directory = settings.get_profiling_output_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"{profile_id}.{extension}"), "w", encoding="utf-8") as f:
+                f.write(content)
+            paths = [os.path.join(directory, name) for name in os.listdir(directory)]
+            paths.sort(key=os.path.getmtime)
+            for path in paths[: max(0, len(paths) - settings.get_profiling_max_files())]:
+                os.remove(path)
+        except OSError:
+            LOGGER.warning("Could not write profile %s to %s", profile_id, directory, exc_info=True)
@@ -27,8 +27,17 @@ class UserRequest(BaseModelForbidExtra):
     app_name: str
 
 
+class BatchUserRequest(BaseModelForbidExtra):
+    user_ids: list[str] = Field(..., min_length=1, max_length=1000)
+
+
 class UserResponse(BaseModelForbidExtra):
     id: str
     name: str | None = None
     email: EmailStr
     apps: list[str]
+
+
+class BatchUserResponse(BaseModelForbidExtra):
+    users: list[UserResponse]
+    not_found: list[str]
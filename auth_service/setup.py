@@ -15,11 +15,12 @@ setup(
         "email_validator==2.2.0",
         "orjson==3.11.4",
         "PyJWT==2.10.1",
+        "cryptography==46.0.3",
         "google-auth==2.43.0",
         "mangum==0.19.0",
         "boto3==1.42.4",
     ],
-    extras_require={"dev": ["pylint"]},
+    extras_require={"dev": ["pylint"], "argon2": ["argon2-cffi==23.1.0"]},
     entry_points={
         "console_scripts": [],
     },
@@ -39,3 +39,14 @@ async def raise_exception_if_not_valid_user(user_id: str, token_data: dict, refr
                 "suggestion": "Please provide valid credentials.",
             },
         )
+
+
+def readable_user_ids(user_ids: list[str], token_data: dict) -> list[str]:
+    """Ids the token may read: all of them for subjects in USER_READ_ALL_SUBJECTS, otherwise only its own."""
+
+    if token_data.get("type") != "access":
+        return []
+    subject = token_data.get("sub")
+    if subject in settings.get_user_read_all_subjects():
+        return user_ids
+    return [user_id for user_id in user_ids if user_id == subject]
@@ -0,0 +1,229 @@
+"""
+Latency histograms per stage and route, exported for Prometheus, CloudWatch embedded metrics and Server-Timing.
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# seconds, from a cache hit to a slow bcrypt round behind a queue
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+NO_ROUTE = "none"
+
+# stage durations of the request being served, collected by every timed call that runs on its behalf
+_request_stages: contextvars.ContextVar[list[tuple[str, float]] | None] = contextvars.ContextVar(
+    "request_stages", default=None
+)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts, sum and count of observed durations in seconds
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Stage duration histograms keyed by stage and route, shared by the whole process.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage_name: str, seconds: float, route: str = NO_ROUTE) -> None:
+        with self._lock:
+            histogram = self._histograms.get((stage_name, route))
+            if histogram is None:
+                histogram = self._histograms[(stage_name, route)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def snapshot(self) -> dict[tuple[str, str], dict]:
+        """
+        Copy of every histogram as {"buckets", "counts", "sum", "count"}
+        """
+        with self._lock:
+            return {
+                key: {"buckets": h.buckets, "counts": list(h.counts), "sum": h.sum, "count": h.count}
+                for key, h in self._histograms.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self, name: str = "auth_service_stage_duration_seconds") -> str:
+        """
+        Histograms in the Prometheus text exposition format
+        """
+        lines = [
+            f"# HELP {name} Time spent per stage of a request.",
+            f"# TYPE {name} histogram",
+        ]
+        for (stage_name, route), histogram in sorted(self.snapshot().items()):
+            labels = f'stage="{_escape(stage_name)}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip((*histogram["buckets"], float("inf")), histogram["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram['sum']!r}")
+            lines.append(f"{name}_count{{{labels}}} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+
+def record(stage_name: str, seconds: float) -> None:
+    """
+    Attribute a duration to the current request, or record it right away outside of requests
+    """
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((stage_name, seconds))
+    else:
+        registry.observe(stage_name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block of code as one stage
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """
+    Time every call of a function or coroutine function as one stage
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(name, time.perf_counter() - start)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def start_request() -> contextvars.Token:
+    """
+    Start collecting stage durations for the request served in the current context
+    """
+    return _request_stages.set([])
+
+
+def finish_request(token: contextvars.Token, route: str) -> list[tuple[str, float]]:
+    """
+    Record the request's stages under its route and stop collecting them
+    """
+    stages = _request_stages.get() or []
+    _request_stages.reset(token)
+    for name, seconds in stages:
+        registry.observe(name, seconds, route)
+    return stages
+
+
+def current_stages() -> list[tuple[str, float]]:
+    """
+    Stages recorded so far for the current request
+    """
+    return list(_request_stages.get() or [])
+
+
+def totals_ms(stages: list[tuple[str, float]]) -> dict[str, float]:
+    """
+    Milliseconds per stage name, summed over repeated calls
+    """
+    totals: dict[str, float] = {}
+    for name, seconds in stages:
+        totals[name] = totals.get(name, 0.0) + seconds * 1000
+    return totals
+
+
+def server_timing(stages: list[tuple[str, float]]) -> str:
+    """
+    Server-Timing header value, one metric per stage
+    """
+    return ", ".join(f"{name};dur={ms:.2f}" for name, ms in totals_ms(stages).items())
+
+
+def emit_emf(route: str, stages: list[tuple[str, float]], namespace: str, status: int | None = None) -> None:
+    """
+    Write the request's stages as one CloudWatch embedded metric format line on stdout.
+    Lambda's log handler would prefix the line, which CloudWatch does not parse, so it bypasses logging.
+    """
+    values: dict[str, list[float]] = {}
+    for name, seconds in stages:
+        values.setdefault(name, []).append(round(seconds * 1000, 3))
+    if not values:
+        return
+    document: dict[str, Any] = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": namespace,
+                    "Dimensions": [["route"]],
+                    "Metrics": [{"Name": name, "Unit": "Milliseconds"} for name in values],
+                }
+            ],
+        },
+        "route": route,
+        **values,
+    }
+    if status is not None:
+        document["status"] = status
+    sys.stdout.write(json.dumps(document, separators=(",", ":")) + "\n")
+    sys.stdout.flush()
@@ -2,18 +2,144 @@
 Helper functions to manage password hashing and verification.
 """
 
-import bcrypt
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
 
+from errorhub.exceptions import ServiceUnavailableException
+from errorhub.models import ErrorSeverity
 
-async def hash_password(password: str) -> str:
+from auth_service.configuration import settings
+from auth_service.utils.metrics import timed
+from auth_service.utils.password_hashers import HASHERS, PasswordHasher, get_hasher, identify
+
+
+def _hashpw(hasher: PasswordHasher, password: str) -> str:
+    """
+    hashing with the given hasher, kept at module level so it can be pickled for process pools
+    """
+    return hasher.hash(password)
+
+
+def _checkpw(password: str, hashed_password: str) -> bool:
+    """
+    verification with the scheme that made the hash, kept at module level so it can be pickled for process pools
+    """
+    try:
+        scheme = identify(hashed_password)
+    except ValueError:
+        # no password to match, e.g. the empty hash of users who signed up with Google
+        return False
+    return HASHERS[scheme]().verify(password, hashed_password)
+
+
+class HashingExecutor:
+    """
+    Bounded worker pool that runs password hashing off the event loop.
+    bcrypt, scrypt and argon2 release the GIL while hashing, so a thread pool already scales with cores.
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, kind: str = "thread") -> None:
+        """
+        :param max_workers: Number of hashes computed in parallel.
+        :param max_queue_size: Number of jobs allowed to wait for a free worker before rejecting new ones.
+        :param kind: "thread" or "process".
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unsupported hashing executor: {kind}")
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(0, max_queue_size)
+        self.kind = kind
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue_size)
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        """
+        Lazily create the underlying pool so importing this module stays cheap
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="password-hash"
+                        )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run func in the pool, rejecting the call when the queue is already full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ServiceUnavailableException(
+                service="Auth Service",
+                message="Too many password operations in progress",
+                severity=ErrorSeverity.MEDIUM,
+                environment=settings.get_environment(),
+                context={
+                    "detail": "The password hashing queue is full.",
+                    "suggestion": "Please retry after a moment",
+                },
+            )
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # the slot is held until the worker is done, even if the awaiting request is cancelled
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the underlying pool
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+_hashing_executor: HashingExecutor | None = None
+_hashing_executor_lock = threading.Lock()
+
+
+def get_hashing_executor() -> HashingExecutor:
+    """
+    Lazily create and cache the hashing executor configured in settings.
+    """
+    global _hashing_executor
+
+    if _hashing_executor is None:
+        with _hashing_executor_lock:
+            if _hashing_executor is None:
+                _hashing_executor = HashingExecutor(
+                    max_workers=settings.get_password_hash_workers(),
+                    max_queue_size=settings.get_password_hash_queue_size(),
+                    kind=settings.get_password_hash_executor(),
+                )
+    return _hashing_executor
+
+
+@timed("password.hash")
+async def hash_password(
+    password: str, executor: HashingExecutor | None = None, hasher: PasswordHasher | None = None
+) -> str:
     """
-    util to hash the password
+    util to hash the password, with the configured scheme unless a hasher is given
     """
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    executor = executor or get_hashing_executor()
+    return await executor.run(_hashpw, hasher or get_hasher(), password)
 
 
-async def verify_password(plain_password: str, hashed_password: str) -> bool:
+@timed("password.verify")
+async def verify_password(plain_password: str, hashed_password: str, executor: HashingExecutor | None = None) -> bool:
     """
-    util to verify the password
+    util to verify the password, with whichever scheme and cost parameters the hash was made
     """
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    executor = executor or get_hashing_executor()
+    return await executor.run(_checkpw, plain_password, hashed_password)
@@ -0,0 +1,333 @@
+"""
+Password hashing schemes, told apart by the prefix of the stored hash, and calibration of their cost parameters.
+
+Calibrate on the hardware that serves logins with:
+python -m auth_service.utils.password_hashers --scheme bcrypt --target-ms 250
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import statistics
+import time
+from abc import ABC, abstractmethod
+
+import bcrypt
+
+from auth_service.configuration import settings
+
+
+class PasswordHasher(ABC):
+    """
+    One hashing scheme with its cost parameters.
+    Instances only hold plain values so they can be pickled for process pools.
+    """
+
+    scheme: str = ""
+
+    @classmethod
+    @abstractmethod
+    def identifies(cls, hashed: str) -> bool:
+        """
+        whether the stored hash was made by this scheme
+        """
+
+    @classmethod
+    @abstractmethod
+    def from_settings(cls) -> "PasswordHasher":
+        """
+        hasher with the cost parameters configured for this deployment
+        """
+
+    @abstractmethod
+    def hash(self, password: str) -> str:
+        """
+        hash the password with a new salt
+        """
+
+    @abstractmethod
+    def verify(self, password: str, hashed: str) -> bool:
+        """
+        check the password against a hash of this scheme, whatever its cost parameters
+        """
+
+    @abstractmethod
+    def needs_update(self, hashed: str) -> bool:
+        """
+        whether a hash of this scheme was made with other cost parameters than this hasher's
+        """
+
+    @abstractmethod
+    def stronger(self) -> "PasswordHasher":
+        """
+        the same scheme one calibration step more expensive
+        """
+
+    @abstractmethod
+    def parameters(self) -> dict[str, str]:
+        """
+        cost parameters as the environment variables that configure them
+        """
+
+
+class BcryptHasher(PasswordHasher):
+    """
+    bcrypt, its cost is log2 of the number of key expansion rounds
+    """
+
+    scheme = "bcrypt"
+
+    def __init__(self, rounds: int = 12) -> None:
+        if not 4 <= rounds <= 31:
+            raise ValueError(f"bcrypt rounds must be between 4 and 31, got {rounds}")
+        self.rounds = rounds
+
+    @classmethod
+    def identifies(cls, hashed: str) -> bool:
+        return hashed.startswith(("$2a$", "$2b$", "$2y$"))
+
+    @classmethod
+    def from_settings(cls) -> "BcryptHasher":
+        return cls(settings.get_password_bcrypt_rounds())
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(self.rounds)).decode("utf-8")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_update(self, hashed: str) -> bool:
+        # $2b$12$<salt and checksum>
+        return hashed.split("$")[2] != f"{self.rounds:02d}"
+
+    def stronger(self) -> "BcryptHasher":
+        return BcryptHasher(self.rounds + 1)
+
+    def parameters(self) -> dict[str, str]:
+        return {"PASSWORD_BCRYPT_ROUNDS": str(self.rounds)}
+
+
+class ScryptHasher(PasswordHasher):
+    """
+    scrypt from the standard library, stored as $scrypt$ln=<log2 n>,r=<r>,p=<p>$<salt>$<key>
+    """
+
+    scheme = "scrypt"
+    PREFIX = "$scrypt$"
+    KEY_LENGTH = 32
+
+    def __init__(self, ln: int = 15, r: int = 8, p: int = 1) -> None:
+        if ln < 1 or r < 1 or p < 1:
+            raise ValueError(f"scrypt parameters must be positive, got ln={ln} r={r} p={p}")
+        self.ln = ln
+        self.r = r
+        self.p = p
+
+    @classmethod
+    def identifies(cls, hashed: str) -> bool:
+        return hashed.startswith(cls.PREFIX)
+
+    @classmethod
+    def from_settings(cls) -> "ScryptHasher":
+        return cls(
+            settings.get_password_scrypt_ln(), settings.get_password_scrypt_r(), settings.get_password_scrypt_p()
+        )
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, ln: int, r: int, p: int) -> bytes:
+        n = 1 << ln
+        # OpenSSL refuses to use more memory than maxmem, which defaults to 32 MiB
+        return hashlib.scrypt(
+            password.encode("utf-8"),
+            salt=salt,
+            n=n,
+            r=r,
+            p=p,
+            maxmem=129 * r * (n + p) + (1 << 20),
+            dklen=ScryptHasher.KEY_LENGTH,
+        )
+
+    @staticmethod
+    def _b64(raw: bytes) -> str:
+        return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def _unb64(text: str) -> bytes:
+        return base64.b64decode(text + "=" * (-len(text) % 4))
+
+    @classmethod
+    def _parse(cls, hashed: str) -> tuple[dict[str, int], bytes, bytes]:
+        params, salt, key = hashed[len(cls.PREFIX) :].split("$")
+        values = {name: int(value) for name, value in (part.split("=") for part in params.split(","))}
+        return values, cls._unb64(salt), cls._unb64(key)
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(16)
+        key = self._derive(password, salt, self.ln, self.r, self.p)
+        return f"{self.PREFIX}ln={self.ln},r={self.r},p={self.p}${self._b64(salt)}${self._b64(key)}"
+
+    def verify(self, password: str, hashed: str) -> bool:
+        params, salt, key = self._parse(hashed)
+        return hmac.compare_digest(self._derive(password, salt, params["ln"], params["r"], params["p"]), key)
+
+    def needs_update(self, hashed: str) -> bool:
+        return self._parse(hashed)[0] != {"ln": self.ln, "r": self.r, "p": self.p}
+
+    def stronger(self) -> "ScryptHasher":
+        return ScryptHasher(self.ln + 1, self.r, self.p)
+
+    def parameters(self) -> dict[str, str]:
+        return {"PASSWORD_SCRYPT_LN": str(self.ln), "PASSWORD_SCRYPT_R": str(self.r), "PASSWORD_SCRYPT_P": str(self.p)}
+
+
+class Argon2idHasher(PasswordHasher):
+    """
+    argon2id through the optional argon2-cffi package, install it to hash or verify with this scheme
+    """
+
+    scheme = "argon2id"
+
+    def __init__(self, time_cost: int = 3, memory_kib: int = 65536, parallelism: int = 4) -> None:
+        self.time_cost = time_cost
+        self.memory_kib = memory_kib
+        self.parallelism = parallelism
+
+    @classmethod
+    def identifies(cls, hashed: str) -> bool:
+        return hashed.startswith("$argon2id$")
+
+    @classmethod
+    def from_settings(cls) -> "Argon2idHasher":
+        return cls(
+            settings.get_password_argon2_time_cost(),
+            settings.get_password_argon2_memory_kib(),
+            settings.get_password_argon2_parallelism(),
+        )
+
+    def _hasher(self):
+        try:
+            import argon2  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise RuntimeError("argon2id password hashing needs the argon2-cffi package") from exc
+        return argon2.PasswordHasher(
+            time_cost=self.time_cost, memory_cost=self.memory_kib, parallelism=self.parallelism
+        )
+
+    def hash(self, password: str) -> str:
+        return self._hasher().hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        hasher = self._hasher()
+        from argon2.exceptions import VerifyMismatchError  # pylint: disable=import-outside-toplevel
+
+        try:
+            return hasher.verify(hashed, password)
+        except VerifyMismatchError:
+            return False
+
+    def needs_update(self, hashed: str) -> bool:
+        return self._hasher().check_needs_rehash(hashed)
+
+    def stronger(self) -> "Argon2idHasher":
+        return Argon2idHasher(self.time_cost + 1, self.memory_kib, self.parallelism)
+
+    def parameters(self) -> dict[str, str]:
+        return {
+            "PASSWORD_ARGON2_TIME_COST": str(self.time_cost),
+            "PASSWORD_ARGON2_MEMORY_KIB": str(self.memory_kib),
+            "PASSWORD_ARGON2_PARALLELISM": str(self.parallelism),
+        }
+
+
+# every scheme stored hashes may use, by the name PASSWORD_HASH_SCHEME selects them with
+HASHERS: dict[str, type[PasswordHasher]] = {
+    BcryptHasher.scheme: BcryptHasher,
+    ScryptHasher.scheme: ScryptHasher,
+    Argon2idHasher.scheme: Argon2idHasher,
+}
+
+
+def get_hasher(scheme: str | None = None) -> PasswordHasher:
+    """
+    Hasher of the given scheme, or of the configured one, with the configured cost parameters
+    """
+    scheme = scheme or settings.get_password_hash_scheme()
+    if scheme not in HASHERS:
+        raise ValueError(f"Unsupported password hash scheme: {scheme}, expected one of {sorted(HASHERS)}")
+    return HASHERS[scheme].from_settings()
+
+
+def identify(hashed: str) -> str:
+    """
+    Scheme that made a stored hash
+    """
+    for scheme, hasher_class in HASHERS.items():
+        if hasher_class.identifies(hashed):
+            return scheme
+    raise ValueError("Unknown password hash scheme")
+
+
+def needs_rehash(hashed: str, hasher: PasswordHasher | None = None) -> bool:
+    """
+    Whether a stored hash was made with another scheme or other cost parameters than the configured ones
+    """
+    hasher = hasher or get_hasher()
+    return identify(hashed) != hasher.scheme or hasher.needs_update(hashed)
+
+
+def verify_time_ms(hasher: PasswordHasher, samples: int = 3) -> float:
+    """
+    Median time of one verification with the hasher on this machine
+    """
+    hashed = hasher.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(hasher: PasswordHasher, target_ms: float, max_steps: int = 32) -> tuple[PasswordHasher, float]:
+    """
+    Strengthen the hasher step by step and return the strongest one that still verifies within target_ms,
+    with its verification time. The starting hasher is returned when even it is slower than the target.
+    """
+    best, best_ms = hasher, verify_time_ms(hasher)
+    candidate = hasher
+    for _ in range(max_steps):
+        try:
+            candidate = candidate.stronger()
+        except ValueError:
+            break
+        elapsed_ms = verify_time_ms(candidate)
+        if elapsed_ms > target_ms:
+            break
+        best, best_ms = candidate, elapsed_ms
+    return best, best_ms
+
+
+_CALIBRATION_START = {
+    "bcrypt": lambda: BcryptHasher(4),
+    "scrypt": lambda: ScryptHasher(10, 8, 1),
+    "argon2id": lambda: Argon2idHasher(1, settings.get_password_argon2_memory_kib(), os.cpu_count() or 1),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pick password hashing parameters for a target verify latency")
+    parser.add_argument("--scheme", choices=sorted(HASHERS), default=settings.get_password_hash_scheme())
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    hasher, elapsed_ms = calibrate(_CALIBRATION_START[args.scheme](), args.target_ms)
+    print(f"# verify takes {elapsed_ms:.1f} ms on this machine, target {args.target_ms:.0f} ms")
+    print(f"PASSWORD_HASH_SCHEME={hasher.scheme}")
+    for name, value in hasher.parameters().items():
+        print(f"{name}={value}")
+
+
+if __name__ == "__main__":
+    main()
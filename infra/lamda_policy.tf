@@ -10,6 +10,11 @@ resource "aws_iam_policy" "lambda_dynamodb_policy" {
         Effect = "Allow"
         Action = [
           "dynamodb:*Item",
+          # registration and email changes write the user and its EMAIL# item in one transaction
+          "dynamodb:TransactWriteItems",
+          "dynamodb:ConditionCheckItem",
+          # POST /users/batch reads many users at once
+          "dynamodb:BatchGetItem",
         ]
         Resource = "arn:aws:dynamodb:${var.region}:*:table/${var.service_name}-*"
       },
@@ -0,0 +1,96 @@
+"""
+Tests for GET /auth/me answered from the access token claims.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.configuration import settings
+from auth_service.logic.factory import factory
+from auth_service.main import mangum_handler
+from load_generator import Session, login_request, me_request, register_request
+
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setitem(settings._config, "userRepository", "sqlite")
+    monkeypatch.setitem(settings._config, "userSqlitePath", str(tmp_path / "users.sqlite3"))
+    monkeypatch.setitem(settings._config, "meResponseMode", "claims")
+    monkeypatch.setattr(settings, "_jwt_secret_key", "me-secret")
+    factory.reset()
+    yield
+    factory.get_user_repository().close()
+    factory.reset()
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """
+    Count user reads by id, the only repository call /auth/me makes
+    """
+    repository = factory.get_user_repository()
+    get_user_by_id = repository.get_user_by_id
+    calls = []
+
+    async def counting(user_id):
+        calls.append(user_id)
+        return await get_user_by_id(user_id)
+
+    monkeypatch.setattr(repository, "get_user_by_id", counting)
+    return calls
+
+
+def _sign_up(email: str) -> dict:
+    session = Session(email=email)
+    assert mangum_handler(register_request(session).to_event(), {})["statusCode"] == 201
+    return json.loads(mangum_handler(login_request(session).to_event(), {})["body"])
+
+
+def _me(access_token: str, **headers) -> dict:
+    event = me_request(Session(email="", access_token=access_token)).to_event()
+    event["headers"].update(headers)
+    response = mangum_handler(event, {})
+    assert response["statusCode"] == 200, response
+    return json.loads(response["body"])
+
+
+def test_me_is_answered_from_the_claims(reads):
+    login = _sign_up("claims@example.com")
+
+    assert _me(login["access_token"]) == login["user"]
+    assert not reads
+
+
+def test_freshness_header_reads_the_repository(reads, event_loop_per_test):
+    login = _sign_up("fresh@example.com")
+    user_id = login["user"]["id"]
+    event_loop_per_test.run_until_complete(factory.get_user_repository().patch_user(user_id, {"name": "renamed"}))
+
+    assert _me(login["access_token"])["name"] == "load"
+    assert _me(login["access_token"], **{"cache-control": "no-cache"})["name"] == "renamed"
+    assert reads == [user_id]
+
+
+def test_tokens_without_a_name_claim_read_the_repository(reads, event_loop_per_test):
+    login = _sign_up("old-token@example.com")
+    token_service = factory.get_token_service()
+    claims = event_loop_per_test.run_until_complete(token_service.verify_access_token(login["access_token"]))
+    del claims["name"]
+    old_token = token_service._encode(claims)
+
+    assert _me(old_token) == login["user"]
+    assert reads == [login["user"]["id"]]
+
+
+def test_repository_mode_always_reads(reads, monkeypatch):
+    monkeypatch.setitem(settings._config, "meResponseMode", "repository")
+    login = _sign_up("repository@example.com")
+
+    assert _me(login["access_token"]) == login["user"]
+    assert reads == [login["user"]["id"]]
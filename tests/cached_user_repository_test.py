@@ -0,0 +1,105 @@
+"""
+Tests for the read-through CachedUserRepository.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.logic.interfaces.iuser_respository import IUserRepository
+from auth_service.logic.repository.cached_user_repository import CachedUserRepository
+from auth_service.models.users import User
+
+
+class CountingRepository(IUserRepository):
+    """
+    In-memory repository counting how often it is read.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.reads = 0
+
+    async def create_user(self, user):
+        self.users[user.id] = user.model_copy()
+        return user
+
+    async def get_user_by_email(self, email):
+        self.reads += 1
+        return next((u.model_copy() for u in self.users.values() if u.email == email), None)
+
+    async def get_user_by_id(self, user_id):
+        self.reads += 1
+        user = self.users.get(user_id)
+        return user.model_copy() if user else None
+
+    async def get_users_by_ids(self, user_ids):
+        self.reads += 1
+        return [self.users[i].model_copy() for i in user_ids if i in self.users]
+
+    async def update_user(self, user):
+        self.users[user.id] = user.model_copy()
+        return user
+
+    async def delete_user(self, user_id):
+        return self.users.pop(user_id)
+
+
+def test_repeat_lookups_are_served_from_memory():
+    backend = CountingRepository()
+    repo = CachedUserRepository(backend, max_size=10, ttl_seconds=60)
+
+    async def run():
+        await repo.create_user(User(id="1", name="one", email="one@example.com", password_hash="x"))
+        await repo.get_user_by_id("1")
+        await repo.get_user_by_id("1")
+        await repo.get_user_by_email("one@example.com")
+        return await repo.get_users_by_ids(["1"])
+
+    users = asyncio.run(run())
+    assert [u.id for u in users] == ["1"]
+    assert backend.reads == 1
+    assert repo.stats()["users"]["hits"] == 3
+
+
+def test_writes_invalidate_cached_entries():
+    backend = CountingRepository()
+    repo = CachedUserRepository(backend, max_size=10, ttl_seconds=60)
+
+    async def run():
+        await repo.create_user(User(id="1", name="one", email="one@example.com", password_hash="x"))
+        user = await repo.get_user_by_id("1")
+        user.name = "changed"
+        # mutating a returned user must not leak into the cache
+        assert (await repo.get_user_by_id("1")).name == "one"
+        await repo.update_user(user)
+        renamed = await repo.get_user_by_email("one@example.com")
+        await repo.delete_user("1")
+        return renamed, await repo.get_user_by_id("1")
+
+    renamed, deleted = asyncio.run(run())
+    assert renamed.name == "changed"
+    assert deleted is None
+
+
+def test_lru_evicts_and_ttl_expires():
+    now = [0.0]
+    backend = CountingRepository()
+    repo = CachedUserRepository(backend, max_size=2, ttl_seconds=10)
+    repo._users._clock = lambda: now[0]  # pylint: disable=protected-access
+
+    async def run():
+        for i in range(3):
+            await repo.create_user(User(id=str(i), email=f"user{i}@example.com", password_hash="x"))
+            await repo.get_user_by_id(str(i))
+        now[0] = 11.0
+        await repo.get_user_by_id("2")
+
+    asyncio.run(run())
+    stats = repo.stats()["users"]
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert backend.reads == 4
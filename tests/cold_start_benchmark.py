@@ -0,0 +1,126 @@
+"""
+Measure the cold start of the Lambda handler: import time and RSS growth of each heavy module in a fresh
+interpreter, the slowest auth_service imports, and the time from import to the first response.
+
+Run with: python tests/cold_start_benchmark.py [cold_starts]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "pydantic",
+    "fastapi",
+    "mangum",
+    "jwt",
+    "bcrypt",
+    "boto3",
+    "google.oauth2.id_token",
+    "google.auth.transport.requests",
+    "auth_service.logic.factory",
+    "auth_service.main",
+]
+
+MODULE_PROBE = """
+import json, sys, time
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+
+before = rss_kb()
+start = time.perf_counter()
+__import__(sys.argv[1])
+print(json.dumps({"ms": (time.perf_counter() - start) * 1000, "rss_kb": rss_kb() - before}))
+"""
+
+FIRST_RESPONSE_PROBE = """
+import json, sys, time
+
+start = time.perf_counter()
+from auth_service.main import mangum_handler
+imported = time.perf_counter()
+event = {
+    "version": "2.0",
+    "routeKey": "GET /users/{user_id}",
+    "rawPath": "/users/cold-start",
+    "rawQueryString": "",
+    "headers": {"authorization": "Bearer not-a-token"},
+    "requestContext": {"http": {"method": "GET", "path": "/users/cold-start", "sourceIp": "127.0.0.1"}},
+    "isBase64Encoded": False,
+}
+response = mangum_handler(event, {})
+done = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (done - start) * 1000,
+    "status": response["statusCode"],
+    "loaded": [m for m in ("boto3", "google.auth", "google.oauth2", "requests") if m in sys.modules],
+}))
+"""
+
+
+def _env() -> dict:
+    return {**os.environ, "PYTHONPATH": ROOT, "JWT_SECRET_KEY": os.getenv("JWT_SECRET_KEY", "cold-start")}
+
+
+def run_probe(probe: str, *args: str, python_args: tuple = ()) -> subprocess.CompletedProcess:
+    """
+    Run a probe in a fresh interpreter, so nothing is imported yet
+    """
+    return subprocess.run(
+        [sys.executable, *python_args, "-c", probe, *args],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure_first_response() -> dict:
+    """
+    Import the handler and serve one request in a fresh interpreter
+    """
+    return json.loads(run_probe(FIRST_RESPONSE_PROBE).stdout)
+
+
+def slowest_imports(top: int = 10) -> list[tuple[int, str]]:
+    """
+    auth_service modules with the largest cumulative import time, from python -X importtime
+    """
+    stderr = run_probe("import auth_service.main", python_args=("-X", "importtime")).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "auth_service" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(cold_starts: int) -> None:
+    print(f"{'module':<36} {'import ms':>10} {'rss MiB':>8}")
+    for module in MODULES:
+        result = json.loads(run_probe(MODULE_PROBE, module).stdout)
+        print(f"{module:<36} {result['ms']:10.1f} {result['rss_kb'] / 1024:8.1f}")
+
+    print("\nslowest auth_service imports (cumulative us)")
+    for cumulative, name in slowest_imports():
+        print(f"  {cumulative:>8} {name}")
+
+    runs = sorted((measure_first_response() for _ in range(cold_starts)), key=lambda r: r["first_response_ms"])
+    median = runs[len(runs) // 2]
+    print(
+        f"\ncold starts={cold_starts} import median={median['import_ms']:.1f} ms "
+        f"first response median={median['first_response_ms']:.1f} ms max={runs[-1]['first_response_ms']:.1f} ms "
+        f"status={median['status']} deferred modules loaded={median['loaded']}"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
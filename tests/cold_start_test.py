@@ -0,0 +1,23 @@
+"""
+Cold start regression test for the Lambda handler, run in a fresh interpreter.
+"""
+
+import os
+import sys
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from cold_start_benchmark import measure_first_response
+
+# generous enough for a loaded CI runner, tighten it locally to catch smaller regressions
+BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "3000"))
+
+
+def test_first_response_within_budget():
+    result = measure_first_response()
+
+    assert result["status"] == 401
+    assert result["first_response_ms"] <= BUDGET_MS, result
+    # provider libraries stay unloaded until a request needs them
+    assert result["loaded"] == []
@@ -0,0 +1,19 @@
+"""
+Shared pytest fixtures.
+"""
+
+import asyncio
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def event_loop_per_test():
+    """
+    Give every test its own event loop.
+    asyncio.run() clears the current loop when it finishes, while Mangum still looks one up with get_event_loop().
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
@@ -0,0 +1,83 @@
+"""
+Benchmark serializing and deserializing user items with the compiled codec against the previous
+isinstance/if-chain functions of DynamoDBOperations.
+
+Run with: python tests/dynamo_codec_benchmark.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.aws_proxy.dynamoDb.codec import decode_value, encode_value
+from auth_service.logic.repository.dynamo_user_repository import USER_CODEC
+
+
+def legacy_serialize_value(value):
+    if isinstance(value, str):
+        return {"S": value}
+    elif isinstance(value, bool):
+        return {"BOOL": value}
+    elif isinstance(value, int) or isinstance(value, float):
+        return {"N": str(value)}
+    elif value is None:
+        return {"NULL": True}
+    elif isinstance(value, list):
+        return {"L": [legacy_serialize_value(v) for v in value]}
+    elif isinstance(value, dict):
+        return {"M": {k: legacy_serialize_value(v) for k, v in value.items()}}
+    raise ValueError(f"Unsupported type: {type(value)}")
+
+
+def legacy_deserialize_value(value):
+    dtype = next(iter(value))
+    raw = value[dtype]
+    if dtype == "S":
+        return raw
+    elif dtype == "N":
+        return int(raw) if raw.isdigit() else float(raw)
+    elif dtype == "BOOL":
+        return raw
+    elif dtype == "NULL":
+        return None
+    elif dtype == "L":
+        return [legacy_deserialize_value(v) for v in raw]
+    elif dtype == "M":
+        return {k: legacy_deserialize_value(v) for k, v in raw.items()}
+    return raw
+
+
+USER_ITEM = {
+    "pk": "USER#6f1c2f0e-62b5-4a0e-9d8e-4f3f0f9b7c11",
+    "id": "6f1c2f0e-62b5-4a0e-9d8e-4f3f0f9b7c11",
+    "user_name": "Ada Lovelace",
+    "email": "ada@example.com",
+    "password_hash": "$2b$12$C6UzMDM.H6dfI/f/IKcEeO3iKq5Kx5n2Vv0YvWmJz0xqk9mP3b0mW",
+    "created_at": "2024-05-01T10:00:00.000000+00:00",
+    "updated_at": "2024-05-02T11:30:00.000000+00:00",
+    "apps": ["portal", "billing", "analytics"],
+}
+
+
+def main(iterations: int) -> None:
+    encoded = USER_CODEC.serialize(USER_ITEM)
+    candidates = {
+        "serialize legacy": lambda: {k: legacy_serialize_value(v) for k, v in USER_ITEM.items()},
+        "serialize generic": lambda: {k: encode_value(v) for k, v in USER_ITEM.items()},
+        "serialize compiled": lambda: USER_CODEC.serialize(USER_ITEM),
+        "deserialize legacy": lambda: {k: legacy_deserialize_value(v) for k, v in encoded.items()},
+        "deserialize generic": lambda: {k: decode_value(v) for k, v in encoded.items()},
+        "deserialize compiled": lambda: USER_CODEC.deserialize(encoded),
+    }
+
+    print(f"iterations={iterations}")
+    for name, func in candidates.items():
+        best = min(timeit.repeat(func, number=iterations, repeat=5))
+        print(f"{name:<22} {best / iterations * 1e6:7.2f} us/item")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,52 @@
+"""
+Tests for the DynamoDB attribute codec.
+"""
+
+import os
+import sys
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.aws_proxy.dynamoDb.codec import decode_value, encode_value
+from auth_service.logic.repository.dynamo_user_repository import USER_CODEC
+
+
+def test_numbers_round_trip_including_negatives():
+    for value in (0, 42, -7, 3.5, -0.25, 1e-07, 12345678901234567890):
+        decoded = decode_value(encode_value(value))
+        assert decoded == value
+        assert type(decoded) is type(value)
+
+
+def test_nested_lists_maps_and_sets():
+    value = {"tags": {"b", "a"}, "scores": {1, -2}, "nested": [{"ok": True, "none": None}, ["x", -1]]}
+    encoded = encode_value(value)
+
+    assert encoded["M"]["tags"] == {"SS": ["a", "b"]}
+    assert encoded["M"]["scores"] == {"NS": ["-2", "1"]}
+    assert decode_value(encoded) == value
+
+
+def test_bool_is_not_a_number():
+    assert encode_value(True) == {"BOOL": True}
+    assert encode_value([False]) == {"L": [{"BOOL": False}]}
+
+
+def test_user_codec_matches_generic_encoding():
+    item = {
+        "pk": "USER#1",
+        "id": "1",
+        "user_name": None,
+        "email": "one@example.com",
+        "password_hash": "hash",
+        "created_at": "2024-01-01T00:00:00+00:00",
+        "updated_at": "2024-01-01T00:00:00+00:00",
+        "apps": ["app", "other"],
+    }
+    encoded = USER_CODEC.serialize(item)
+
+    assert encoded == {k: encode_value(v) for k, v in item.items()}
+    assert USER_CODEC.deserialize(encoded) == item
+    # attributes outside the schema still round trip
+    assert USER_CODEC.deserialize(USER_CODEC.serialize({"expires_at": -1})) == {"expires_at": -1}
@@ -0,0 +1,82 @@
+"""
+Measure DynamoDBUserRepository under tail latency and throttling, using the in-process DynamoDB stand-in.
+
+Run with: python tests/dynamo_latency_benchmark.py [lookups]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+from botocore.exceptions import ClientError
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import AsyncDynamoDBOperations
+from auth_service.aws_proxy.dynamoDb.local_client import LocalDynamoDBClient, parse_latency
+from auth_service.logic.repository.dynamo_user_repository import DynamoDBUserRepository
+from auth_service.models.users import User
+
+USERS = 500
+SCENARIOS = [
+    ("constant 5 ms", "constant:5", 0.0),
+    ("lognormal 5 ms, sigma 0.8", "lognormal:5:0.8", 0.0),
+    ("1% of calls at 200 ms", "tail:5:200:0.01", 0.0),
+    ("lognormal, 2% throttled", "lognormal:5:0.8", 0.02),
+]
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run_scenario(latency: str, throttle_rate: float, lookups: int) -> dict:
+    client = LocalDynamoDBClient(seed=1)
+    repo = DynamoDBUserRepository(users_table=AsyncDynamoDBOperations("users", "local", client=client))
+    for i in range(USERS):
+        await repo.create_user(User(id=str(i), email=f"user{i}@example.com", password_hash="x"))
+    client.latency = parse_latency(latency, seed=2)
+    client.throttle_rate = throttle_rate
+
+    async def lookup(i: int) -> tuple[float, bool]:
+        start = time.perf_counter()
+        try:
+            await repo.get_user_by_id(str(i % USERS))
+            ok = True
+        except ClientError:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(lookup(i) for i in range(lookups)))
+    elapsed = time.perf_counter() - start
+
+    batch_start = time.perf_counter()
+    await repo.get_users_by_ids([str(i) for i in range(USERS)])
+    batch_ms = (time.perf_counter() - batch_start) * 1000
+
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        "p50": percentile(latencies, 0.50),
+        "p99": percentile(latencies, 0.99),
+        "errors": sum(1 for _, ok in results if not ok),
+        "rps": lookups / elapsed,
+        "batch_ms": batch_ms,
+    }
+
+
+def main(lookups: int) -> None:
+    print(f"lookups={lookups} users={USERS}")
+    print(f"{'scenario':<28} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'req/s':>8} {'batch of 500 ms':>16}")
+    for name, latency, throttle_rate in SCENARIOS:
+        result = asyncio.run(run_scenario(latency, throttle_rate, lookups))
+        print(
+            f"{name:<28} {result['p50']:8.1f} {result['p99']:8.1f} {result['errors']:>6} "
+            f"{result['rps']:8.0f} {result['batch_ms']:16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,145 @@
+"""
+Tests for AsyncDynamoDBOperations against a local stand-in client with injected latency.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import AsyncDynamoDBOperations
+from auth_service.logic.repository.dynamo_user_repository import DynamoDBUserRepository
+from auth_service.models.users import User
+
+LATENCY = 0.05
+
+
+class SlowClient:
+    """
+    Minimal stand-in for the boto3 DynamoDB client that sleeps like a network round trip.
+    """
+
+    def __init__(self, unprocessed_first: int = 0, projection: str = "KEYS_ONLY"):
+        self.items = {}
+        self.unprocessed_first = unprocessed_first
+        self.projection = projection
+        self.batch_calls = []
+        self.get_calls = 0
+
+    def put_item(self, TableName, Item):
+        time.sleep(LATENCY)
+        self.items[Item["pk"]["S"]] = Item
+
+    def transact_write_items(self, TransactItems):
+        time.sleep(LATENCY)
+        for action in TransactItems:
+            item = action["Put"]["Item"]
+            self.items[item["pk"]["S"]] = item
+
+    def get_item(self, TableName, Key):
+        time.sleep(LATENCY)
+        self.get_calls += 1
+        item = self.items.get(Key["pk"]["S"])
+        return {"Item": item} if item else {}
+
+    def batch_get_item(self, RequestItems):
+        time.sleep(LATENCY)
+        table, request = next(iter(RequestItems.items()))
+        keys = request["Keys"]
+        assert len(keys) <= 100
+        self.batch_calls.append(len(keys))
+        # pretend DynamoDB ran out of capacity for the tail of the first request
+        served, unprocessed = keys, []
+        if self.unprocessed_first:
+            served, unprocessed = keys[: -self.unprocessed_first], keys[-self.unprocessed_first :]
+            self.unprocessed_first = 0
+        found = [self.items[key["pk"]["S"]] for key in served if key["pk"]["S"] in self.items]
+        response = {"Responses": {table: found}}
+        if unprocessed:
+            response["UnprocessedKeys"] = {table: {"Keys": unprocessed}}
+        return response
+
+    def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues, IndexName=None, Limit=None):
+        time.sleep(LATENCY)
+        email = ExpressionAttributeValues[":email"]["S"]
+        items = [item for item in self.items.values() if item.get("email", {}).get("S") == email]
+        if self.projection == "KEYS_ONLY":
+            items = [{"pk": item["pk"], "email": item["email"]} for item in items]
+        return {"Items": items[:Limit]}
+
+
+def _repository(workers: int, client: SlowClient | None = None) -> DynamoDBUserRepository:
+    table = AsyncDynamoDBOperations(
+        "users", "local", client=client or SlowClient(), executor=ThreadPoolExecutor(max_workers=workers)
+    )
+    return DynamoDBUserRepository(users_table=table)
+
+
+def test_concurrent_lookups_overlap_latency():
+    repo = _repository(workers=10)
+
+    async def run():
+        await repo.create_user(User(id="1", name="one", email="one@example.com", password_hash="x"))
+        start = time.perf_counter()
+        users = await asyncio.gather(*(repo.get_user_by_id("1") for _ in range(10)))
+        return users, time.perf_counter() - start
+
+    users, elapsed = asyncio.run(run())
+    assert all(user is not None and user.name == "one" for user in users)
+    # ten sequential round trips would take 10 * LATENCY
+    assert elapsed < 5 * LATENCY
+
+
+def test_get_user_by_email_uses_index():
+    repo = _repository(workers=2)
+
+    async def run():
+        await repo.create_user(User(id="2", name="two", email="two@example.com", password_hash="x"))
+        return await repo.get_user_by_email("two@example.com"), await repo.get_user_by_email("none@example.com")
+
+    found, missing = asyncio.run(run())
+    assert found is not None and found.id == "2"
+    assert missing is None
+
+
+def test_email_lookup_reads_fully_projected_index_in_one_round_trip():
+    timings = {}
+    for projection, mode in (("KEYS_ONLY", "auto"), ("ALL", "two_hop"), ("ALL", "auto")):
+        client = SlowClient(projection=projection)
+        repo = _repository(workers=2, client=client)
+        repo._email_lookup = mode  # pylint: disable=protected-access
+
+        async def run():
+            await repo.create_user(User(id="3", name="three", email="three@example.com", password_hash="x"))
+            start = time.perf_counter()
+            user = await repo.get_user_by_email("three@example.com")
+            return user, time.perf_counter() - start
+
+        user, timings[(projection, mode)] = asyncio.run(run())
+        assert user is not None and user.name == "three" and user.password_hash == "x"
+        assert client.get_calls == (0 if (projection, mode) == ("ALL", "auto") else 1)
+
+    assert timings[("ALL", "auto")] < timings[("KEYS_ONLY", "auto")]
+
+
+def test_get_users_by_ids_chunks_and_retries_unprocessed_keys():
+    client = SlowClient(unprocessed_first=7)
+    repo = _repository(workers=2, client=client)
+
+    for i in range(150):
+        client.items[f"USER#{i}"] = {
+            "pk": {"S": f"USER#{i}"},
+            "id": {"S": str(i)},
+            "email": {"S": f"user{i}@example.com"},
+            "password_hash": {"S": "x"},
+        }
+
+    users = asyncio.run(repo.get_users_by_ids(["149", "missing", "0", "0"] + [str(i) for i in range(1, 140)]))
+    assert [user.id for user in users[:2]] == ["149", "0"]
+    assert len(users) == 141
+    # 142 unique keys: a full chunk, the retry of its unprocessed tail, then the rest
+    assert client.batch_calls == [100, 7, 42]
@@ -0,0 +1,40 @@
+"""
+Benchmark per-request overhead of getting services from the factory.
+"before" rebuilds the object graph like every request used to, "after" reuses the container wide graph.
+
+Run with: python tests/factory_benchmark.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("USER_DYNAMO_TABLE", "benchmark-users")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+from auth_service.logic.factory import Factory, factory  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def rebuild_graph():
+    """
+    What every request paid before the graph was cached.
+    """
+    user_repo = Factory._build_user_repository()  # pylint: disable=protected-access
+    token_service = Factory._build_token_service()  # pylint: disable=protected-access
+    Factory._build_authentication_service(user_repo, token_service)  # pylint: disable=protected-access
+
+
+def reuse_graph():
+    factory.get_user_service()
+    factory.get_authentication_service()
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    factory.warm_up()
+    for label, func in (("before (rebuild)", rebuild_graph), ("after (reuse)", reuse_graph)):
+        elapsed = timeit.timeit(func, number=iterations)
+        print(f"{label:18s} {elapsed / iterations * 1e6:8.2f} us/request")
@@ -0,0 +1,112 @@
+"""
+Tests for Google ID token verification against a local stand-in certificate server.
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, UTC
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.logic.startegies.google_certificates import GoogleCertificateCache, GoogleTokenVerifier
+
+
+def _key_and_certificate():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "stand-in")])
+    now = datetime.now(UTC)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, certificate.public_bytes(serialization.Encoding.PEM).decode("utf-8")
+
+
+KEY, CERTIFICATE = _key_and_certificate()
+
+
+@pytest.fixture(name="cert_server")
+def fixture_cert_server():
+    state = {"requests": 0, "certs": {"kid-1": CERTIFICATE}, "cache_control": "public, max-age=3600"}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):  # pylint: disable=invalid-name
+            state["requests"] += 1
+            body = json.dumps(state["certs"]).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", state["cache_control"])
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/certs"
+    yield state
+    server.shutdown()
+
+
+def _google_token(kid="kid-1", issuer="https://accounts.google.com"):
+    now = datetime.now(UTC)
+    claims = {"iss": issuer, "sub": "42", "email": "g@example.com", "iat": now, "exp": now + timedelta(minutes=5)}
+    return jwt.encode(claims, KEY, algorithm="RS256", headers={"kid": kid})
+
+
+def test_certificates_are_fetched_once_within_max_age(cert_server):
+    verifier = GoogleTokenVerifier(GoogleCertificateCache(certs_url=cert_server["url"]))
+
+    for _ in range(3):
+        assert verifier.verify(_google_token())["email"] == "g@example.com"
+    assert cert_server["requests"] == 1
+
+
+def test_no_cache_response_is_fetched_every_time(cert_server):
+    cert_server["cache_control"] = "no-cache"
+    verifier = GoogleTokenVerifier(GoogleCertificateCache(certs_url=cert_server["url"]))
+
+    verifier.verify(_google_token())
+    verifier.verify(_google_token())
+    assert cert_server["requests"] == 2
+
+
+def test_unknown_kid_refreshes_once_per_interval(cert_server):
+    cache = GoogleCertificateCache(certs_url=cert_server["url"], min_refresh_interval_seconds=60)
+    verifier = GoogleTokenVerifier(cache)
+    verifier.verify(_google_token())
+
+    # Google rotated its keys
+    cert_server["certs"] = {"kid-2": CERTIFICATE}
+    with pytest.raises(ValueError):
+        verifier.verify(_google_token(kid="kid-2"))
+    assert cert_server["requests"] == 1
+
+    cache.min_refresh_interval_seconds = 0
+    assert verifier.verify(_google_token(kid="kid-2"))["sub"] == "42"
+    assert cert_server["requests"] == 2
+
+
+def test_wrong_issuer_is_rejected(cert_server):
+    verifier = GoogleTokenVerifier(GoogleCertificateCache(certs_url=cert_server["url"]))
+    with pytest.raises(Exception, match="Wrong issuer"):
+        verifier.verify(_google_token(issuer="https://evil.example.com"))
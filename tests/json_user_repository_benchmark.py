@@ -0,0 +1,62 @@
+"""
+Benchmark JsonUserRepository writes, startup rebuild and email lookups at large user counts.
+
+Run with: python tests/json_user_repository_benchmark.py [user_counts...]   (default: 100000 1000000)
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.logic.repository.json_user_repository import JsonUserRepository  # noqa: E402
+from auth_service.models.users import User  # noqa: E402
+
+LOOKUPS = 10000
+
+
+async def run(users: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, "user_records.json")
+        with open(snapshot, "w", encoding="utf-8") as f:
+            f.write("{}")
+
+        repo = JsonUserRepository(file_path=snapshot)
+        start = time.perf_counter()
+        for i in range(users):
+            await repo.create_user(User(id=str(i), email=f"user{i}@example.com", password_hash="x"))
+        write_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(LOOKUPS):
+            await repo.update_user(User(id=str(i), email=f"user{i}@example.com", password_hash="y"))
+        update_elapsed = time.perf_counter() - start
+        repo.close()
+
+        start = time.perf_counter()
+        repo = JsonUserRepository(file_path=snapshot)
+        startup_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(0, users, max(1, users // LOOKUPS)):
+            assert await repo.get_user_by_email(f"user{i}@example.com") is not None
+        lookup_elapsed = time.perf_counter() - start
+        repo.close()
+
+        print(
+            f"users={users:>9,} "
+            f"create={users / write_elapsed:9.0f}/s "
+            f"update={LOOKUPS / update_elapsed:9.0f}/s "
+            f"startup={startup_elapsed:6.2f}s "
+            f"email_lookup={lookup_elapsed / LOOKUPS * 1e6:6.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    for count in counts:
+        asyncio.run(run(count))
@@ -0,0 +1,116 @@
+"""
+Tests for the append-only log storage of JsonUserRepository.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+
+import pytest
+from errorhub.exceptions import ConflictException
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.logic.repository.json_user_repository import JsonUserRepository
+from auth_service.models.users import User
+
+
+def _repository(tmp_path, **kwargs) -> JsonUserRepository:
+    snapshot = tmp_path / "user_records.json"
+    if not snapshot.exists():
+        snapshot.write_text("{}", encoding="utf-8")
+    return JsonUserRepository(file_path=str(snapshot), **kwargs)
+
+
+def test_writes_are_replayed_after_restart(tmp_path):
+    repo = _repository(tmp_path)
+
+    async def write():
+        await repo.create_user(User(id="1", name="one", email="one@example.com", password_hash="x"))
+        await repo.create_user(User(id="2", name="two", email="two@example.com", password_hash="x"))
+        await repo.update_user(User(id="1", name="one", email="new@example.com", password_hash="x"))
+        await repo.delete_user("2")
+
+    asyncio.run(write())
+    repo.close()
+    # the snapshot was not rewritten, everything is in the log
+    assert json.loads((tmp_path / "user_records.json").read_text(encoding="utf-8")) == {}
+
+    restarted = _repository(tmp_path)
+
+    async def read():
+        return (
+            await restarted.get_user_by_email("new@example.com"),
+            await restarted.get_user_by_email("one@example.com"),
+            await restarted.get_user_by_id("2"),
+        )
+
+    renamed, old_email, deleted = asyncio.run(read())
+    assert renamed.id == "1"
+    assert old_email is None and deleted is None
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    repo = _repository(tmp_path, compact_every=3)
+
+    async def write():
+        for i in range(7):
+            await repo.create_user(User(id=str(i), email=f"user{i}@example.com", password_hash="x"))
+
+    asyncio.run(write())
+    repo.close()
+    snapshot = json.loads((tmp_path / "user_records.json").read_text(encoding="utf-8"))
+    log_lines = (tmp_path / "user_records.json.log").read_text(encoding="utf-8").splitlines()
+    # compacted after 3 writes, then waits until the log is as long as the user count again
+    assert len(snapshot) == 3
+    assert len(log_lines) == 4
+    assert len(_repository(tmp_path).user_dict) == 7
+
+
+def test_torn_last_record_is_discarded(tmp_path):
+    repo = _repository(tmp_path)
+    asyncio.run(repo.create_user(User(id="1", email="one@example.com", password_hash="x")))
+    repo.close()
+    with open(tmp_path / "user_records.json.log", "a", encoding="utf-8") as f:
+        f.write('{"op":"put","id":"2","user":{"id":"2"')
+
+    restarted = _repository(tmp_path)
+    asyncio.run(restarted.create_user(User(id="3", email="three@example.com", password_hash="x")))
+    restarted.close()
+
+    assert sorted(_repository(tmp_path).user_dict) == ["1", "3"]
+
+
+def test_taken_id_or_email_is_a_conflict(tmp_path):
+    repo = _repository(tmp_path)
+    asyncio.run(repo.create_user(User(id="1", email="one@example.com", password_hash="x")))
+
+    for user_id, email in (("1", "two@example.com"), ("2", "one@example.com")):
+        with pytest.raises(ConflictException):
+            asyncio.run(repo.create_user(User(id=user_id, email=email, password_hash="x")))
+    assert asyncio.run(repo.get_user_by_id("2")) is None
+    repo.close()
+
+
+def test_writes_and_compaction_run_off_the_event_loop(tmp_path, monkeypatch):
+    repo = _repository(tmp_path, compact_every=2)
+    compact = repo.compact
+    threads = []
+
+    def recording_compact():
+        threads.append(threading.current_thread().name)
+        compact()
+
+    monkeypatch.setattr(repo, "compact", recording_compact)
+
+    async def run():
+        for i in range(4):
+            await repo.create_user(User(id=str(i), email=f"user{i}@example.com", password_hash="x"))
+        return threading.current_thread().name
+
+    loop_thread = asyncio.run(run())
+    repo.close()
+    assert threads and loop_thread not in threads
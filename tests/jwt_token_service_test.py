@@ -0,0 +1,178 @@
+"""
+Tests for JWTTokenService.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, UTC
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.logic.repository.memory_revocation_store import InMemoryRevocationStore
+from auth_service.logic.services.authentication_service import AuthenticationService
+from auth_service.logic.services.jwt_token_service import JWTTokenService
+from auth_service.logic.services.key_ring import KeyRing, SigningKey
+from auth_service.models.users import User
+from auth_service.utils import metrics
+
+USER = User(id="1", name="one", email="one@example.com", password_hash="x", apps=["app"])
+
+
+def test_access_token_cache_serves_repeat_verifications():
+    service = JWTTokenService(secret_key="secret", access_token_cache_size=8)
+
+    async def run():
+        token = await service.generate_access_token(USER)
+        first = await service.verify_access_token(token)
+        first["sub"] = "tampered"
+        return token, await service.verify_access_token(token)
+
+    token, second = asyncio.run(run())
+    assert second["sub"] == "1"
+    stats = service.access_token_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert asyncio.run(service.verify_access_token(token + "x")) is None
+
+
+def test_access_token_cache_never_outlives_exp():
+    service = JWTTokenService(secret_key="secret", access_token_cache_size=8, access_token_cache_ttl_seconds=60)
+    payload = {"sub": "1", "type": "access", "exp": datetime.now(UTC) + timedelta(seconds=1)}
+    token = jwt.encode(payload, "secret", algorithm="HS256")
+
+    assert asyncio.run(service.verify_access_token(token)) is not None
+    time.sleep(1.1)
+    assert asyncio.run(service.verify_access_token(token)) is None
+
+
+def test_access_token_cache_disabled_by_default():
+    service = JWTTokenService(secret_key="secret")
+    assert service.access_token_cache_stats() is None
+
+
+def _pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode("utf-8")
+
+
+PRIVATE_KEYS = {
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+@pytest.mark.parametrize("algorithm", sorted(PRIVATE_KEYS))
+def test_asymmetric_tokens_verify_offline_from_jwks(algorithm):
+    ring = KeyRing([SigningKey("key-1", algorithm, private_key=_pem(PRIVATE_KEYS[algorithm]()))])
+    service = JWTTokenService(key_ring=ring)
+
+    token = asyncio.run(service.generate_access_token(USER))
+    assert jwt.get_unverified_header(token)["kid"] == "key-1"
+    assert asyncio.run(service.verify_access_token(token))["sub"] == "1"
+
+    # what a downstream service does with the published key set
+    jwk = jwt.PyJWKSet.from_dict(service.jwks())["key-1"]
+    assert jwt.decode(token, jwk.key, algorithms=[algorithm])["email"] == "one@example.com"
+
+
+def test_key_rotation_keeps_old_tokens_valid_until_retired():
+    ring = KeyRing([SigningKey("old", "ES256", private_key=_pem(PRIVATE_KEYS["ES256"]()))])
+    service = JWTTokenService(key_ring=ring)
+    old_token = asyncio.run(service.generate_refresh_token(USER))
+
+    ring.rotate(SigningKey("new", "ES256", private_key=_pem(PRIVATE_KEYS["ES256"]())))
+    new_token = asyncio.run(service.generate_refresh_token(USER))
+    assert jwt.get_unverified_header(new_token)["kid"] == "new"
+    assert asyncio.run(service.verify_refresh_token(old_token)) is not None
+
+    ring.retire("old")
+    assert asyncio.run(service.verify_refresh_token(old_token)) is None
+    assert asyncio.run(service.verify_refresh_token(new_token)) is not None
+    assert [key["kid"] for key in service.jwks()["keys"]] == ["new"]
+
+
+def test_cached_access_tokens_of_a_retired_key_are_rejected():
+    ring = KeyRing([SigningKey("old", "ES256", private_key=_pem(PRIVATE_KEYS["ES256"]()))])
+    service = JWTTokenService(key_ring=ring, access_token_cache_size=8)
+    old_token = asyncio.run(service.generate_access_token(USER))
+    assert asyncio.run(service.verify_access_token(old_token)) is not None
+
+    ring.rotate(SigningKey("new", "ES256", private_key=_pem(PRIVATE_KEYS["ES256"]())))
+    assert asyncio.run(service.verify_access_token(old_token)) is not None
+    ring.retire("old")
+    assert asyncio.run(service.verify_access_token(old_token)) is None
+
+
+def test_concurrent_rotations_of_one_token_have_one_winner():
+    service = JWTTokenService(secret_key="secret")
+
+    async def run():
+        token = await service.generate_refresh_token(USER)
+        return await asyncio.gather(*(service.rotate_refresh_token(token) for _ in range(5)))
+
+    successors = asyncio.run(run())
+    assert len([token for token in successors if token]) == 1
+
+
+class _UserRepository:
+    async def get_user_by_id(self, user_id):
+        return USER if user_id == USER.id else None
+
+
+def test_refresh_decodes_the_token_once():
+    store = InMemoryRevocationStore()
+    service = JWTTokenService(secret_key="secret", revocation_store=store)
+    auth = AuthenticationService({}, service, _UserRepository())
+    metrics.registry.reset()
+
+    async def run():
+        token = await service.generate_refresh_token(USER)
+        token_stages = metrics.start_request()
+        tokens = await auth.refresh(token)
+        stages = metrics.finish_request(token_stages, "/auth/refresh")
+        with pytest.raises(Exception) as exc_info:
+            await auth.refresh(token)
+        return tokens, stages, exc_info.value
+
+    tokens, stages, replay_error = asyncio.run(run())
+    assert [name for name, _ in stages].count("jwt.verify") == 1
+    assert replay_error.error_detail.code == 401
+    assert asyncio.run(service.verify_refresh_token(tokens["refresh_token"]))["sub"] == USER.id
+    assert len(store) == 1
+
+
+class _FlakyUserRepository(_UserRepository):
+    def __init__(self):
+        self.failures = 1
+
+    async def get_user_by_id(self, user_id):
+        if self.failures:
+            self.failures -= 1
+            raise TimeoutError("read timed out")
+        return await super().get_user_by_id(user_id)
+
+
+def test_failed_user_read_does_not_revoke_the_refresh_token():
+    store = InMemoryRevocationStore()
+    service = JWTTokenService(secret_key="secret", revocation_store=store)
+    auth = AuthenticationService({}, service, _FlakyUserRepository())
+
+    async def run():
+        token = await service.generate_refresh_token(USER)
+        with pytest.raises(TimeoutError):
+            await auth.refresh(token)
+        revoked_after_failure = len(store)
+        return revoked_after_failure, await auth.refresh(token)
+
+    revoked_after_failure, tokens = asyncio.run(run())
+    assert revoked_after_failure == 0
+    assert tokens["refresh_token"]
@@ -0,0 +1,365 @@
+"""
+Load generator that drives the app with synthetic API Gateway v2 events for /users, /auth/login, /auth/refresh,
+/auth/me and /auth/logout, using real accounts and tokens, and reports latency percentiles and throughput per route.
+
+Requests either go straight to the ASGI app on one event loop ("asgi"), or through mangum_handler, warm-up
+dispatch included, from a pool of handler threads the way Lambda calls it ("mangum").
+
+Run with: python tests/load_generator.py --mode asgi --concurrency 8 --requests 2000 --mix me=60,refresh=20,login=10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# pylint: disable=wrong-import-position,protected-access
+from auth_service.configuration import settings
+from auth_service.logic.factory import factory
+from auth_service.main import app, mangum_handler
+
+DEFAULT_MIX = {"me": 60, "refresh": 15, "login": 10, "register": 10, "logout": 5}
+PASSWORD = "load-test-password"
+
+
+@dataclass
+class Session:
+    """
+    One account of a virtual user, with its current tokens
+    """
+
+    email: str
+    access_token: str = ""
+    refresh_token: str = ""
+
+
+@dataclass
+class Request:
+    """
+    Route independent description of one HTTP request
+    """
+
+    method: str
+    path: str
+    body: dict | None = None
+    token: str | None = None
+
+    def to_event(self) -> dict:
+        """
+        API Gateway HTTP API (payload v2.0) event for this request
+        """
+        headers = {"content-type": "application/json", "user-agent": "load-generator"}
+        if self.token:
+            headers["authorization"] = f"Bearer {self.token}"
+        return {
+            "version": "2.0",
+            "routeKey": f"{self.method} {self.path}",
+            "rawPath": self.path,
+            "rawQueryString": "",
+            "headers": headers,
+            "requestContext": {
+                "http": {
+                    "method": self.method,
+                    "path": self.path,
+                    "protocol": "HTTP/1.1",
+                    "sourceIp": "127.0.0.1",
+                    "userAgent": "load-generator",
+                },
+                "requestId": uuid.uuid4().hex,
+                "stage": "$default",
+            },
+            "body": json.dumps(self.body) if self.body is not None else None,
+            "isBase64Encoded": False,
+        }
+
+
+@dataclass
+class RouteStats:
+    """
+    Latencies of one route in milliseconds, and how many responses were not 2xx
+    """
+
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.latencies_ms)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+async def call_asgi(request: Request) -> tuple[int, dict]:
+    """
+    Serve a request with the ASGI app on the running loop
+    """
+    body = json.dumps(request.body).encode() if request.body is not None else b""
+    headers = [(b"content-type", b"application/json")]
+    if request.token:
+        headers.append((b"authorization", f"Bearer {request.token}".encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": request.method,
+        "scheme": "https",
+        "path": request.path,
+        "raw_path": request.path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("load-generator", 443),
+    }
+    received = False
+    status = 500
+    chunks: list[bytes] = []
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    raw = b"".join(chunks)
+    return status, json.loads(raw) if raw else {}
+
+
+def call_mangum(request: Request) -> tuple[int, dict]:
+    """
+    Serve a request through mangum_handler like the Lambda runtime does
+    """
+    response = mangum_handler(request.to_event(), {})
+    body = response.get("body")
+    return response["statusCode"], json.loads(body) if body else {}
+
+
+def register_request(session: Session) -> Request:
+    payload = {"name": "load", "email": session.email, "password": PASSWORD, "app_name": "load-test"}
+    return Request("POST", "/users", body={"payload": payload})
+
+
+def login_request(session: Session) -> Request:
+    credentials = {"email": session.email, "password": PASSWORD}
+    return Request("POST", "/auth/login", body={"data": {"strategy": "email_password", "credentials": credentials}})
+
+
+def refresh_request(session: Session) -> Request:
+    tokens = {"access_token": session.access_token, "refresh_token": session.refresh_token}
+    return Request("POST", "/auth/refresh", body={"data": tokens})
+
+
+def me_request(session: Session) -> Request:
+    return Request("GET", "/auth/me", token=session.access_token)
+
+
+def logout_request(session: Session) -> Request:
+    return Request(
+        "POST", "/auth/logout", body={"data": {"refresh_token": session.refresh_token}}, token=session.access_token
+    )
+
+
+class VirtualUser:
+    """
+    Walks one account through the route mix. Every virtual user owns its session, so token rotation never races.
+    """
+
+    def __init__(self, index: int, send) -> None:
+        self.session = Session(email=f"load-{uuid.uuid4().hex[:12]}-{index}@example.com")
+        self.send = send
+        self.logged_in = False
+
+    async def _timed(self, route: str, request: Request, stats: dict[str, RouteStats]) -> dict:
+        start = time.perf_counter()
+        status, body = await self.send(request)
+        route_stats = stats.setdefault(route, RouteStats())
+        route_stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+        if not 200 <= status < 300:
+            route_stats.errors += 1
+        return body if 200 <= status < 300 else {}
+
+    async def _login(self, stats: dict[str, RouteStats]) -> None:
+        body = await self._timed("login", login_request(self.session), stats)
+        self.session.access_token = body.get("access_token", "")
+        self.session.refresh_token = body.get("refresh_token", "")
+        self.logged_in = bool(self.session.access_token)
+
+    async def set_up(self) -> None:
+        """
+        Register and log in, without recording the latencies
+        """
+        await self.send(register_request(self.session))
+        await self._login({})
+
+    async def step(self, route: str, stats: dict[str, RouteStats]) -> None:
+        """
+        Issue one request of the given route, logging in again first when the last step logged out
+        """
+        if route == "register":
+            newcomer = Session(email=f"new-{uuid.uuid4().hex}@example.com")
+            await self._timed("register", register_request(newcomer), stats)
+        elif route == "login" or not self.logged_in:
+            await self._login(stats)
+        elif route == "refresh":
+            body = await self._timed("refresh", refresh_request(self.session), stats)
+            if body:
+                self.session.access_token = body["access_token"]
+                self.session.refresh_token = body["refresh_token"]
+        elif route == "me":
+            await self._timed("me", me_request(self.session), stats)
+        elif route == "logout":
+            await self._timed("logout", logout_request(self.session), stats)
+            self.logged_in = False
+
+
+def schedule(mix: dict[str, int], requests: int) -> list[str]:
+    """
+    Deterministic interleaving of routes in the proportions of the mix
+    """
+    total = sum(mix.values())
+    credit = dict.fromkeys(mix, 0.0)
+    routes = []
+    for _ in range(requests):
+        for route, weight in mix.items():
+            credit[route] += weight / total
+        route = max(credit, key=credit.get)
+        credit[route] -= 1
+        routes.append(route)
+    return routes
+
+
+def run_load(mode: str = "asgi", concurrency: int = 4, requests: int = 200, mix: dict[str, int] | None = None) -> dict:
+    """
+    Run the mix with `concurrency` virtual users and return per-route and overall latency and throughput
+    :param mode: "asgi" to call the app on one event loop, "mangum" to go through the Lambda handler from threads.
+    """
+    routes = schedule(mix or DEFAULT_MIX, requests)
+    stats: dict[str, RouteStats] = {}
+
+    def shard(worker: int) -> list[str]:
+        return routes[worker::concurrency]
+
+    if mode == "asgi":
+        send = call_asgi
+        pool = None
+    elif mode == "mangum":
+        # every virtual user gets a handler thread with its own loop, mangum runs the event on it like on Lambda
+        pool = ThreadPoolExecutor(max_workers=concurrency, initializer=_set_thread_loop)
+
+        async def send(request: Request) -> tuple[int, dict]:
+            return await asyncio.get_running_loop().run_in_executor(pool, call_mangum, request)
+
+    else:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    async def drive() -> float:
+        users = [VirtualUser(i, send) for i in range(concurrency)]
+        await asyncio.gather(*(user.set_up() for user in users))
+        start = time.perf_counter()
+        await asyncio.gather(*(_walk(user, shard(i), stats) for i, user in enumerate(users)))
+        return time.perf_counter() - start
+
+    # a loop of its own, so the caller's current loop stays set for mangum_handler calls on this thread
+    loop = asyncio.new_event_loop()
+    try:
+        elapsed = loop.run_until_complete(drive())
+    finally:
+        loop.close()
+        if pool is not None:
+            pool.shutdown()
+    return report(stats, elapsed)
+
+
+def _set_thread_loop() -> None:
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+async def _walk(user: VirtualUser, routes: list[str], stats: dict[str, RouteStats]) -> None:
+    for route in routes:
+        await user.step(route, stats)
+
+
+def report(stats: dict[str, RouteStats], elapsed: float) -> dict:
+    """
+    Summarise latencies per route and overall
+    """
+    overall = RouteStats()
+    result: dict = {"elapsed_s": elapsed, "routes": {}}
+    for route, route_stats in sorted(stats.items()):
+        overall.latencies_ms.extend(route_stats.latencies_ms)
+        overall.errors += route_stats.errors
+        result["routes"][route] = _summary(route_stats, elapsed)
+    result["overall"] = _summary(overall, elapsed)
+    return result
+
+
+def _summary(route_stats: RouteStats, elapsed: float) -> dict:
+    return {
+        "requests": len(route_stats.latencies_ms),
+        "errors": route_stats.errors,
+        "p50_ms": route_stats.percentile(0.50),
+        "p95_ms": route_stats.percentile(0.95),
+        "p99_ms": route_stats.percentile(0.99),
+        "throughput_rps": len(route_stats.latencies_ms) / elapsed if elapsed else 0.0,
+    }
+
+
+def parse_mix(raw: str) -> dict[str, int]:
+    mix = {}
+    for part in raw.split(","):
+        route, weight = part.split("=")
+        if route not in DEFAULT_MIX:
+            raise ValueError(f"Unknown route {route}, expected one of {sorted(DEFAULT_MIX)}")
+        mix[route] = int(weight)
+    return mix
+
+
+def use_local_backend() -> None:
+    """
+    Serve from a throwaway SQLite database unless a backend and JWT secret are configured
+    """
+    if "USER_REPOSITORY" not in os.environ:
+        settings._config["userRepository"] = "sqlite"
+        settings._config["userSqlitePath"] = os.path.join(tempfile.mkdtemp(prefix="load-"), "users.sqlite3")
+    if not settings.get_jwt_secret() and not settings.get_jwt_signing_keys():
+        settings._jwt_secret_key = "load-test-secret"
+    factory.reset()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--mode", choices=("asgi", "mangum"), default="asgi")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. me=60,refresh=20,login=10")
+    args = parser.parse_args()
+
+    use_local_backend()
+    result = run_load(args.mode, args.concurrency, args.requests, args.mix)
+    print(f"mode={args.mode} concurrency={args.concurrency} elapsed={result['elapsed_s']:.2f}s")
+    print(f"{'route':<10} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for route, summary in [*result["routes"].items(), ("overall", result["overall"])]:
+        print(
+            f"{route:<10} {summary['requests']:>8} {summary['errors']:>6} {summary['p50_ms']:8.2f} "
+            f"{summary['p95_ms']:8.2f} {summary['p99_ms']:8.2f} {summary['throughput_rps']:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Smoke test of the load generator on a throwaway SQLite backend, through both entry points.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.configuration import settings
+from auth_service.logic.factory import factory
+from load_generator import run_load, schedule
+
+MIX = {"me": 4, "refresh": 2, "logout": 1, "login": 1, "register": 1}
+
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setitem(settings._config, "userRepository", "sqlite")
+    monkeypatch.setitem(settings._config, "userSqlitePath", str(tmp_path / "users.sqlite3"))
+    monkeypatch.setattr(settings, "_jwt_secret_key", "load-test-secret")
+    factory.reset()
+    yield
+    factory.get_user_repository().close()
+    factory.reset()
+
+
+def test_schedule_follows_the_mix():
+    routes = schedule(MIX, 90)
+    assert {route: routes.count(route) for route in MIX} == {route: weight * 10 for route, weight in MIX.items()}
+
+
+@pytest.mark.parametrize("mode", ["asgi", "mangum"])
+def test_every_route_succeeds(mode):
+    result = run_load(mode=mode, concurrency=2, requests=18, mix=MIX)
+
+    assert set(result["routes"]) == set(MIX)
+    assert result["overall"]["errors"] == 0, result
+    assert result["overall"]["requests"] >= 18
+    for summary in result["routes"].values():
+        assert 0 < summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"]
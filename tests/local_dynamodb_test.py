@@ -0,0 +1,389 @@
+"""
+Tests for the in-process DynamoDB stand-in, directly and behind the repositories.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from botocore.exceptions import ClientError
+from errorhub.exceptions import ConflictException, NotFoundException, ServiceUnavailableException
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.aws_proxy.dynamoDb.client_manager import DynamoDBClientManager
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import AsyncDynamoDBOperations
+from auth_service.aws_proxy.dynamoDb.local_client import LocalDynamoDBClient, LocalTable, parse_latency
+from auth_service.aws_proxy.dynamoDb.util import get_dynamodb_client
+from auth_service.configuration import settings
+from auth_service.logic.repository.dynamo_revocation_store import DynamoDBRevocationStore
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import DynamoDBOperations
+from auth_service.logic.repository.dynamo_user_repository import DynamoDBUserRepository
+from auth_service.logic.repository.email_backfill import backfill_email_items
+from auth_service.logic.services.user_service import UserService
+from auth_service.models.users import User
+
+
+def _table(client: LocalDynamoDBClient) -> AsyncDynamoDBOperations:
+    return AsyncDynamoDBOperations("users", "local", client=client, executor=ThreadPoolExecutor(max_workers=4))
+
+
+def _code(exc_info) -> str:
+    return exc_info.value.response["Error"]["Code"]
+
+
+def test_user_repository_round_trip():
+    repo = DynamoDBUserRepository(users_table=_table(LocalDynamoDBClient()))
+    user = User(id="1", name="one", email="one@example.com", password_hash="x", apps=["a"])
+
+    async def run():
+        await repo.create_user(user)
+        by_email = await repo.get_user_by_email("one@example.com")
+        batch = await repo.get_users_by_ids(["1", "missing"])
+        await repo.delete_user("1")
+        return by_email, batch, await repo.get_user_by_id("1")
+
+    by_email, batch, deleted = asyncio.run(run())
+    assert by_email == user
+    assert batch == [user]
+    assert deleted is None
+
+
+def test_registration_is_one_conditional_transaction(monkeypatch):
+    monkeypatch.setitem(settings._config, "emailUniquenessBackfilled", "true")
+    client = LocalDynamoDBClient()
+    repo = DynamoDBUserRepository(users_table=_table(client))
+
+    async def signup(user_id: str, email: str):
+        user = User(id=user_id, email=email, password_hash="x")
+        try:
+            return await repo.create_user(user)
+        except ConflictException as exc:
+            return exc.error_detail.message
+
+    async def run():
+        racing = await asyncio.gather(*(signup(str(i), "race@example.com") for i in range(5)))
+        winner = next(result for result in racing if isinstance(result, User))
+        return racing, await signup(winner.id, "other@example.com")
+
+    racing, same_id = asyncio.run(run())
+    assert sum(isinstance(result, User) for result in racing) == 1
+    assert sorted(result for result in racing if not isinstance(result, User)) == ["Email already exists"] * 4
+    assert same_id == "User Id already exists"
+    assert client.calls["TransactWriteItems"] == 6
+    assert client.calls["Query"] == 0
+    # only a refused email is read, with its owner, to see whether it was left by a deleted user
+    assert client.calls["GetItem"] == 2 * 4
+
+
+def _legacy_user(client: LocalDynamoDBClient, user_id: str, email: str) -> None:
+    """
+    user item written before registration reserved emails, without its EMAIL# item
+    """
+    item = {"pk": f"USER#{user_id}", "id": user_id, "email": email, "password_hash": "x"}
+    DynamoDBOperations("users", "local", client=client).create_item(item)
+
+
+def test_legacy_emails_are_checked_on_the_index_until_backfilled(monkeypatch):
+    client = LocalDynamoDBClient()
+    repo = DynamoDBUserRepository(users_table=_table(client))
+    _legacy_user(client, "old", "legacy@example.com")
+
+    with pytest.raises(ConflictException):
+        asyncio.run(repo.create_user(User(id="new", email="legacy@example.com", password_hash="x")))
+
+    monkeypatch.setitem(settings._config, "emailUniquenessBackfilled", "true")
+    before = client.calls["Query"]
+    asyncio.run(repo.create_user(User(id="other", email="other@example.com", password_hash="x")))
+    assert client.calls["Query"] == before
+
+
+def test_backfill_reserves_legacy_emails_and_reports_duplicates(monkeypatch):
+    client = LocalDynamoDBClient()
+    table = DynamoDBOperations("users", "local", client=client)
+    repo = DynamoDBUserRepository(users_table=_table(client))
+    asyncio.run(repo.create_user(User(id="1", email="new@example.com", password_hash="x")))
+    for i in range(5):
+        _legacy_user(client, f"old{i}", f"old{i}@example.com")
+    _legacy_user(client, "dup", "old0@example.com")
+
+    report = backfill_email_items(table, page_size=2)
+    assert (report.users, report.created, report.present) == (7, 5, 1)
+    # users are scanned in key order, USER#dup took the email first
+    assert report.conflicts == {"old0@example.com": ["dup", "old0"]}
+    assert table.get_item({"pk": "EMAIL#old3@example.com"})["user_id"] == "old3"
+
+    # the index check is no longer needed, the EMAIL# item refuses the email
+    monkeypatch.setitem(settings._config, "emailUniquenessBackfilled", "true")
+    with pytest.raises(ConflictException):
+        asyncio.run(repo.create_user(User(id="new", email="old3@example.com", password_hash="x")))
+    assert backfill_email_items(table).created == 0
+
+
+def test_limit_below_one_is_a_validation_error():
+    client = LocalDynamoDBClient()
+    _legacy_user(client, "1", "one@example.com")
+    key_condition = {"KeyConditionExpression": "pk = :pk", "ExpressionAttributeValues": {":pk": {"S": "USER#1"}}}
+
+    with pytest.raises(ClientError) as scan_error:
+        client.scan(TableName="users", Limit=0)
+    with pytest.raises(ClientError) as query_error:
+        client.query(TableName="users", Limit=0, **key_condition)
+    for exc_info in (scan_error, query_error):
+        assert exc_info.value.response["Error"]["Code"] == "ValidationException"
+
+
+def test_register_user_conflict_reaches_the_service():
+    repo = DynamoDBUserRepository(users_table=_table(LocalDynamoDBClient()))
+    service = UserService(repo)
+
+    async def run():
+        await service.register_user(User(id="1", email="taken@example.com", password_hash="secret"))
+        with pytest.raises(ConflictException):
+            await service.register_user(User(id="2", email="taken@example.com", password_hash="secret"))
+        return await repo.get_user_by_email("taken@example.com")
+
+    assert asyncio.run(run()).id == "1"
+
+
+def test_patch_is_one_conditional_update():
+    client = LocalDynamoDBClient()
+    repo = DynamoDBUserRepository(users_table=_table(client))
+    user = User(id="1", name="one", email="one@example.com", password_hash="x", apps=["a"], updated_at="t1")
+
+    async def run():
+        await repo.create_user(user)
+        before = client.calls.copy()
+        patched = await repo.patch_user("1", {"name": "uno", "updated_at": "t2"}, expected_updated_at="t1")
+        calls = client.calls - before
+        with pytest.raises(ConflictException):
+            await repo.patch_user("1", {"name": "stale", "updated_at": "t3"}, expected_updated_at="t1")
+        with pytest.raises(NotFoundException):
+            await repo.patch_user("missing", {"name": "none"})
+        return patched, calls, await repo.get_user_by_id("1")
+
+    patched, calls, stored = asyncio.run(run())
+    assert calls == {"UpdateItem": 1}
+    assert patched == stored
+    assert (stored.name, stored.updated_at, stored.apps, stored.password_hash) == ("uno", "t2", ["a"], "x")
+
+
+def test_email_patch_moves_the_uniqueness_item():
+    client = LocalDynamoDBClient()
+    repo = DynamoDBUserRepository(users_table=_table(client))
+    service = UserService(repo)
+
+    async def run():
+        await repo.create_user(User(id="1", email="one@example.com", password_hash="x"))
+        await repo.create_user(User(id="2", email="two@example.com", password_hash="x"))
+        with pytest.raises(ConflictException):
+            await service.update_user_by_id("1", {"email": "two@example.com"})
+        moved = await service.update_user_by_id("1", {"email": "new@example.com"})
+        # the old email is free again
+        await repo.create_user(User(id="3", email="one@example.com", password_hash="x"))
+        return moved, await repo.get_user_by_email("new@example.com")
+
+    moved, by_new_email = asyncio.run(run())
+    assert moved == by_new_email
+    assert moved.id == "1"
+
+
+def test_delete_is_conditional_and_releases_the_email():
+    client = LocalDynamoDBClient()
+    repo = DynamoDBUserRepository(users_table=_table(client))
+    service = UserService(repo)
+
+    async def run():
+        await repo.create_user(User(id="1", name="one", email="one@example.com", password_hash="x"))
+        before = client.calls.copy()
+        deleted = await repo.delete_user("1")
+        calls = client.calls - before
+        with pytest.raises(NotFoundException):
+            await service.delete_user("1")
+        # the email can be registered again
+        await repo.create_user(User(id="2", email="one@example.com", password_hash="x"))
+        return deleted, calls
+
+    deleted, calls = asyncio.run(run())
+    assert (deleted.id, deleted.name) == ("1", "one")
+    # the user item, then its email item; nothing is read first
+    assert calls == {"DeleteItem": 2}
+
+
+def test_registration_reclaims_an_email_item_left_by_a_deleted_user():
+    client = LocalDynamoDBClient()
+    repo = DynamoDBUserRepository(users_table=_table(client))
+    asyncio.run(repo.create_user(User(id="gone", email="orphan@example.com", password_hash="x")))
+    # the user item is deleted but its email item is left behind
+    DynamoDBOperations("users", "local", client=client).delete_item({"pk": "USER#gone"})
+
+    asyncio.run(repo.create_user(User(id="new", email="orphan@example.com", password_hash="x")))
+    assert asyncio.run(repo.get_user_by_email("orphan@example.com")).id == "new"
+    with pytest.raises(ConflictException):
+        asyncio.run(repo.create_user(User(id="third", email="orphan@example.com", password_hash="x")))
+
+
+class _FailingEmailRelease(AsyncDynamoDBOperations):
+    """
+    table whose deletes of email items fail a given number of times
+    """
+
+    def __init__(self, client: LocalDynamoDBClient, failures: int) -> None:
+        super().__init__("users", "local", client=client, executor=ThreadPoolExecutor(max_workers=2))
+        self.failures = failures
+
+    async def delete_item(self, key, *args, **kwargs):
+        if key["pk"].startswith("EMAIL#") and self.failures:
+            self.failures -= 1
+            raise ClientError({"Error": {"Code": "InternalServerError", "Message": "boom"}}, "DeleteItem")
+        return await super().delete_item(key, *args, **kwargs)
+
+
+@pytest.mark.parametrize("failures, released", [(2, True), (3, False)])
+def test_email_release_is_retried_then_raised(failures, released):
+    client = LocalDynamoDBClient()
+    table = _FailingEmailRelease(client, failures)
+    repo = DynamoDBUserRepository(users_table=table)
+    asyncio.run(repo.create_user(User(id="1", email="retry@example.com", password_hash="x")))
+
+    if released:
+        asyncio.run(repo.delete_user("1"))
+    else:
+        with pytest.raises(ServiceUnavailableException):
+            asyncio.run(repo.delete_user("1"))
+    assert asyncio.run(repo.get_user_by_id("1")) is None
+    assert (asyncio.run(table.get_item({"pk": "EMAIL#retry@example.com"})) is None) == released
+
+
+def test_conditions_and_update_expressions():
+    client = LocalDynamoDBClient()
+    client.put_item(TableName="t", Item={"pk": {"S": "a"}, "count": {"N": "1"}, "tags": {"SS": ["x"]}})
+
+    with pytest.raises(ClientError) as exc_info:
+        client.put_item(TableName="t", Item={"pk": {"S": "a"}}, ConditionExpression="attribute_not_exists(pk)")
+    assert _code(exc_info) == "ConditionalCheckFailedException"
+
+    response = client.update_item(
+        TableName="t",
+        Key={"pk": {"S": "a"}},
+        UpdateExpression="SET #c = #c + :one, label = if_not_exists(label, :label) REMOVE tags ADD seen :one",
+        ConditionExpression="#c BETWEEN :one AND :ten AND NOT contains(tags, :y)",
+        ExpressionAttributeNames={"#c": "count"},
+        ExpressionAttributeValues={":one": {"N": "1"}, ":ten": {"N": "10"}, ":label": {"S": "new"}, ":y": {"S": "y"}},
+        ReturnValues="ALL_NEW",
+    )
+    assert response["Attributes"] == {
+        "pk": {"S": "a"},
+        "count": {"N": "2"},
+        "label": {"S": "new"},
+        "seen": {"N": "1"},
+    }
+
+    with pytest.raises(ClientError) as exc_info:
+        client.delete_item(
+            TableName="t",
+            Key={"pk": {"S": "a"}},
+            ConditionExpression="#c < :zero",
+            ExpressionAttributeNames={"#c": "count"},
+            ExpressionAttributeValues={":zero": {"N": "-1"}},
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+    assert exc_info.value.response["Item"]["count"] == {"N": "2"}
+
+
+def test_transaction_is_all_or_nothing():
+    client = LocalDynamoDBClient()
+    client.put_item(TableName="t", Item={"pk": {"S": "EMAIL#taken"}})
+    condition = "attribute_not_exists(pk)"
+    writes = [
+        {"Put": {"TableName": "t", "Item": {"pk": {"S": "USER#2"}}, "ConditionExpression": condition}},
+        {"Put": {"TableName": "t", "Item": {"pk": {"S": "EMAIL#taken"}}, "ConditionExpression": condition}},
+    ]
+
+    with pytest.raises(ClientError) as exc_info:
+        client.transact_write_items(TransactItems=writes)
+
+    assert _code(exc_info) == "TransactionCanceledException"
+    assert [r["Code"] for r in exc_info.value.response["CancellationReasons"]] == ["None", "ConditionalCheckFailed"]
+    assert client.get_item(TableName="t", Key={"pk": {"S": "USER#2"}}) == {}
+
+
+def test_expired_items_disappear_after_the_deletion_delay():
+    now = [1000.0]
+    client = LocalDynamoDBClient(ttl_deletion_delay_seconds=10, clock=lambda: now[0])
+    store = DynamoDBRevocationStore(_table(client))
+
+    async def run():
+        await store.revoke("jti", expires_at=1005)
+        now[0] = 1010
+        # expired but not yet deleted: still returned, the store itself ignores it
+        still_there = await store.table.get_item({"pk": "REVOKED#jti"}) is not None
+        now[0] = 1016
+        return still_there, await store.table.get_item({"pk": "REVOKED#jti"})
+
+    assert asyncio.run(run()) == (True, None)
+
+
+def test_throttling_is_injected():
+    client = LocalDynamoDBClient(throttle_rate=1.0)
+    with pytest.raises(ClientError) as exc_info:
+        client.get_item(TableName="t", Key={"pk": {"S": "a"}})
+    assert _code(exc_info) == "ProvisionedThroughputExceededException"
+    assert client.throttled["GetItem"] == 1
+
+
+def test_throttled_batch_keys_are_retried_by_the_repository():
+    client = LocalDynamoDBClient(seed=7)
+    repo = DynamoDBUserRepository(users_table=_table(client))
+    users = [User(id=str(i), email=f"user{i}@example.com", password_hash="x") for i in range(150)]
+
+    async def run():
+        for user in users:
+            await repo.create_user(user)
+        client.throttle_rate = 0.1
+        return await repo.get_users_by_ids([user.id for user in users])
+
+    assert asyncio.run(run()) == users
+    assert client.calls["BatchGetItem"] > 2
+
+
+def test_batch_keys_throttled_past_the_retries_are_a_service_error():
+    client = LocalDynamoDBClient(throttle_rate=1.0)
+    table = DynamoDBOperations("users", "local", client=client)
+
+    with pytest.raises(ServiceUnavailableException):
+        table.batch_get_items([{"pk": "USER#1"}], max_retries=1)
+
+
+def test_latency_distribution_is_applied():
+    client = LocalDynamoDBClient(latency=parse_latency("constant:20"))
+    start = time.perf_counter()
+    client.get_item(TableName="t", Key={"pk": {"S": "a"}})
+    assert time.perf_counter() - start >= 0.02
+    assert 0.5 < sorted(parse_latency("lognormal:1:0.5", seed=1)() * 1000 for _ in range(101))[50] < 2
+
+
+def test_client_manager_returns_the_local_client(monkeypatch):
+    monkeypatch.setitem(settings._config, "dynamoBackend", "local")
+    DynamoDBClientManager.use_client(None)
+    try:
+        assert isinstance(get_dynamodb_client("local"), LocalDynamoDBClient)
+    finally:
+        DynamoDBClientManager.use_client(None)
+
+
+def test_keys_only_index_projection():
+    client = LocalDynamoDBClient(tables=[LocalTable("users", indexes={"email-index": ("email", "KEYS_ONLY")})])
+    client.put_item(TableName="users", Item={"pk": {"S": "USER#1"}, "email": {"S": "a@b.c"}, "name": {"S": "n"}})
+
+    response = client.query(
+        TableName="users",
+        IndexName="email-index",
+        KeyConditionExpression="email = :email",
+        ExpressionAttributeValues={":email": {"S": "a@b.c"}},
+    )
+    assert response["Items"] == [{"pk": {"S": "USER#1"}, "email": {"S": "a@b.c"}}]
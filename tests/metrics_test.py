@@ -0,0 +1,94 @@
+"""
+Tests for the per-stage latency histograms and their Prometheus, Server-Timing and embedded metric outputs.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.configuration import settings
+from auth_service.logic.factory import factory
+from auth_service.main import mangum_handler
+from auth_service.utils import metrics
+from load_generator import Request, Session, login_request, register_request
+
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setitem(settings._config, "userRepository", "sqlite")
+    monkeypatch.setitem(settings._config, "userSqlitePath", str(tmp_path / "users.sqlite3"))
+    monkeypatch.setitem(settings._config, "metricsEmf", "false")
+    monkeypatch.setitem(settings._config, "metricsEndpointEnabled", "false")
+    monkeypatch.setattr(settings, "_jwt_secret_key", "metrics-secret")
+    factory.reset()
+    metrics.registry.reset()
+    yield
+    factory.get_user_repository().close()
+    factory.reset()
+    metrics.registry.reset()
+
+
+def _sign_up(email: str) -> dict:
+    session = Session(email=email)
+    assert mangum_handler(register_request(session).to_event(), {})["statusCode"] == 201
+    return mangum_handler(login_request(session).to_event(), {})
+
+
+def test_login_stages_are_recorded_per_route():
+    _sign_up("stages@example.com")
+
+    snapshot = metrics.registry.snapshot()
+    for stage in ("request", "auth.login", "strategy.email_password", "password.verify", "jwt.sign"):
+        assert snapshot[(stage, "/auth/login")]["count"] >= 1, stage
+    assert snapshot[("password.hash", "/users")]["count"] == 1
+    # two tokens are signed per login
+    assert snapshot[("jwt.sign", "/auth/login")]["count"] == 2
+
+    assert mangum_handler(Request("GET", "/metrics").to_event(), {})["statusCode"] == 404
+    settings._config["metricsEndpointEnabled"] = "true"
+    exposition = mangum_handler(Request("GET", "/metrics").to_event(), {})["body"]
+    assert "# TYPE auth_service_stage_duration_seconds histogram" in exposition
+    assert 'auth_service_stage_duration_seconds_count{stage="password.verify",route="/auth/login"} 1' in exposition
+    assert 'stage="password.verify",route="/auth/login",le="+Inf"} 1' in exposition
+
+
+def test_server_timing_header(monkeypatch):
+    monkeypatch.setitem(settings._config, "serverTimingEnabled", "true")
+    response = _sign_up("timing@example.com")
+
+    names = [entry.split(";")[0] for entry in response["headers"]["server-timing"].split(", ")]
+    assert {"auth.login", "password.verify", "jwt.sign", "request"} <= set(names)
+    assert len(names) == len(set(names))
+
+
+def test_embedded_metric_line(monkeypatch, capsys):
+    monkeypatch.setitem(settings._config, "metricsEmf", "true")
+    mangum_handler(Request("GET", "/no/such/route").to_event(), {})
+
+    document = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert document["route"] == "unmatched"
+    assert document["status"] == 404
+    directive = document["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == "AuthService"
+    assert directive["Dimensions"] == [["route"]]
+    assert {"Name": "request", "Unit": "Milliseconds"} in directive["Metrics"]
+
+
+def test_stages_outside_requests_and_buckets():
+    @metrics.timed("test.sync")
+    def work():
+        return 42
+
+    assert work() == 42
+    histogram = metrics.Histogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(seconds)
+
+    assert metrics.registry.snapshot()[("test.sync", metrics.NO_ROUTE)]["count"] == 1
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.sum == pytest.approx(3.65)
@@ -0,0 +1,46 @@
+"""
+Benchmark login password verification throughput for different hashing pool sizes.
+
+Run with: python tests/password_benchmark.py [logins_per_run]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.utils.password import HashingExecutor, hash_password, verify_password
+
+
+async def run_logins(executor: HashingExecutor, hashed: str, logins: int) -> float:
+    """
+    Verify the password `logins` times concurrently and return logins per second.
+    """
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify_password("s3cret", hashed, executor) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return logins / elapsed
+
+
+async def main(logins: int) -> None:
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, cores} | {cores * 2})
+    hashed = await hash_password("s3cret", HashingExecutor(max_workers=1, max_queue_size=0))
+
+    print(f"cores={cores} logins_per_run={logins}")
+    for kind in ("thread", "process"):
+        for workers in worker_counts:
+            executor = HashingExecutor(max_workers=workers, max_queue_size=logins, kind=kind)
+            # warm the pool so worker start-up is not measured
+            await verify_password("s3cret", hashed, executor)
+            throughput = await run_logins(executor, hashed, logins)
+            executor.shutdown()
+            print(f"{kind:8s} workers={workers:3d} {throughput:8.1f} logins/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 32))
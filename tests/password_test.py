@@ -0,0 +1,168 @@
+"""
+Tests for password hashing running in the bounded hashing executor.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from errorhub.exceptions import ServiceUnavailableException, UnauthorizedException
+
+from auth_service.configuration import settings
+from auth_service.logic.interfaces.iuser_respository import IUserRepository
+from auth_service.logic.startegies.password_startegy import EmailPasswordStrategy
+from auth_service.models.users import User
+from auth_service.utils.password import HashingExecutor, hash_password, verify_password
+from auth_service.utils.password_hashers import (
+    Argon2idHasher,
+    BcryptHasher,
+    ScryptHasher,
+    calibrate,
+    identify,
+    needs_rehash,
+)
+
+
+def test_hash_and_verify_round_trip():
+    executor = HashingExecutor(max_workers=2, max_queue_size=2)
+
+    async def run():
+        hashed = await hash_password("s3cret", executor)
+        return await verify_password("s3cret", hashed, executor), await verify_password("wrong", hashed, executor)
+
+    assert asyncio.run(run()) == (True, False)
+    executor.shutdown()
+
+
+def test_event_loop_keeps_running_while_hashing():
+    executor = HashingExecutor(max_workers=1, max_queue_size=1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        await hash_password("s3cret", executor)
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) > 1
+    executor.shutdown()
+
+
+def test_rejects_when_queue_is_full():
+    executor = HashingExecutor(max_workers=1, max_queue_size=0)
+    release = threading.Event()
+
+    async def run():
+        blocked = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceUnavailableException):
+            await executor.run(release.wait)
+        release.set()
+        await blocked
+
+    asyncio.run(run())
+    executor.shutdown()
+
+
+@pytest.mark.parametrize(
+    "hasher, scheme",
+    [(BcryptHasher(4), "bcrypt"), (ScryptHasher(10), "scrypt"), (Argon2idHasher(1, 1024, 1), "argon2id")],
+)
+def test_every_scheme_verifies_its_hashes(hasher, scheme):
+    if scheme == "argon2id":
+        pytest.importorskip("argon2")
+    executor = HashingExecutor(max_workers=1, max_queue_size=1)
+
+    async def run():
+        hashed = await hash_password("s3cret", executor, hasher)
+        return hashed, await verify_password("s3cret", hashed, executor), await verify_password("no", hashed, executor)
+
+    hashed, right, wrong = asyncio.run(run())
+    assert (identify(hashed), right, wrong) == (scheme, True, False)
+    executor.shutdown()
+
+
+def test_rehash_is_needed_for_another_scheme_or_other_parameters():
+    bcrypt_hash = BcryptHasher(4).hash("s3cret")
+    scrypt_hash = ScryptHasher(10).hash("s3cret")
+
+    assert not needs_rehash(bcrypt_hash, BcryptHasher(4))
+    assert needs_rehash(bcrypt_hash, BcryptHasher(5))
+    assert needs_rehash(bcrypt_hash, ScryptHasher(10))
+    assert not needs_rehash(scrypt_hash, ScryptHasher(10))
+    assert needs_rehash(scrypt_hash, ScryptHasher(11))
+
+
+def test_calibration_stays_within_the_target():
+    hasher, elapsed_ms = calibrate(BcryptHasher(4), target_ms=20)
+
+    assert hasher.rounds >= 4
+    assert elapsed_ms <= 20 or hasher.rounds == 4
+
+
+class _UserRepository(IUserRepository):
+    def __init__(self, user: User) -> None:
+        self.users = {user.id: user}
+
+    async def create_user(self, user):
+        self.users[user.id] = user
+        return user
+
+    async def get_user_by_email(self, email):
+        return next((user for user in self.users.values() if user.email == email), None)
+
+    async def get_user_by_id(self, user_id):
+        return self.users.get(user_id)
+
+    async def get_users_by_ids(self, user_ids):
+        return [self.users[user_id] for user_id in user_ids if user_id in self.users]
+
+    async def update_user(self, user):
+        self.users[user.id] = user
+        return user
+
+    async def delete_user(self, user_id):
+        return self.users.pop(user_id)
+
+
+def test_login_rehashes_outdated_passwords(monkeypatch):
+    monkeypatch.setitem(settings._config, "passwordHashScheme", "scrypt")
+    monkeypatch.setitem(settings._config, "passwordScryptLn", "10")
+    user = User(id="1", email="one@example.com", password_hash=BcryptHasher(4).hash("s3cret"))
+    repository = _UserRepository(user)
+    executor = HashingExecutor(max_workers=1, max_queue_size=1)
+    strategy = EmailPasswordStrategy(repository, executor)
+    credentials = {"email": user.email, "password": "s3cret"}
+
+    asyncio.run(strategy.authenticate(credentials))
+    rehashed = repository.users["1"].password_hash
+    assert identify(rehashed) == "scrypt"
+    assert repository.users["1"].updated_at == user.updated_at
+
+    asyncio.run(strategy.authenticate(credentials))
+    assert repository.users["1"].password_hash == rehashed
+    executor.shutdown()
+
+
+def test_user_without_a_password_cannot_log_in_with_one():
+    google_user = User(id="1", email="one@example.com", password_hash="")
+    executor = HashingExecutor(max_workers=1, max_queue_size=1)
+    strategy = EmailPasswordStrategy(_UserRepository(google_user), executor)
+
+    assert not asyncio.run(verify_password("", "", executor))
+    with pytest.raises(UnauthorizedException):
+        asyncio.run(strategy.authenticate({"email": google_user.email, "password": "guess"}))
+    executor.shutdown()
@@ -0,0 +1,143 @@
+"""
+Tests for the on-demand request profiling middleware.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.configuration import settings
+from auth_service.middleware.profiling_middleware import (
+    ProfileBudget,
+    ProfilingMiddleware,
+    collapse,
+    sign_profile_request,
+    verify_profile_header,
+)
+
+SECRET = "profile-secret"
+
+
+@pytest.fixture(autouse=True)
+def profiling_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "_profiling_secret", SECRET)
+    monkeypatch.setitem(settings._config, "profilingOutputDir", str(tmp_path))
+    monkeypatch.setitem(settings._config, "profilingIntervalMs", "1")
+    monkeypatch.setitem(settings._config, "profilingSampleRate", "0")
+    return tmp_path
+
+
+def busy(seconds: float) -> int:
+    deadline, n = time.perf_counter() + seconds, 0
+    while time.perf_counter() < deadline:
+        n += 1
+    return n
+
+
+async def slow_app(scope, receive, send):
+    busy(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _serve(middleware, headers: dict) -> dict:
+    scope = {"type": "http", "headers": [(k.encode(), v.encode()) for k, v in headers.items()]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+def _signed(**headers) -> dict:
+    return {"x-debug-profile": sign_profile_request(SECRET, int(time.time()) + 60), **headers}
+
+
+def test_header_signature_and_expiry():
+    assert verify_profile_header(sign_profile_request(SECRET, 2000), SECRET, now=1000)
+    assert not verify_profile_header(sign_profile_request(SECRET, 2000), SECRET, now=2001)
+    assert not verify_profile_header(sign_profile_request("other", 2000), SECRET, now=1000)
+    assert not verify_profile_header(sign_profile_request(SECRET, 2000), None, now=1000)
+    assert not verify_profile_header("garbage", SECRET, now=1000)
+    # signed far ahead, a leaked header must not work forever
+    assert not verify_profile_header(sign_profile_request(SECRET, 1000 + 3601), SECRET, now=1000)
+
+
+def test_signed_request_writes_collapsed_stacks(profiling_settings):
+    middleware = ProfilingMiddleware(slow_app, budget=ProfileBudget(10))
+    headers = _serve(middleware, _signed(**{"x-request-id": "req/1"}))
+
+    assert headers[b"x-profile-id"] == b"req_1"
+    lines = (profiling_settings / "req_1.collapsed").read_text().splitlines()
+    assert lines
+    assert any("busy" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_unsigned_or_forged_requests_are_not_profiled(profiling_settings):
+    middleware = ProfilingMiddleware(slow_app, budget=ProfileBudget(10))
+    forged = {"x-debug-profile": sign_profile_request("guess", int(time.time()) + 60)}
+
+    assert b"x-profile-id" not in _serve(middleware, {})
+    assert b"x-profile-id" not in _serve(middleware, forged)
+    assert not os.listdir(profiling_settings)
+
+
+def test_pstats_output_and_limits(profiling_settings, monkeypatch):
+    monkeypatch.setitem(settings._config, "profilingFormat", "pstats")
+    monkeypatch.setitem(settings._config, "profilingMaxOutputBytes", "600")
+    monkeypatch.setitem(settings._config, "profilingMaxFiles", "2")
+    middleware = ProfilingMiddleware(slow_app, budget=ProfileBudget(10))
+
+    for i in range(3):
+        _serve(middleware, _signed(**{"x-request-id": f"req-{i}"}))
+        time.sleep(0.01)
+
+    assert sorted(os.listdir(profiling_settings)) == ["req-1.pstats.txt", "req-2.pstats.txt"]
+    report = (profiling_settings / "req-2.pstats.txt").read_text()
+    assert "cumulative" in report
+    assert len(report) <= 600 + len("[truncated]\n")
+
+
+def test_budget_allows_one_profile_at_a_time_and_a_few_per_minute():
+    now = [0.0]
+    budget = ProfileBudget(2, clock=lambda: now[0])
+
+    assert budget.acquire()
+    assert not budget.acquire()
+    budget.release()
+    assert budget.acquire()
+    budget.release()
+    assert not budget.acquire()
+    now[0] = 61
+    assert budget.acquire()
+
+
+def test_collapse_keeps_the_sample_total_when_truncating():
+    stacks = Counter({"a;b": 5, "a;c": 3, "a;d;e": 1})
+    text = collapse(stacks, max_bytes=len("a;b 5\n"))
+
+    assert text == "a;b 5\n[truncated] 4\n"
+
+
+def test_sampled_requests_never_use_cprofile(profiling_settings, monkeypatch):
+    monkeypatch.setitem(settings._config, "profilingFormat", "pstats")
+    monkeypatch.setitem(settings._config, "profilingSampleRate", "1")
+    middleware = ProfilingMiddleware(slow_app, budget=ProfileBudget(10))
+
+    _serve(middleware, {"x-request-id": "sampled"})
+    _serve(middleware, _signed(**{"x-request-id": "asked"}))
+
+    assert sorted(os.listdir(profiling_settings)) == ["asked.pstats.txt", "sampled.collapsed"]
@@ -0,0 +1,70 @@
+"""
+Benchmark POST /auth/refresh throughput on the in-process DynamoDB stand-in, with the revoked tokens kept in memory
+and in DynamoDB, and count the token decodes and DynamoDB calls every refresh costs.
+
+Run with: python tests/refresh_benchmark.py [requests] [latency]
+e.g. python tests/refresh_benchmark.py 2000 lognormal:5:0.5
+"""
+
+import os
+import sys
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# pylint: disable=wrong-import-position,protected-access
+from auth_service.configuration import settings
+from auth_service.logic.factory import factory
+from auth_service.utils import metrics
+
+from load_generator import run_load  # pylint: disable=import-error
+
+CONCURRENCY = 8
+ROUTE = "/auth/refresh"
+
+
+def per_refresh(refreshes: int) -> dict[str, float]:
+    """
+    Average number of times each stage ran per refresh
+    """
+    counts: dict[str, int] = {}
+    for (stage, route), histogram in metrics.registry.snapshot().items():
+        if route == ROUTE:
+            group = "dynamodb" if stage.startswith("dynamodb.") else stage
+            counts[group] = counts.get(group, 0) + histogram["count"]
+    return {group: count / refreshes for group, count in counts.items()} if refreshes else {}
+
+
+def run_scenario(revocation_store: str, requests: int) -> dict:
+    settings._config["revocationStore"] = revocation_store
+    factory.reset()
+    metrics.registry.reset()
+    result = run_load("asgi", CONCURRENCY, requests, {"refresh": 1})
+    summary = result["routes"]["refresh"]
+    return {**summary, **per_refresh(summary["requests"] - summary["errors"])}
+
+
+def main(requests: int, latency: str) -> None:
+    settings._config["dynamoBackend"] = "local"
+    settings._config["localDynamoLatency"] = latency
+    settings._config["userRepository"] = "dynamo"
+    settings._config["userDynamoTable"] = settings.get_user_dynamo_table_name() or "benchmark-users"
+    settings._config["metricsEnabled"] = "true"
+    if not settings.get_jwt_secret() and not settings.get_jwt_signing_keys():
+        settings._jwt_secret_key = "benchmark-secret"
+
+    print(f"requests={requests} concurrency={CONCURRENCY} dynamodb latency={latency} ms")
+    print(
+        f"{'revoked tokens':<16} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} "
+        f"{'decodes':>8} {'dynamodb calls':>15}"
+    )
+    for revocation_store in ("memory", "dynamo"):
+        result = run_scenario(revocation_store, requests)
+        print(
+            f"{revocation_store:<16} {result['throughput_rps']:8.0f} {result['p50_ms']:8.2f} {result['p99_ms']:8.2f} "
+            f"{result['errors']:>6} {result.get('jwt.verify', 0):8.2f} {result.get('dynamodb', 0):15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000, sys.argv[2] if len(sys.argv) > 2 else "0")
@@ -0,0 +1,90 @@
+"""
+Tests for refresh token revocation stores.
+"""
+
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.aws_proxy.dynamoDb.dynamo_operations import AsyncDynamoDBOperations
+from auth_service.logic.repository.cached_revocation_store import CachedRevocationStore
+from auth_service.logic.repository.dynamo_revocation_store import DynamoDBRevocationStore
+from auth_service.logic.repository.memory_revocation_store import InMemoryRevocationStore
+from auth_service.logic.services.jwt_token_service import JWTTokenService
+from auth_service.models.users import User
+
+
+class ConditionalClient:
+    """
+    Stand-in for the boto3 client supporting attribute_not_exists puts and counting reads.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.reads = 0
+
+    def put_item(self, TableName, Item, ConditionExpression=None):
+        pk = Item["pk"]["S"]
+        if ConditionExpression == "attribute_not_exists(pk)" and pk in self.items:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        self.items[pk] = Item
+
+    def get_item(self, TableName, Key):
+        self.reads += 1
+        item = self.items.get(Key["pk"]["S"])
+        return {"Item": item} if item else {}
+
+
+def test_logged_out_refresh_token_is_rejected():
+    service = JWTTokenService(secret_key="secret")
+    user = User(id="1", email="one@example.com", password_hash="x")
+
+    async def run():
+        token = await service.generate_refresh_token(user)
+        assert await service.verify_refresh_token(token) is not None
+        await service.revoke_refresh_token(token)
+        return await service.verify_refresh_token(token)
+
+    assert asyncio.run(run()) is None
+
+
+def test_memory_store_prunes_expired_ids():
+    store = InMemoryRevocationStore()
+
+    async def run():
+        assert await store.revoke("short", time.time() + 0.05)
+        assert not await store.revoke("short", time.time() + 0.05)
+        await store.revoke("long", time.time() + 60)
+        await asyncio.sleep(0.06)
+        return await store.is_revoked("short"), await store.is_revoked("long")
+
+    assert asyncio.run(run()) == (False, True)
+    assert len(store) == 1
+
+
+def test_revocations_are_answered_locally_and_others_read_through():
+    client = ConditionalClient()
+    table = AsyncDynamoDBOperations("users", "local", client=client, executor=ThreadPoolExecutor(max_workers=1))
+    other_container = DynamoDBRevocationStore(table)
+    store = CachedRevocationStore(DynamoDBRevocationStore(table))
+
+    async def run():
+        assert await store.revoke("jti-1", time.time() + 60)
+        for _ in range(5):
+            assert await store.is_revoked("jti-1")
+        assert not await store.is_revoked("jti-2")
+        assert await other_container.revoke("jti-2", time.time() + 60)
+        return await store.is_revoked("jti-2")
+
+    # a revocation by another container is seen right away
+    assert asyncio.run(run()) is True
+    # the two jti-2 lookups, jti-1 is never read back
+    assert client.reads == 2
+    assert store.stats()["revoked"]["hits"] == 5
@@ -0,0 +1,96 @@
+"""
+Tests for SqliteUserRepository.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from errorhub.exceptions import ConflictException, NotFoundException
+
+from auth_service.logic.repository.sqlite_user_repository import SqliteUserRepository
+from auth_service.models.users import User
+
+
+@pytest.fixture(name="repo")
+def fixture_repo(tmp_path):
+    repository = SqliteUserRepository(database_path=str(tmp_path / "users.sqlite3"), max_workers=4)
+    yield repository
+    repository.close()
+
+
+def test_crud_round_trip(repo):
+    async def run():
+        await repo.create_user(User(id="1", name="one", email="one@example.com", password_hash="x", apps=["a"]))
+        await repo.create_user(User(id="2", name="two", email="two@example.com", password_hash="x"))
+        by_email = await repo.get_user_by_email("one@example.com")
+        updated = await repo.update_user(
+            User(id="1", name="uno", email="uno@example.com", password_hash="y", apps=["a", "b"])
+        )
+        many = await repo.get_users_by_ids(["2", "missing", "1"])
+        assert (await repo.delete_user("2")).name == "two"
+        with pytest.raises(NotFoundException):
+            await repo.delete_user("2")
+        return by_email, updated, many, await repo.get_user_by_id("2")
+
+    by_email, updated, many, deleted = asyncio.run(run())
+    assert by_email.apps == ["a"]
+    assert (updated.name, updated.email, updated.apps) == ("uno", "uno@example.com", ["a", "b"])
+    assert [user.id for user in many] == ["2", "1"]
+    assert deleted is None
+
+
+def test_patch_changes_only_given_columns(repo):
+    async def run():
+        await repo.create_user(User(id="1", name="one", email="one@example.com", password_hash="x", updated_at="t1"))
+        await repo.create_user(User(id="2", email="two@example.com", password_hash="x"))
+        patched = await repo.patch_user("1", {"apps": ["b"], "updated_at": "t2"}, expected_updated_at="t1")
+        errors = []
+        for user_id, changes, expected in (
+            ("1", {"name": "stale"}, "t1"),
+            ("1", {"email": "two@example.com"}, None),
+            ("missing", {"name": "none"}, None),
+        ):
+            with pytest.raises((ConflictException, NotFoundException)) as exc_info:
+                await repo.patch_user(user_id, changes, expected)
+            errors.append(exc_info.value.error_detail.message)
+        return patched, errors
+
+    patched, errors = asyncio.run(run())
+    assert (patched.name, patched.apps, patched.updated_at) == ("one", ["b"], "t2")
+    assert errors == ["User was modified by another request", "Email already exists", "User not found"]
+
+
+def test_duplicate_email_is_a_conflict(repo):
+    async def run():
+        await repo.create_user(User(id="1", email="same@example.com", password_hash="x"))
+        await repo.create_user(User(id="2", email="same@example.com", password_hash="x"))
+
+    with pytest.raises(ConflictException):
+        asyncio.run(run())
+
+
+def test_update_to_a_taken_email_is_a_conflict(repo):
+    async def run():
+        await repo.create_user(User(id="1", email="one@example.com", password_hash="x"))
+        await repo.create_user(User(id="2", email="two@example.com", password_hash="x"))
+        await repo.update_user(User(id="2", email="one@example.com", password_hash="x"))
+
+    with pytest.raises(ConflictException, match="Email already exists"):
+        asyncio.run(run())
+
+
+def test_database_uses_wal_and_concurrent_reads(repo):
+    async def run():
+        await repo.create_user(User(id="1", email="one@example.com", password_hash="x"))
+        return await asyncio.gather(*(repo.get_user_by_id("1") for _ in range(20)))
+
+    assert all(user.id == "1" for user in asyncio.run(run()))
+    with sqlite3.connect(repo.database_path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
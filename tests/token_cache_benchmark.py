@@ -0,0 +1,93 @@
+"""
+Benchmark authenticated request throughput of GET /auth/me through mangum_handler,
+with the verified access token cache on and off.
+
+Run with: python tests/token_cache_benchmark.py [requests]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+os.environ.setdefault("USER_DYNAMO_TABLE", "benchmark-users")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+
+# pylint: disable=wrong-import-position,protected-access
+from auth_service.logic.factory import factory
+from auth_service.logic.interfaces.iuser_respository import IUserRepository
+from auth_service.logic.services.jwt_token_service import JWTTokenService
+from auth_service.main import mangum_handler
+from auth_service.models.users import User
+
+USER = User(id="bench-user", name="bench", email="bench@example.com", password_hash="x", apps=["bench"])
+
+
+class InMemoryUserRepository(IUserRepository):
+    """
+    Keeps the benchmark on the token path instead of the network.
+    """
+
+    async def create_user(self, user):
+        return user
+
+    async def get_user_by_email(self, email):
+        return USER
+
+    async def get_user_by_id(self, user_id):
+        return USER
+
+    async def get_users_by_ids(self, user_ids):
+        return [USER]
+
+    async def update_user(self, user):
+        return user
+
+    async def delete_user(self, user_id):
+        return None
+
+
+def me_event(token: str) -> dict:
+    return {
+        "version": "2.0",
+        "routeKey": "GET /auth/me",
+        "rawPath": "/auth/me",
+        "rawQueryString": "",
+        "headers": {"authorization": f"Bearer {token}"},
+        "requestContext": {
+            "http": {
+                "method": "GET",
+                "path": "/auth/me",
+                "protocol": "HTTP/1.1",
+                "sourceIp": "127.0.0.1",
+                "userAgent": "benchmark",
+            }
+        },
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+
+def run(cache_size: int, requests: int) -> float:
+    factory.reset()
+    factory._user_repository = InMemoryUserRepository()
+    factory._token_service = JWTTokenService(secret_key="benchmark-secret", access_token_cache_size=cache_size)
+    token = asyncio.new_event_loop().run_until_complete(factory._token_service.generate_access_token(USER))
+    event = me_event(token)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = mangum_handler(event, None)
+        assert response["statusCode"] == 200, response
+    return requests / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    for label, size in (("cache off", 0), ("cache on", 1024)):
+        print(f"{label:10s} {run(size, total):8.1f} requests/s")
+    print(f"cache stats: {factory._token_service.access_token_cache_stats()}")
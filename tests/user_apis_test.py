@@ -0,0 +1,115 @@
+"""
+Route level tests of the user APIs on a throwaway SQLite backend.
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.configuration import settings
+from auth_service.logic.factory import factory
+from auth_service.main import mangum_handler
+from load_generator import Request, Session, login_request, register_request
+
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(tmp_path, monkeypatch):
+    monkeypatch.setitem(settings._config, "userRepository", "sqlite")
+    monkeypatch.setitem(settings._config, "userSqlitePath", str(tmp_path / "users.sqlite3"))
+    monkeypatch.setattr(settings, "_jwt_secret_key", "user-apis-secret")
+    factory.reset()
+    yield
+    factory.get_user_repository().close()
+    factory.reset()
+
+
+def _call(request: Request, **headers) -> tuple[int, dict, dict]:
+    event = request.to_event()
+    event["headers"].update(headers)
+    response = mangum_handler(event, {})
+    body = response.get("body")
+    return response["statusCode"], response.get("headers", {}), json.loads(body) if body else {}
+
+
+def _sign_up(email: str) -> dict:
+    session = Session(email=email)
+    assert _call(register_request(session))[0] == 201
+    return _call(login_request(session))[2]
+
+
+def _batch(token: str, user_ids: list[str]) -> dict:
+    status, _, body = _call(Request("POST", "/users/batch", body={"payload": {"user_ids": user_ids}}, token=token))
+    assert status == 200, body
+    return body
+
+
+def test_batch_lookup_only_returns_the_caller_by_default():
+    one, two = _sign_up("one@example.com"), _sign_up("two@example.com")
+    ids = [one["user"]["id"], two["user"]["id"]]
+
+    body = _batch(one["access_token"], ids)
+    assert [user["id"] for user in body["users"]] == [ids[0]]
+    # other users look the same as unknown ones
+    assert body["not_found"] == [ids[1]]
+
+
+def test_batch_lookup_of_any_user_for_allowed_subjects(monkeypatch):
+    service, user = _sign_up("service@example.com"), _sign_up("user@example.com")
+    monkeypatch.setitem(settings._config, "userReadAllSubjects", f"other, {service['user']['id']}")
+
+    body = _batch(service["access_token"], [user["user"]["id"], "missing"])
+    assert [found["email"] for found in body["users"]] == ["user@example.com"]
+    assert body["not_found"] == ["missing"]
+
+
+def _put(login: dict, payload: dict, **headers) -> tuple[int, dict, dict]:
+    user_id = login["user"]["id"]
+    request = Request("PUT", f"/users/{user_id}", body={"payload": payload}, token=login["access_token"])
+    status, response_headers, body = _call(request, **headers)
+    return status, {k.lower(): v for k, v in response_headers.items()}, body
+
+
+def _get_etag(login: dict) -> str:
+    status, headers, _ = _call(Request("GET", f"/users/{login['user']['id']}", token=login["access_token"]))
+    assert status == 200
+    return {k.lower(): v for k, v in headers.items()}["etag"]
+
+
+def test_update_with_current_etag_succeeds_and_returns_the_new_one():
+    login = _sign_up("etag@example.com")
+    etag = _get_etag(login)
+
+    status, headers, body = _put(login, {"name": "renamed"}, **{"if-match": etag})
+    assert (status, body["name"]) == (200, "renamed")
+    assert headers["etag"] == f'"{body["updated_at"]}"' != etag
+    assert headers["etag"] == _get_etag(login)
+
+
+def test_weak_and_wildcard_if_match_are_accepted():
+    login = _sign_up("weak@example.com")
+
+    assert _put(login, {"name": "weak"}, **{"if-match": f"W/{_get_etag(login)}"})[0] == 200
+    assert _put(login, {"name": "any"}, **{"if-match": "*"})[0] == 200
+
+
+def test_update_with_stale_etag_is_a_conflict():
+    login = _sign_up("stale@example.com")
+    stale = _get_etag(login)
+    assert _put(login, {"name": "first"})[0] == 200
+
+    status, _, _ = _put(login, {"name": "second"}, **{"if-match": stale})
+    assert status == 409
+
+
+def test_update_of_a_deleted_user_is_not_found():
+    login = _sign_up("deleted@example.com")
+    user_id = login["user"]["id"]
+    assert _call(Request("DELETE", f"/users/{user_id}", token=login["access_token"]))[0] == 204
+
+    assert _put(login, {"name": "ghost"})[0] == 404
+    assert _put(login, {"name": "ghost"}, **{"if-match": "*"})[0] == 404
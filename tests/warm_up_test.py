@@ -0,0 +1,56 @@
+"""
+Tests for the Lambda warm-up hook.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path to import auth_service
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from auth_service.configuration import settings
+from auth_service.logic.factory import factory
+from auth_service.logic.warm_up import is_warm_up_event
+from auth_service.main import mangum_handler
+
+
+@pytest.fixture
+def sqlite_factory(tmp_path, monkeypatch):
+    monkeypatch.setitem(settings._config, "userRepository", "sqlite")
+    monkeypatch.setitem(settings._config, "userSqlitePath", str(tmp_path / "users.sqlite3"))
+    monkeypatch.setattr(settings, "_jwt_secret_key", "warm-up-secret")
+    factory.reset()
+    yield factory
+    factory.get_user_repository().close()
+    factory.reset()
+
+
+def test_recognises_warm_up_events():
+    assert is_warm_up_event({"source": "aws.events", "detail-type": "Scheduled Event", "detail": {}})
+    assert is_warm_up_event({"warm_up": True})
+    assert not is_warm_up_event({"version": "2.0", "rawPath": "/users"})
+    assert not is_warm_up_event(None)
+
+
+def test_ping_warms_up_every_step(sqlite_factory):
+    report = mangum_handler({"warm_up": True}, {})
+
+    assert report["warmed"], report["errors"]
+    assert set(report["steps"]) == {"services", "models", "tokens", "connections", "request"}
+    assert report["duration_ms"] >= sum(report["steps"].values()) * 0.99
+    assert sqlite_factory._authentication_service is not None
+
+
+def test_failing_step_is_reported_not_raised(monkeypatch):
+    monkeypatch.setattr(settings, "_jwt_secret_key", None)
+    monkeypatch.setattr(settings, "_jwt_signing_keys", None)
+    factory.reset()
+    try:
+        report = mangum_handler({"source": "aws.events", "detail-type": "Scheduled Event"}, {})
+    finally:
+        factory.reset()
+
+    assert not report["warmed"]
+    assert "tokens" in report["errors"]